@@ -0,0 +1,112 @@
+import numpy as np
+
+# per-ticker trade statistics kept up to date as the books fill orders. every
+# statistic is a running accumulator, so a batch of fills costs a few vector
+# ops across all tickers and a quote is a few array reads, whatever the
+# history length.
+
+EMA_FAST = 20
+EMA_SLOW = 50
+
+
+class TradeStats:
+    # per-ticker trade analytics over the feed's fills (see broadcast.py),
+    # shipped to every screen as STATS frames (see wire.py): cumulative
+    # volume, VWAP, EMA(20/50) over trades and realized volatility from
+    # trade-to-trade log returns. on_trade is O(1); on_trades takes a whole
+    # batch in a few vector ops
+    def __init__(self, prices):
+        prices = np.asarray(prices, dtype=np.float64)
+        n = len(prices)
+        self.open = prices.copy()
+        self.last = prices.copy()
+        self.ema_fast = prices.copy()
+        self.ema_slow = prices.copy()
+        self.volume = np.zeros(n)
+        self.buy_volume = np.zeros(n)
+        self.pv = np.zeros(n)
+        self.rss = np.zeros(n)           # sum of squared log returns
+        self.trades = np.zeros(n, dtype=np.int64)
+
+    def on_trade(self, i, side, qty, px):
+        if self.trades[i]:
+            r = np.log(px / self.last[i])
+            self.rss[i] += r * r
+            self.ema_fast[i] += (px - self.ema_fast[i]) * (2.0 / (EMA_FAST + 1))
+            self.ema_slow[i] += (px - self.ema_slow[i]) * (2.0 / (EMA_SLOW + 1))
+        else:
+            self.ema_fast[i] = self.ema_slow[i] = px
+        self.last[i] = px
+        self.volume[i] += qty
+        if side:
+            self.buy_volume[i] += qty
+        self.pv[i] += px * qty
+        self.trades[i] += 1
+
+    def on_trades(self, sym, side, qty, px):
+        # same result as on_trade in a loop. trades are grouped by ticker
+        # (stable, so each ticker keeps its own order); the EMA recurrence
+        # over a group of m trades unrolls to
+        #   ema' = d^m ema + sum_j a d^(m-1-j) px_j,   d = 1 - a
+        sym = np.asarray(sym, dtype=np.intp)
+        if not len(sym):
+            return
+        side = np.asarray(side)
+        qty = np.asarray(qty, dtype=np.float64)
+        px = np.asarray(px, dtype=np.float64)
+        n = len(self.last)
+        self.volume += np.bincount(sym, qty, minlength=n)
+        self.buy_volume += np.bincount(sym, qty * (side != 0), minlength=n)
+        self.pv += np.bincount(sym, qty * px, minlength=n)
+
+        order = np.argsort(sym, kind="stable")
+        s, p = sym[order], px[order]
+        starts = np.flatnonzero(np.r_[True, s[1:] != s[:-1]])
+        counts = np.diff(np.r_[starts, len(s)])
+        g = s[starts]
+        fresh = self.trades[g] == 0
+        first = np.where(fresh, p[starts], self.last[g])
+        prev = np.empty_like(p)
+        prev[1:] = p[:-1]
+        prev[starts] = first
+        r = np.log(p / prev)
+        self.rss += np.bincount(s, r * r, minlength=n)
+
+        group = np.repeat(np.arange(len(g)), counts)
+        age = np.repeat(starts + counts - 1, counts) - np.arange(len(s))  # trades after this one
+        for ema, span in ((self.ema_fast, EMA_FAST), (self.ema_slow, EMA_SLOW)):
+            a = 2.0 / (span + 1)
+            base = np.where(fresh, p[starts], ema[g])
+            ema[g] = (1 - a) ** counts * base + np.bincount(group, a * (1 - a) ** age * p, minlength=len(g))
+        self.last[g] = p[starts + counts - 1]
+        self.trades[g] += counts
+
+    def columns(self, idx):
+        # the quote() fields of the tickers in idx as arrays, plus the
+        # session reference price the change is measured from
+        v = self.volume[idx]
+        traded = v > 0
+        return {
+            "open": self.open[idx],
+            "last": self.last[idx],
+            "vwap": np.where(traded, self.pv[idx] / np.where(traded, v, 1.0), self.last[idx]),
+            "ema20": self.ema_fast[idx],
+            "ema50": self.ema_slow[idx],
+            "rv": np.sqrt(self.rss[idx]) * 100.0,
+            "volume": v,
+            "buy": np.where(traded, self.buy_volume[idx] / np.where(traded, v, 1.0), 0.0),
+            "trades": self.trades[idx],
+        }
+
+    def quote(self, i):
+        v = self.volume[i]
+        return {
+            "last": round(float(self.last[i]), 2),
+            "vwap": round(float(self.pv[i] / v), 2) if v else round(float(self.last[i]), 2),
+            "ema20": round(float(self.ema_fast[i]), 2),
+            "ema50": round(float(self.ema_slow[i]), 2),
+            "rv": round(float(np.sqrt(self.rss[i]) * 100.0), 3),
+            "volume": int(v),
+            "buy": round(float(self.buy_volume[i] / v), 3) if v else 0.0,
+            "trades": int(self.trades[i]),
+        }
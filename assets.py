@@ -0,0 +1,74 @@
+import base64
+import functools
+import hashlib
+import io
+from pathlib import Path
+
+from PIL import Image
+
+# logo renditions, computed once per process and shared by every session.
+# the source sam.png is ~279 KB at 1383x1972, far bigger than anything on screen:
+# the brand mark is 44px tall, the watermark 200px wide and every other use is a
+# 12-18px icon, so we only ever ship two small downscaled copies.
+LOGO_PATH = Path(__file__).parent / "sam.png"
+LOGO_SIDE = 256   # brand mark + watermark (covers 2x density at 44px/200px)
+ICON_SIDE = 36    # navbar, badges, header dots, news bullets (2x of 18px)
+
+# final fallback tiny transparent pixel
+BLANK_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mP8Xw8AAmMB4hQq9XcAAAAASUVORK5CYII="
+)
+
+
+class LogoAssets:
+    __slots__ = ("digest", "logo_png", "icon_png", "aspect")
+
+    def __init__(self, digest, logo_png, icon_png, aspect):
+        self.digest = digest
+        self.logo_png = logo_png
+        self.icon_png = icon_png
+        self.aspect = aspect
+
+
+def _thumbnail(im, side):
+    t = im.copy()
+    t.thumbnail((side, side), Image.LANCZOS)
+    out = io.BytesIO()
+    t.save(out, "PNG", optimize=True)
+    return out.getvalue(), t.size
+
+
+@functools.lru_cache(maxsize=8)
+def _build(digest, data):
+    try:
+        im = Image.open(io.BytesIO(data))
+        im.load()
+        if im.mode not in ("RGB", "RGBA"):
+            im = im.convert("RGBA")
+        (logo, (w, h)), (icon, _) = _thumbnail(im, LOGO_SIDE), _thumbnail(im, ICON_SIDE)
+    except Exception:
+        # not a decodable image, fall back to the blank pixel rather than break the page
+        logo = icon = BLANK_PNG
+        w = h = 1
+    return LogoAssets(digest, logo, icon, f"{w} / {h}")
+
+
+def logo_assets_from_bytes(data):
+    return _build(hashlib.sha256(data).hexdigest(), data)
+
+
+@functools.lru_cache(maxsize=8)
+def _from_file(path, mtime_ns, size):
+    return logo_assets_from_bytes(Path(path).read_bytes())
+
+
+def load_logo_assets(upload=None, path=LOGO_PATH):
+    # an uploaded file wins; otherwise the repo's sam.png, keyed on its stat so a
+    # rerun never re-reads or re-encodes an unchanged file
+    if upload is not None:
+        return logo_assets_from_bytes(upload.getvalue())
+    try:
+        st = Path(path).stat()
+    except OSError:
+        return logo_assets_from_bytes(BLANK_PNG)
+    return _from_file(str(path), st.st_mtime_ns, st.st_size)
@@ -0,0 +1,103 @@
+"""Trade analytics throughput: per-trade updates vs the batch path, and the client applying the results.
+
+    python benchmarks/bench_analytics.py
+
+Random order flow over 1,000 tickers (side, qty, px as the blotter generates
+them) fed to analytics.TradeStats one trade at a time and in batches of 1k /
+10k / 100k. The browser no longer keeps trade stats of its own: the feed
+sends TradeStats columns in STATS frames (wire.encode_stats), and
+frontend/market.js copies them in (applyStats). With node on PATH that code
+is loaded from market.js as it ships and timed on the STATS frames of the
+10k batches.
+"""
+import base64
+import json
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from analytics import TradeStats  # noqa: E402
+from intents import INTENTS  # noqa: E402
+from wire import encode_stats  # noqa: E402
+
+TICKERS = 1_000
+TRADES = 1_000_000
+SCALAR = 50_000
+BATCHES = (1_000, 10_000, 100_000)
+MARKET_JS = Path(__file__).resolve().parent.parent / "frontend" / "market.js"
+
+NODE_BENCH = r"""
+const {source, seed, frames} = JSON.parse(require("fs").readFileSync(0, "utf8"));
+const port = {postMessage() {}};
+new Function(source + "; return marketModel;")()(port);
+port.onmessage({data: {type: "boot", seed}});
+const bufs = frames.map(f => { const b = Buffer.from(f, "base64"); return b.buffer.slice(b.byteOffset, b.byteOffset + b.length); });
+let seq = 0, rows = 0;
+const t0 = process.hrtime.bigint();
+for (let r = 0; r < 20; r++) {
+  for (const buf of bufs) {
+    // applyStats skips a repeated frame, so each pass is numbered anew
+    new DataView(buf).setUint32(4, ++seq, true);
+    port.onmessage({data: {type: "stats", buf}});
+    rows += new DataView(buf).getUint32(8, true);
+  }
+}
+const s = Number(process.hrtime.bigint() - t0) / 1e9;
+console.log(JSON.stringify({frame: s / seq * 1e6, tickers: rows / seq, rows: rows / s}));
+process.exit(0);
+"""
+
+
+def flow(rng, n, prices):
+    sym = rng.integers(0, len(prices), n)
+    side = rng.integers(0, 2, n, dtype=np.uint8)
+    qty = rng.integers(10, 5010, n)
+    px = prices[sym] * np.exp(rng.normal(0, 0.002, n))
+    return sym, side, qty, px
+
+
+def main():
+    rng = np.random.default_rng(7)
+    prices = rng.uniform(10, 200, TICKERS)
+    sym, side, qty, px = flow(rng, TRADES, prices)
+
+    ts = TradeStats(prices)
+    rows = list(zip(sym[:SCALAR].tolist(), side[:SCALAR].tolist(), qty[:SCALAR].tolist(), px[:SCALAR].tolist()))
+    t = time.perf_counter()
+    for row in rows:
+        ts.on_trade(*row)
+    print(f"{TICKERS:,} tickers, trades/s")
+    print(f"{'on_trade':>18} {SCALAR / (time.perf_counter() - t):>12,.0f}")
+
+    for b in BATCHES:
+        ts = TradeStats(prices)
+        t = time.perf_counter()
+        for a in range(0, TRADES, b):
+            ts.on_trades(sym[a:a + b], side[a:a + b], qty[a:a + b], px[a:a + b])
+        print(f"{'on_trades ' + format(b, ','):>18} {TRADES / (time.perf_counter() - t):>12,.0f}")
+
+    node = shutil.which("node")
+    if node:
+        # the frames a feed would send after each 10k-trade batch: the
+        # stats of every ticker the batch traded
+        ts, frames, b = TradeStats(prices), [], BATCHES[1]
+        for a in range(0, TRADES, b):
+            ts.on_trades(sym[a:a + b], side[a:a + b], qty[a:a + b], px[a:a + b])
+            idx = np.unique(sym[a:a + b])
+            frames.append(base64.b64encode(encode_stats(len(frames) + 1, idx, ts.columns(idx))).decode())
+        seed = {"tickers": [f"SAM{i:04d}" for i in range(TICKERS)], "prices": prices.tolist(), "intents": INTENTS}
+        payload = {"source": MARKET_JS.read_text("utf-8"), "seed": seed, "frames": frames}
+        res = subprocess.run([node, "-e", NODE_BENCH], input=json.dumps(payload), capture_output=True, text=True, check=True)
+        out = json.loads(res.stdout)
+        print(f"\nnode market.js applyStats: {out['frame']:.1f} us per STATS frame of {out['tickers']:,.0f} tickers,"
+              f" {out['rows']:,.0f} ticker rows/s")
+
+
+if __name__ == "__main__":
+    main()
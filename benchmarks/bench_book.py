@@ -0,0 +1,125 @@
+"""Order books: matching throughput, per-order latency and memory at the resting cap.
+
+    python benchmarks/bench_book.py
+
+OrderFlow orders over 1,000 tickers (the same flow as bench_orders.py) are
+matched by book.MatchingEngine: batch throughput through submit(), then the
+latency of every single OrderBook.add in a run of LATENCY orders (p50, p99,
+max; the max is a full garbage collection landing on one add, and grows
+with the number of levels held). The memory run rests 1M non-crossing
+orders, spread over a band of price levels either side of each ticker's
+price, under tracemalloc, then keeps adding past the cap in rounds: expiry
+holds the order count at the cap, and memory levels off a few percent above
+the first 1M (stale price-heap entries and dict slots of levels that
+emptied and came back, bounded by the levels held).
+"""
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from book import BUY, MatchingEngine  # noqa: E402
+from market import MarketSimulator  # noqa: E402
+from orders import OrderFlow  # noqa: E402
+from tape import order_block  # noqa: E402
+
+TICKERS = [f"SAM{i:04d}" for i in range(1, 1001)]
+RATE = 1_000_000
+SECONDS = 2
+LATENCY = 200_000
+RESTING = 1_000_000
+OVERFLOW = 250_000
+ROUNDS = 4
+
+
+def flow():
+    return OrderFlow(MarketSimulator.seeded(TICKERS, seed=7), rate=RATE, seed=7)
+
+
+def throughput():
+    engine = MatchingEngine(len(TICKERS))
+    count = fills = 0
+    t = time.perf_counter()
+    for batch in flow().stream(seconds=SECONDS):
+        f, _ = engine.submit(batch)
+        count += len(batch)
+        fills += len(f)
+    dt = time.perf_counter() - t
+    print(f"submit: {count:,} orders, {fills:,} fills in {dt:.2f} s = {count / dt:,.0f} orders/s;"
+          f" {engine.resting:,} resting")
+
+
+def latency():
+    # warm the books with a second of flow, then time each add on its own.
+    # the previous run's books are collected first so their garbage does not
+    # land in this run's max
+    gc.collect()
+    engine = MatchingEngine(len(TICKERS))
+    orders = flow()
+    engine.submit(orders.window(0.0, 1.0, orders.sim.prices))
+    orders = orders.window(1.0, LATENCY / RATE, orders.sim.prices)
+    books, fills = engine.books, []
+    px = np.round(orders["px"] * 100).astype(np.int64).tolist()
+    lat = np.empty(len(orders))
+    clock = time.perf_counter_ns
+    for k, (sym, side, qty, trader, t) in enumerate(zip(orders["sym"].tolist(), orders["side"].tolist(),
+                                                        orders["qty"].tolist(), orders["trader"].tolist(),
+                                                        orders["t"].tolist())):
+        a = clock()
+        books[sym].add(side, px[k], qty, trader, t, fills, k)
+        lat[k] = clock() - a
+    p50, p99 = np.percentile(lat, [50, 99]) / 1000
+    print(f"add latency over {len(orders):,} orders: p50 {p50:.1f} us, p99 {p99:.1f} us,"
+          f" max {lat.max() / 1000:.0f} us ({len(fills):,} fills)")
+
+
+def resting(n, seed):
+    # orders that never cross: buys 0.1-2% under the price, sells over
+    rng = np.random.default_rng(seed)
+    prices = MarketSimulator.seeded(TICKERS, seed=7).prices
+    orders = order_block(n)
+    orders["sym"] = sym = rng.integers(0, len(TICKERS), n)
+    orders["side"] = side = rng.random(n) < 0.5
+    away = 0.001 + 0.019 * rng.random(n)
+    orders["px"] = np.round(prices[sym] * np.where(side == BUY, 1 - away, 1 + away), 2)
+    orders["qty"] = rng.integers(1, 1000, n)
+    orders["trader"] = rng.integers(0, 1 << 16, n)
+    return orders
+
+
+def memory():
+    engine = MatchingEngine(len(TICKERS), max_resting=RESTING)
+    fill, more = resting(RESTING, 1), [resting(OVERFLOW, 2 + r) for r in range(ROUNDS)]
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    t = time.perf_counter()
+    for a in range(0, RESTING, 1 << 16):
+        engine.submit(fill[a:a + (1 << 16)])
+    dt = time.perf_counter() - t
+    full = tracemalloc.get_traced_memory()[0] - base
+    levels = sum(len(b.bids) + len(b.asks) for b in engine.books)
+    print(f"rest {engine.resting:,} orders on {levels:,} levels in {dt:.1f} s: {full / 2**20:,.0f} MiB,"
+          f" {full / engine.resting:.0f} B/order")
+    for r, orders in enumerate(more, 1):
+        for a in range(0, OVERFLOW, 1 << 16):
+            engine.submit(orders[a:a + (1 << 16)])
+        after = tracemalloc.get_traced_memory()[0] - base
+        print(f"+{r * OVERFLOW:,} more: {engine.resting:,} resting, {engine.expired:,} expired,"
+              f" {after / 2**20:,.0f} MiB")
+        assert engine.resting == RESTING
+    tracemalloc.stop()
+
+
+def main():
+    throughput()
+    latency()
+    memory()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Depth ladder feed: level deltas at 1 kHz, and the client ladder at 60 fps.
+
+    python benchmarks/bench_depth.py
+
+One ticker's book takes OrderFlow orders at RATE a second. Every
+millisecond the server side reads the top LEVELS levels a side, diffs them
+against the last frame (book.level_changes) and encodes a depth frame
+(wire.encode_depth): that cost per frame, and the frame sizes, are
+reported. When node is on PATH the frames are replayed through a mirror of
+the terminal's ladder (applyDepth in frontend/market.js, drawLadder in
+frontend/terminal.js) against a canvas context that only counts calls. Each
+60 fps frame applies the ~17 deltas that arrived during it, moves rows that
+only shifted and repaints the changed ones: script time per animation frame
+against the 16.7 ms budget (rasterizing is the browser's and not included),
+and the rows drawn are checked against the book at the end.
+"""
+import json
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from book import MatchingEngine, level_changes  # noqa: E402
+from market import MarketSimulator  # noqa: E402
+from orders import OrderFlow  # noqa: E402
+from wire import encode_depth  # noqa: E402
+
+RATE = 1_000
+SECONDS = 10
+LEVELS = 50
+WARMUP = 60
+
+NODE_BENCH = r"""
+const {frames, levels} = JSON.parse(require("fs").readFileSync(0, "utf8"));
+const bufs = frames.map(x => { const b = Buffer.from(x, "hex"); return b.buffer.slice(b.byteOffset, b.byteOffset + b.length); });
+let calls = 0;
+let blits = 0;
+const ctx = {clearRect() { calls++; }, fillRect() { calls++; }, fillText() { calls++; }, drawImage() { calls++; blits++; }};
+const ROW = 16, LW = 680, HALF = LW / 2, fmt = new Intl.NumberFormat();
+const bids = new Map(), asks = new Map();
+function side(x0, bid) { return {x0, bid, px: new Float64Array(levels).fill(-1), qty: new Float64Array(levels)}; }
+const sb = side(0, true), sa = side(HALF, false);
+let scale = 0, rows = 0, seq = -1;
+function applyLevels(map, cols, off, n) {
+  for (let j=0;j<n;j++) { const px = cols[off + j], q = cols[off + n + j]; if (q) map.set(px, q); else map.delete(px); }
+}
+function apply(buf) {
+  const dv = new DataView(buf), nb = dv.getUint16(12, true), na = dv.getUint16(14, true);
+  if (dv.getUint8(1) & 1) { bids.clear(); asks.clear(); }
+  else if (dv.getUint32(8, true) !== seq) throw new Error("gap");
+  const cols = new Uint32Array(buf, 16, 2 * (nb + na));
+  applyLevels(bids, cols, 0, nb); applyLevels(asks, cols, 2 * nb, na);
+  seq = dv.getUint32(4, true);
+}
+function move(s, from, to) {
+  const k = levels - Math.max(from, to);
+  ctx.drawImage(null, s.x0, (from + 1) * ROW, HALF, k * ROW, s.x0, (to + 1) * ROW, HALF, k * ROW);
+  s.px.copyWithin(to, from, from + k); s.qty.copyWithin(to, from, from + k);
+  if (to > from) s.px.fill(-1, from, to); else s.px.fill(-1, to + k);
+}
+function drawSide(s, keys, sizes) {
+  for (let r=0;r<keys.length;r++) {
+    const px = keys[r];
+    if (s.px[r] === px && s.qty[r] === sizes.get(px)) continue;
+    const j = s.px.indexOf(px);
+    if (j >= 0 && s.qty[j] === sizes.get(px)) move(s, j, r);
+  }
+  for (let r=0;r<levels;r++) {
+    const px = r < keys.length ? keys[r] : 0, q = px ? sizes.get(px) : 0;
+    if (s.px[r] === px && s.qty[r] === q) continue;
+    s.px[r] = px; s.qty[r] = q; rows++;
+    const y = (r + 1) * ROW;
+    ctx.clearRect(s.x0, y, HALF, ROW);
+    if (!px) continue;
+    const w = q / scale * (HALF - 4);
+    ctx.fillRect(s.bid ? HALF - w : HALF, y + 1, w, ROW - 2);
+    ctx.fillText(fmt.format(q), 0, y); ctx.fillText((px / 100).toFixed(2), 0, y);
+  }
+}
+function draw() {
+  let max = 0;
+  for (const q of bids.values()) if (q > max) max = q;
+  for (const q of asks.values()) if (q > max) max = q;
+  const sc = max ? 2 ** Math.ceil(Math.log2(max)) : 1;
+  if (sc !== scale) { scale = sc; sb.px.fill(-1); sa.px.fill(-1); }
+  drawSide(sb, Array.from(bids.keys()).sort((a, b) => b - a), bids);
+  drawSide(sa, Array.from(asks.keys()).sort((a, b) => a - b), asks);
+}
+const per = 1000 / 60, times = [];
+let k = 0, frame = 0;
+while (k < bufs.length) {
+  const until = Math.round(++frame * per);   // frames are one per millisecond
+  const t = process.hrtime.bigint();
+  for (; k < Math.min(until, bufs.length); k++) apply(bufs[k]);
+  draw();
+  times.push(Number(process.hrtime.bigint() - t) / 1e6);
+}
+// what the rows show must be the book, level for level
+[[sb, Array.from(bids.keys()).sort((a, b) => b - a)], [sa, Array.from(asks.keys()).sort((a, b) => a - b)]].forEach(
+  ([s, keys]) => keys.forEach((px, r) => { if (s.px[r] !== px) throw new Error("ladder out of step"); }));
+times.sort((a, b) => a - b);
+const pct = p => times[Math.min(times.length - 1, Math.floor(p * times.length))];
+console.log(JSON.stringify({frames: times.length, p50: pct(0.5), p99: pct(0.99), max: times[times.length - 1],
+                            rows: rows / times.length, blits: blits / times.length, calls: calls / times.length}));
+"""
+
+
+def frames():
+    # one depth frame per millisecond of flow: a snapshot, then deltas
+    flow = OrderFlow(MarketSimulator.seeded(["SAM01"], seed=7), rate=RATE, seed=7, spread=0.01)
+    engine = MatchingEngine(1)
+    engine.submit(flow.window(0.0, WARMUP, flow.sim.prices))
+    prev, out, cost, depth = None, [], [], []
+    for ms in range(SECONDS * 1000):
+        engine.submit(flow.window(WARMUP + ms / 1000, 0.001, flow.sim.prices))
+        t = time.perf_counter()
+        cur = engine.depth(0, LEVELS)
+        if prev is None:
+            frame = encode_depth(0, ms + 1, None, *cur)
+        else:
+            bids, asks = (level_changes(a, b) for a, b in zip(prev, cur))
+            frame = encode_depth(0, ms + 1, ms, bids, asks)
+        cost.append(time.perf_counter() - t)
+        prev = cur
+        out.append(frame)
+        depth.append(len(cur[0][0]) + len(cur[1][0]))
+    return out, np.array(cost) * 1e6, np.array(depth)
+
+
+def main():
+    out, cost, depth = frames()
+    sizes = np.array([len(f) for f in out[1:]])
+    print(f"{len(out):,} frames over {SECONDS} s at {RATE:,} orders/s, {depth.mean():.0f} levels shown on average")
+    print(f"server per frame: p50 {np.percentile(cost, 50):.0f} us, p99 {np.percentile(cost, 99):.0f} us;"
+          f" delta {sizes.mean():.0f} B avg vs snapshot {len(out[0])} B")
+    node = shutil.which("node")
+    if node:
+        payload = {"frames": [f.hex() for f in out], "levels": LEVELS}
+        res = subprocess.run([node, "-e", NODE_BENCH], input=json.dumps(payload), capture_output=True, text=True,
+                             check=True)
+        r = json.loads(res.stdout)
+        print(f"client per 60 fps frame ({r['frames']:,} frames): p50 {r['p50']:.3f} ms, p99 {r['p99']:.3f} ms,"
+              f" max {r['max']:.2f} ms of 16.7; {r['rows']:.1f} of {2 * LEVELS} rows repainted,"
+              f" {r['blits']:.1f} row blocks moved, {r['calls']:.0f} canvas calls")
+
+
+if __name__ == "__main__":
+    main()
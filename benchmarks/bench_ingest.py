@@ -0,0 +1,76 @@
+"""Live news ingestion: stories/s through the wire, the socket and the inbox.
+
+    python benchmarks/bench_ingest.py
+
+Every third story repeats an earlier title, so de-duplication is exercised.
+The per-frame cost is NewsWire.since for a session that is a full second
+behind a 1,000 stories/s burst, which is what the fragment pays each run.
+"""
+import json
+import socket
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ingest import InboxWatcher, NewsWire, serve_socket  # noqa: E402
+
+N = 100_000
+
+
+def stories(n):
+    return [{"title": f"Headline {i - i % 3 if i % 3 == 2 else i}", "body": "Analysts upgrade outlook to moonish"}
+            for i in range(n)]
+
+
+def wait_for(wire, seq, timeout=60):
+    end = time.monotonic() + timeout
+    while wire.seq < seq and time.monotonic() < end:
+        time.sleep(0.001)
+
+
+def main():
+    batch = stories(N)
+    unique = N - N // 3
+
+    wire = NewsWire()
+    t = time.perf_counter()
+    wire.put_many(batch)
+    direct = N / (time.perf_counter() - t)
+
+    wire = NewsWire()
+    server = serve_socket(wire, 0)
+    lines = "".join(json.dumps(s) + "\n" for s in batch).encode("utf-8")
+    t = time.perf_counter()
+    with socket.create_connection(server.server_address) as sock:
+        sock.sendall(lines)
+    wait_for(wire, unique)
+    sock_rate = N / (time.perf_counter() - t)
+    server.shutdown()
+
+    wire = NewsWire()
+    with tempfile.TemporaryDirectory() as d:
+        for k in range(10):
+            Path(d, f"drop{k}.ndjson").write_bytes(b"".join(
+                json.dumps(s).encode("utf-8") + b"\n" for s in batch[k * N // 10:(k + 1) * N // 10]))
+        t = time.perf_counter()
+        InboxWatcher(wire, d).poll()
+        inbox = N / (time.perf_counter() - t)
+
+    # a session one second behind a 1,000/s burst
+    seq = wire.seq - 1000
+    since = min(timeit.repeat(lambda: wire.since(seq), number=1000, repeat=5)) / 1000 * 1e6
+
+    print(f"{N:,} stories ({N // 3:,} duplicate titles)")
+    print(f"{'path':>10} {'stories/s':>12}")
+    print(f"{'put_many':>10} {direct:>12,.0f}")
+    print(f"{'socket':>10} {sock_rate:>12,.0f}")
+    print(f"{'inbox':>10} {inbox:>12,.0f}")
+    print(f"\nsince() one second behind at 1,000/s: {since:.1f} us, {wire.dupes:,} dupes dropped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""SAM AI intent matching: compiled automaton vs an includes() chain.
+
+    python benchmarks/bench_intents.py
+
+Synthetic tables of 10 / 100 / 1k / 5k keyword intents (3 keywords each),
+matched against a message that hits none of them, which is the worst case
+for the chain and the common case in chat. The chain is the old handler's
+shape: every keyword of every intent tested with `in` until one hits. The
+same comparison runs in node (the automaton as in IntentMatcher,
+frontend/market.js, vs String.includes) when node is on PATH.
+"""
+import json
+import shutil
+import subprocess
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from intents import IntentMatcher  # noqa: E402
+
+SIZES = (10, 100, 1_000, 5_000)
+MESSAGE = "what is the outlook for the treasury desk this afternoon, asking for a friend"
+
+NODE_BENCH = r"""
+const tables = JSON.parse(require("fs").readFileSync(0, "utf8"));
+function Automaton(intents) {
+  this.next = [new Map()]; this.fail = [0]; this.out = [Infinity];
+  intents.forEach((it, i) => it.keywords.forEach(w => {
+    let s = 0;
+    for (const ch of w) {
+      let n = this.next[s].get(ch);
+      if (n === undefined) { n = this.next.length; this.next[s].set(ch, n); this.next.push(new Map()); this.fail.push(0); this.out.push(Infinity); }
+      s = n;
+    }
+    this.out[s] = Math.min(this.out[s], i);
+  }));
+  const queue = Array.from(this.next[0].values());
+  for (let q = 0; q < queue.length; q++) {
+    const s = queue[q];
+    for (const [ch, n] of this.next[s]) {
+      let f = this.fail[s];
+      while (f && !this.next[f].has(ch)) f = this.fail[f];
+      const g = this.next[f].get(ch) || 0;
+      this.fail[n] = g !== n ? g : 0;
+      this.out[n] = Math.min(this.out[n], this.out[this.fail[n]]);
+      queue.push(n);
+    }
+  }
+}
+Automaton.prototype.best = function (upper) {
+  let s = 0, best = Infinity;
+  for (const ch of upper) {
+    while (s && !this.next[s].has(ch)) s = this.fail[s];
+    s = this.next[s].get(ch) || 0;
+    if (this.out[s] < best) best = this.out[s];
+  }
+  return best;
+};
+function time(fn, reps) {
+  for (let i=0;i<100;i++) fn();
+  const t0 = process.hrtime.bigint();
+  for (let i=0;i<reps;i++) fn();
+  return Number(process.hrtime.bigint() - t0) / 1e3 / reps;
+}
+const out = {};
+for (const [n, t] of Object.entries(tables.tables)) {
+  const ac = new Automaton(t);
+  const msg = tables.message.toUpperCase();
+  const chain = () => t.findIndex(it => it.keywords.some(k => msg.includes(k)));
+  out[n] = [time(chain, Math.max(50, 200000 / +n | 0)), time(() => ac.best(msg), 50000)];
+}
+console.log(JSON.stringify(out));
+"""
+
+
+def table(n, rng):
+    letters = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+    words = ["".join(rng.choice(letters, rng.integers(5, 10))) for _ in range(3 * n)]
+    return {"intents": [{"name": f"i{i}", "keywords": words[3 * i:3 * i + 3], "reply": "ok"} for i in range(n)]}
+
+
+def us(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    rng = np.random.default_rng(7)
+    tables = {n: table(n, rng) for n in SIZES}
+    msg = MESSAGE.upper()
+    print("python, us per message (no intent matches)")
+    print(f"{'intents':>8} {'chain':>10} {'automaton':>10}")
+    for n, t in tables.items():
+        m = IntentMatcher(t)
+        chain = [it["keywords"] for it in t["intents"]]
+        number = max(20, 20_000 // n)
+        print(f"{n:>8} {us(lambda: next((i for i, ks in enumerate(chain) if any(k in msg for k in ks)), -1), number):>10.1f}"
+              f" {us(lambda: m.match(MESSAGE), 5_000):>10.1f}")
+
+    node = shutil.which("node")
+    if node:
+        payload = {"message": MESSAGE, "tables": {n: t["intents"] for n, t in tables.items()}}
+        res = subprocess.run([node, "-e", NODE_BENCH], input=json.dumps(payload), capture_output=True, text=True, check=True)
+        print("\nnode, us per message (no intent matches)")
+        print(f"{'intents':>8} {'includes':>10} {'automaton':>10}")
+        for n, (chain, ac) in json.loads(res.stdout).items():
+            print(f"{n:>8} {chain:>10.2f} {ac:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
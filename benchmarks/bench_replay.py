@@ -0,0 +1,94 @@
+"""Tape replay: records per second at max speed, seek time, memory held.
+
+    python benchmarks/bench_replay.py [tickers]
+
+Records a synthetic session (default 10 tickers, about 2M records: every
+ticker every tick plus a few orders a tick) through TapeWriter, then plays
+it back two ways: a raw scan of the mapped file (TapeReader.chunks + split)
+and a full ReplayFeed at max speed, which also publishes frames, history and
+stats. Its order books are not matched at max speed, so the last line times
+catching them up (ReplayFeed.catch_up) over the whole tape. Memory is the
+traced heap peak during replay (numpy allocations included); the tape itself
+is read through the page cache, never loaded.
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from broadcast import MarketFeed, ReplayFeed  # noqa: E402
+from market import MarketSimulator  # noqa: E402
+from symbols import SymbolRegistry  # noqa: E402
+from tape import TapeReader, TapeWriter, split  # noqa: E402
+
+RECORDS = 2_000_000
+ORDERS_PER_TICK = 2.0
+
+
+def record(path, tickers):
+    sim = MarketSimulator.seeded(tickers, seed=7)
+    live = MarketFeed(sim, SymbolRegistry(tickers), seed=7, order_rate=ORDERS_PER_TICK,
+                      recorder=TapeWriter(path, len(tickers)))
+    ticks = RECORDS // int(len(tickers) + ORDERS_PER_TICK)
+    t = time.perf_counter()
+    for _ in range(ticks):
+        live.tick()
+    live.recorder.close()
+    return ticks, time.perf_counter() - t
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    tickers = [f"SAM{i:02d}" for i in range(1, n + 1)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "session.tape")
+        ticks, took = record(path, tickers)
+        tape = TapeReader(path)
+        size = os.path.getsize(path)
+        print(f"{n:,} tickers, {ticks:,} ticks, {len(tape):,} records, {size / 2**20:.1f} MB"
+              f" (recorded in {took:.1f} s)")
+
+        t = time.perf_counter()
+        rows = 0
+        for _, records in tape.chunks():
+            rows += len(split(records, n)[0])
+        took = time.perf_counter() - t
+        print(f"{'raw scan':>14} {len(tape) / took:>14,.0f} records/s")
+
+        tracemalloc.start()
+        feed = ReplayFeed(TapeReader(path), SymbolRegistry(tickers), speed=None)
+        t = time.perf_counter()
+        while feed.pos < len(feed.tape):
+            feed.tick()
+        took = time.perf_counter() - t
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        ring = feed.history.p.nbytes + feed.history.t.nbytes
+        print(f"{'ReplayFeed max':>14} {len(tape) / took:>14,.0f} records/s, peak heap {peak / 2**20:.1f} MB"
+              f" ({ring / 2**20:.1f} MB of it the 6 h chart history ring)")
+
+        rng = np.random.default_rng(7)
+        lat = []
+        for x in rng.uniform(tape.t0, tape.t1, 20):
+            t = time.perf_counter()
+            feed.seek(x)
+            lat.append(time.perf_counter() - t)
+        print(f"{'seek':>14} {np.median(lat) * 1e3:>14.1f} ms median (rebuilding the history window)")
+
+        feed.seek(tape.t0)
+        feed.play(len(tape))
+        t = time.perf_counter()
+        while feed.catch_up():
+            pass
+        took = time.perf_counter() - t
+        print(f"{'book catch-up':>14} {len(tape) / took:>14,.0f} records/s (in steps of the feed lock)")
+
+
+if __name__ == "__main__":
+    main()
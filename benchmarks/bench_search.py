@@ -0,0 +1,61 @@
+"""News search: index build, query latency and incremental adds at 100k stories.
+
+    python benchmarks/bench_search.py
+
+Stories are drawn from a 20k-word Zipf vocabulary, so a query mixes rare and
+very common terms (the common ones have postings in most documents, which
+is the expensive case). Latency is per StoryIndex.search call, top 5.
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from search import StoryIndex  # noqa: E402
+
+N = 100_000
+VOCAB = 20_000
+QUERIES = 2_000
+
+
+def corpus(rng, n, words):
+    ranks = np.minimum(rng.zipf(1.3, size=(n, 40)), len(words)) - 1
+    return [{"title": " ".join(words[r[:8]]), "body": " ".join(words[r[8:]])} for r in ranks]
+
+
+def main():
+    rng = np.random.default_rng(7)
+    words = np.array([f"w{i}" for i in range(VOCAB)])
+    stories = corpus(rng, N, words)
+
+    ix = StoryIndex()
+    t = time.perf_counter()
+    for a in range(0, N, 5000):
+        ix.add(stories[a:a + 5000])
+    build = time.perf_counter() - t
+
+    queries = [" ".join(words[np.minimum(rng.zipf(1.3, size=rng.integers(1, 4)), VOCAB) - 1])
+               for _ in range(QUERIES)]
+    lat = np.empty(QUERIES)
+    for i, q in enumerate(queries):
+        t = time.perf_counter()
+        ix.search(q)
+        lat[i] = time.perf_counter() - t
+    lat *= 1e3
+
+    extra = corpus(rng, 1000, words)
+    t = time.perf_counter()
+    ix.add(extra)
+    add = (time.perf_counter() - t) * 1e3
+
+    print(f"{N:,} stories, {len(ix.vocab):,} terms, {len(ix.segments)} segments, built in {build:.2f} s")
+    print(f"query ms over {QUERIES:,} queries: p50 {np.percentile(lat, 50):.2f}  p99 {np.percentile(lat, 99):.2f}"
+          f"  max {lat.max():.2f}")
+    print(f"incremental add of 1,000 stories: {add:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
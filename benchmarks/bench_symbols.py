@@ -0,0 +1,70 @@
+"""Symbol lookup cost: registry vs linear scans, at 10 / 1k / 10k symbols.
+
+    python benchmarks/bench_symbols.py
+
+Compares SymbolRegistry.slot against list.index (the old TICKERS.indexOf
+order path), and SymbolRegistry.find_in against testing every symbol with
+`in` (the old chat loop) on a message that mentions no ticker, which is the
+worst case for both. The same comparison runs in node (Map vs indexOf)
+when node is on PATH.
+"""
+import json
+import shutil
+import subprocess
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from symbols import SymbolRegistry  # noqa: E402
+
+SIZES = (10, 1_000, 10_000)
+MESSAGE = "what is moving today? asking for a friend"
+
+NODE_BENCH = r"""
+const sizes = JSON.parse(require("fs").readFileSync(0, "utf8"));
+function time(fn, reps) {
+  for (let i=0;i<1000;i++) fn();
+  const t0 = process.hrtime.bigint();
+  for (let i=0;i<reps;i++) fn();
+  return Number(process.hrtime.bigint() - t0) / reps;
+}
+const out = {};
+for (const n of sizes) {
+  const syms = Array.from({length: n}, (_, i) => "SAM" + String(i + 1).padStart(2, "0"));
+  const map = new Map(syms.map((s, i) => [s, i]));
+  const last = syms[n - 1];
+  out[n] = [time(() => syms.indexOf(last), 20000), time(() => map.get(last), 200000)];
+}
+console.log(JSON.stringify(out));
+"""
+
+
+def ns(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e9
+
+
+def main():
+    print("python, ns per lookup (worst case: last symbol / no mention)")
+    print(f"{'symbols':>8} {'list.index':>12} {'registry':>10} {'scan in':>12} {'find_in':>10}")
+    for n in SIZES:
+        syms = [f"SAM{i:02d}" for i in range(1, n + 1)]
+        reg = SymbolRegistry(syms)
+        last = syms[-1]
+        msg = MESSAGE.upper()
+        number = max(100, 200_000 // n)
+        print(f"{n:>8} {ns(lambda: syms.index(last), number):>12.0f} {ns(lambda: reg.slot(last), 200_000):>10.0f}"
+              f" {ns(lambda: next((s for s in syms if s in msg), None), number):>12.0f} {ns(lambda: reg.find_in(msg), 50_000):>10.0f}")
+
+    node = shutil.which("node")
+    if node:
+        res = subprocess.run([node, "-e", NODE_BENCH], input=json.dumps(SIZES), capture_output=True, text=True, check=True)
+        print("\nnode, ns per lookup (worst case: last symbol)")
+        print(f"{'symbols':>8} {'indexOf':>12} {'Map.get':>10}")
+        for n, (lin, mp) in json.loads(res.stdout).items():
+            print(f"{n:>8} {lin:>12.0f} {mp:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Tick store: backfill rate, disk use and range-query latency over a month.
+
+    python benchmarks/bench_tickstore.py [days]
+
+Backfills `days` (default 30) of one-second ticks for 10 tickers from the
+MarketSimulator into a TickStore in a temp dir, then times, at random end
+points, range() (memmap views, nothing read yet), a full pass over the
+viewed prices (reads through the page cache) and series() (the chart path,
+LTTB to 1,360 points). Heap is the traced peak across the queries; the
+store's files are mapped, not loaded.
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from market import MarketSimulator  # noqa: E402
+from tickstore import TickStore  # noqa: E402
+
+TICKERS = [f"SAM{i:02d}" for i in range(1, 11)]
+DAY = 86400
+RANGES = (("1h", 3600), ("1d", DAY), ("1w", 7 * DAY), ("30d", 30 * DAY))
+QUERIES = 20
+
+
+def disk_bytes(root):
+    return sum(os.stat(os.path.join(d, f)).st_blocks * 512 for d, _, fs in os.walk(root) for f in fs)
+
+
+def ms(fn, ends, seconds):
+    lat = []
+    for end in ends:
+        t = time.perf_counter()
+        fn(end - seconds, end)
+        lat.append(time.perf_counter() - t)
+    return np.median(lat) * 1e3
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    sim = MarketSimulator.seeded(TICKERS, seed=7)
+    rng = np.random.default_rng(7)
+    with tempfile.TemporaryDirectory() as root:
+        store = TickStore(root, TICKERS)
+        t0 = time.time() - days * DAY
+        rows = 0
+        t = time.perf_counter()
+        for path in sim.iter_paths(days * DAY, chunk_steps=DAY):
+            times = t0 + rows + np.arange(len(path), dtype=np.float64)
+            store.append(times, path, rng.lognormal(np.log(500), 0.75, path.shape))
+            rows += len(path)
+        store.flush()
+        took = time.perf_counter() - t
+        print(f"{days} days x {len(TICKERS)} tickers = {rows * len(TICKERS):,} ticks, backfilled at"
+              f" {rows * len(TICKERS) / took:,.0f} ticks/s, {disk_bytes(root) / 2**20:,.0f} MB on disk")
+
+        store = TickStore(root, TICKERS)   # reopen: everything comes from the files
+        first, last = store.span("SAM01")
+        tracemalloc.start()
+        print(f"{'range':>6} {'rows':>12} {'range() ms':>11} {'scan ms':>9} {'series() ms':>12}")
+        for name, seconds in RANGES:
+            seconds = min(seconds, last - first)
+            ends = rng.uniform(first + seconds, last, QUERIES)
+            n = sum(len(r.t) for r in store.range("SAM05", ends[0] - seconds, ends[0]))
+            views = ms(lambda a, b: store.range("SAM05", a, b), ends, seconds)
+            scan = ms(lambda a, b: [float(r.p.max()) for r in store.range("SAM05", a, b)], ends, seconds)
+            chart = ms(lambda a, b: store.series("SAM05", a, b), ends, seconds)
+            print(f"{name:>6} {n:>12,} {views:>11.3f} {scan:>9.2f} {chart:>12.2f}")
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        part = store.range("SAM05", first, last)[0]
+        print(f"views are memmaps: {isinstance(part.t, np.memmap)}; peak heap during queries {peak / 2**20:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Bytes per update and decode time: binary frames vs json.dumps(payload).
+
+    python benchmarks/bench_wire.py
+
+The JSON baseline is the whole payload dict main.py used to ship (tickers,
+prices, vols, stories, names). Decode times are measured in Python, and in
+node (JSON.parse vs the typed-array decoder of applyUpdate, frontend/market.js)
+when node is on PATH.
+"""
+import base64
+import json
+import shutil
+import subprocess
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from wire import decode, encode_delta, encode_full  # noqa: E402
+
+SIZES = (10, 1_000, 10_000)
+CHANGED = 0.1  # share of tickers moving between two frames
+
+NODE_BENCH = r"""
+const frames = JSON.parse(require("fs").readFileSync(0, "utf8"));
+function decodeUpdate(bytes, prices) {
+  const buf = bytes.slice().buffer;
+  const dv = new DataView(buf);
+  const n = dv.getUint32(12, true);
+  if (dv.getUint8(1) & 1) { prices.set(new Float32Array(buf, 16, n)); return; }
+  const nb = (((n + 7) >> 3) + 3) & ~3;
+  const bits = new Uint8Array(buf, 16, nb);
+  const vals = new Float32Array(buf, 16 + nb);
+  for (let i=0, k=0; i<n; i++) if (bits[i >> 3] & (1 << (i & 7))) prices[i] = vals[k++];
+}
+function time(fn, reps) {
+  for (let i=0;i<Math.min(reps, 50);i++) fn();
+  const t0 = process.hrtime.bigint();
+  for (let i=0;i<reps;i++) fn();
+  return Number(process.hrtime.bigint() - t0) / 1e3 / reps;
+}
+const out = {};
+for (const [n, f] of Object.entries(frames)) {
+  const json = f.json, full = Buffer.from(f.full, "base64"), delta = Buffer.from(f.delta, "base64");
+  const prices = new Float64Array(+n);
+  const reps = Math.max(20, Math.floor(200000 / +n));
+  out[n] = [time(() => JSON.parse(json), reps), time(() => decodeUpdate(full, prices), reps), time(() => decodeUpdate(delta, prices), reps)];
+}
+console.log(JSON.stringify(out));
+"""
+
+
+def payload_for(n, rng):
+    # same shape as the payload dict in main.py
+    return {
+        "theme": "green",
+        "tickers": [f"SAM{i:02d}" for i in range(1, n + 1)],
+        "prices": np.round(rng.uniform(4, 250, n), 2).tolist(),
+        "vols": np.round(rng.uniform(0.2, 2.0, n), 2).tolist(),
+        "stories": [{"title": f"Story {i}", "body": "Analysts upgrade outlook to moonish"} for i in range(6)],
+        "names": [f"Trader {i}" for i in range(100)],
+    }
+
+
+def per_call_us(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    rng = np.random.default_rng(7)
+    rows, frames = [], {}
+    for n in SIZES:
+        payload = payload_for(n, rng)
+        js = json.dumps(payload)
+        prices = np.asarray(payload["prices"])
+        idx = np.sort(rng.choice(n, max(1, int(n * CHANGED)), replace=False))
+        full = encode_full(2, prices)
+        delta = encode_delta(2, 1, n, idx, prices[idx])
+        number = max(10, 100_000 // n)
+        rows.append((n, len(js), len(full), len(delta),
+                     per_call_us(lambda: json.loads(js), number),
+                     per_call_us(lambda: decode(full), number),
+                     per_call_us(lambda: decode(delta), number)))
+        frames[n] = {"json": js, "full": base64.b64encode(full).decode(), "delta": base64.b64encode(delta).decode()}
+
+    print(f"bytes per update ({CHANGED:.0%} of tickers changed in the delta frame)")
+    print(f"{'tickers':>8} {'json':>10} {'full':>10} {'delta':>10} {'delta/json':>11}")
+    for n, j, f, d, *_ in rows:
+        print(f"{n:>8} {j:>10,} {f:>10,} {d:>10,} {d / j:>10.1%}")
+
+    print("\npython decode, us per update")
+    print(f"{'tickers':>8} {'json.loads':>11} {'full':>10} {'delta':>10}")
+    for n, _, _, _, tj, tf, td in rows:
+        print(f"{n:>8} {tj:>11.1f} {tf:>10.1f} {td:>10.1f}")
+
+    node = shutil.which("node")
+    if node:
+        res = subprocess.run([node, "-e", NODE_BENCH], input=json.dumps(frames), capture_output=True, text=True, check=True)
+        print("\nnode decode, us per update")
+        print(f"{'tickers':>8} {'JSON.parse':>11} {'full':>10} {'delta':>10}")
+        for n, (tj, tf, td) in json.loads(res.stdout).items():
+            print(f"{n:>8} {tj:>11.1f} {tf:>10.1f} {td:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
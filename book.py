@@ -0,0 +1,211 @@
+import heapq
+
+import numpy as np
+
+# limit order books and price-time matching behind the order blotter. one
+# OrderBook per ticker: a dict per side from price (integer cents) to a
+# Level, each level a FIFO queue of resting orders, and a heap of the
+# side's prices for the best one. heap entries for levels that emptied are
+# dropped lazily when they reach the top, and the heap is rebuilt when
+# stale entries outnumber live levels.
+#
+# an incoming order takes liquidity from the best opposite levels while its
+# limit crosses, oldest order first at each level, then rests for what is
+# left. fills trade at the resting order's price.
+#
+# a level's queue is one flat list of (id, qty, trader) per order, read from
+# a head index and cut down once the consumed head is most of it: a deque
+# per level costs ~600 bytes even when empty, and books hold hundreds of
+# thousands of levels. orders are plain ints rather than objects, and
+# nothing points back from an order to its level or from a level to its
+# book: the garbage collector walks two objects per level rather than one
+# per order, and none of them sits in a reference cycle.
+#
+# resting orders are bounded: past MAX_RESTING the oldest resting order
+# (across all books) expires. orders leave a level oldest first whether
+# they fill or expire, so the oldest resting order is always at the head of
+# its level: the engine keeps a heap of (head order id, level) with an
+# entry per level, updated lazily when an entry reaches the top, and
+# rebuilt when entries for emptied levels outnumber the resting orders.
+
+MAX_RESTING = 1_000_000
+BUY = 1
+SELL = 0
+FILL = np.dtype([("t", "<f8"), ("px", "<f8"), ("sym", "<u4"), ("qty", "<u4"),
+                 ("maker", "<u2"), ("taker", "<u2"), ("side", "u1")])   # side of the taker
+
+
+class Level:
+    __slots__ = ("qty", "orders", "head", "born")
+
+    def __init__(self, born):
+        self.qty = 0
+        self.orders = []    # id, qty, trader of each order, flattened
+        self.head = 0       # orders before it are filled or expired
+        self.born = born    # no order of an earlier level at this price is newer
+
+
+class OrderBook:
+    def __init__(self, sym):
+        self.sym = sym
+        self.bids = {}
+        self.asks = {}
+        self._bid_heap = []   # negated prices
+        self._ask_heap = []
+
+    def best_bid(self):
+        heap, levels = self._bid_heap, self.bids
+        while heap and -heap[0] not in levels:
+            heapq.heappop(heap)
+        return -heap[0] if heap else None
+
+    def best_ask(self):
+        heap, levels = self._ask_heap, self.asks
+        while heap and heap[0] not in levels:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def _remove(self, side, px):
+        levels = self.bids if side == BUY else self.asks
+        del levels[px]
+        heap = self._bid_heap if side == BUY else self._ask_heap
+        if len(heap) > 2 * len(levels) + 64:
+            heap[:] = [-px for px in levels] if side == BUY else list(levels)
+            heapq.heapify(heap)
+
+    def add(self, side, px, qty, trader, t, fills, oid=0):
+        # match an incoming limit order (px in cents), appending FILL tuples
+        # to fills; what is left rests as order oid. returns (filled, makers
+        # used up, the level it rests on or None)
+        filled = done = 0
+        buy = side == BUY
+        best, levels = (self.best_ask, self.asks) if buy else (self.best_bid, self.bids)
+        p = best()
+        while qty and p is not None and (p <= px if buy else p >= px):
+            level = levels[p]
+            orders, h = level.orders, level.head
+            while qty and h < len(orders):
+                left = orders[h + 1]
+                q = left if left < qty else qty
+                level.qty -= q
+                qty -= q
+                filled += q
+                fills.append((t, p / 100.0, self.sym, q, orders[h + 2], trader, side))
+                if q == left:
+                    h += 3
+                    done += 1
+                else:
+                    orders[h + 1] = left - q
+            level.head = h
+            if not level.qty:
+                self._remove(1 - side, p)
+            elif 2 * h > len(orders):
+                del orders[:h]
+                level.head = 0
+            p = best()
+        if not qty:
+            return filled, done, None
+        own = self.bids if buy else self.asks
+        level = own.get(px)
+        if level is None:
+            level = own[px] = Level(oid)
+            heapq.heappush(self._bid_heap if buy else self._ask_heap, -px if buy else px)
+        level.orders += (oid, qty, trader)
+        level.qty += qty
+        return filled, done, level
+
+    def depth(self, levels=10):
+        # ((prices, sizes) of the best `levels` bids, same for asks), best first
+        bids = heapq.nlargest(levels, self.bids)
+        asks = heapq.nsmallest(levels, self.asks)
+        return ((np.array(bids, dtype=np.int64), np.array([self.bids[p].qty for p in bids], dtype=np.int64)),
+                (np.array(asks, dtype=np.int64), np.array([self.asks[p].qty for p in asks], dtype=np.int64)))
+
+
+class MatchingEngine:
+    def __init__(self, n_tickers, max_resting=MAX_RESTING):
+        self.books = [OrderBook(i) for i in range(n_tickers)]
+        self.max_resting = int(max_resting)
+        # (id of the order at the head, ticker, side, price) per level, for
+        # expiry; an entry whose head has since moved on is corrected when it
+        # reaches the top, one for a level that emptied is dropped
+        self._heads = []
+        self._oid = 0
+        self.resting = 0
+        self.expired = 0
+
+    def submit(self, orders):
+        # match a batch of order records (see tape.RECORD) in arrival order;
+        # returns (fills as FILL records, filled quantity per order)
+        fills = []
+        filled = np.zeros(len(orders), dtype=np.uint32)
+        books, heads = self.books, self._heads
+        cols = (orders["sym"].tolist(), orders["side"].tolist(), np.round(orders["px"] * 100).astype(np.int64).tolist(),
+                orders["qty"].tolist(), orders["trader"].tolist(), orders["t"].tolist())
+        oid = self._oid
+        for k, (sym, side, px, qty, trader, t) in enumerate(zip(*cols)):
+            oid += 1
+            got, done, level = books[sym].add(side, px, qty, trader, t, fills, oid)
+            filled[k] = got
+            self.resting -= done
+            if level is not None:
+                if level.born == oid:
+                    heapq.heappush(heads, (oid, sym, side, px))
+                self.resting += 1
+                if self.resting > self.max_resting:
+                    self._expire()
+        self._oid = oid
+        if len(heads) > 2 * self.resting + 64:
+            heads[:] = [(level.orders[level.head], book.sym, side, px) for book in books
+                        for side, levels in ((BUY, book.bids), (SELL, book.asks)) for px, level in levels.items()]
+            heapq.heapify(heads)
+        return np.array(fills, dtype=FILL) if fills else np.zeros(0, dtype=FILL), filled
+
+    def _expire(self):
+        # drop the oldest resting orders until back under the cap
+        heads, books = self._heads, self.books
+        while self.resting > self.max_resting:
+            oid, sym, side, px = heapq.heappop(heads)
+            book = books[sym]
+            level = (book.bids if side == BUY else book.asks).get(px)
+            if level is None or level.born > oid:
+                continue
+            orders, h = level.orders, level.head
+            if orders[h] == oid:
+                level.qty -= orders[h + 1]
+                self.resting -= 1
+                self.expired += 1
+                if not level.qty:
+                    book._remove(side, px)
+                    continue
+                # expiry cuts the head straight away, so what an expired
+                # order held is let go of and memory stays flat at the cap
+                del orders[:h + 3]
+                level.head = h = 0
+                level.born = orders[0]
+            heapq.heappush(heads, (orders[h], sym, side, px))
+
+    def top(self, idx=None):
+        # (bid, bid size, ask, ask size) per ticker, prices in dollars and nan
+        # for an empty side
+        books = self.books if idx is None else [self.books[i] for i in idx]
+        out = np.full((4, len(books)), np.nan)
+        for j, book in enumerate(books):
+            b, a = book.best_bid(), book.best_ask()
+            if b is not None:
+                out[0, j], out[1, j] = b / 100.0, book.bids[b].qty
+            if a is not None:
+                out[2, j], out[3, j] = a / 100.0, book.asks[a].qty
+        return out
+
+    def depth(self, sym, levels=10):
+        return self.books[sym].depth(levels)
+
+
+def level_changes(prev, cur):
+    # one side of a depth ladder from prev to cur, both (prices, sizes): the
+    # levels that are new or resized, then those that left with size 0
+    old = dict(zip(prev[0].tolist(), prev[1].tolist()))
+    new = dict(zip(cur[0].tolist(), cur[1].tolist()))
+    px = [p for p, q in new.items() if old.get(p) != q] + [p for p in old if p not in new]
+    return np.array(px, dtype=np.int64), np.array([new.get(p, 0) for p in px], dtype=np.int64)
@@ -0,0 +1,400 @@
+import logging
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from analytics import TradeStats
+from book import FILL, MatchingEngine
+from history import HistoryStore, lttb
+from market import MarketSimulator
+from orders import OrderFlow
+from symbols import SymbolRegistry
+from tape import CHUNK, ORDER, TapeReader, TapeWriter, order_block, split
+from tickstore import TickStore
+
+logger = logging.getLogger(__name__)
+
+# one market per process: a single background thread owns the simulator and
+# publishes numbered frames of changed prices. every streamlit session reads
+# the same frames, so every screen shows the same prices and browsers no
+# longer run their own random walk.
+
+# how much history the feed keeps for charts
+HISTORY_SECONDS = 6 * 3600
+# synthetic traded volume per tick: lognormal around this many shares,
+# scaled up on bigger moves
+TICK_VOLUME = 500
+# synthetic orders per second, how many recent ones a new client is sent,
+# and the most a single update carries (a fast replay can publish far more
+# than a screen can show; the oldest of a burst are dropped)
+ORDER_RATE = 1.0
+ORDER_BACKLOG = 50
+FRAME_ORDERS = 10_000
+# live markets kept at once; asking for another stops the one read least
+# recently (see get_feed)
+MAX_FEEDS = 4
+# tape records a replay's order books catch up by per step (see
+# ReplayFeed.catch_up); the feed lock is held for one step, ~25 ms
+BUILD_RECORDS = 1 << 14
+
+
+class MarketFeed:
+    def __init__(self, sim, symbols, interval=1.0, keep=120, history_seconds=HISTORY_SECONDS, seed=None,
+                 order_rate=ORDER_RATE, recorder=None, store=None):
+        self.sim = sim
+        self.symbols = symbols
+        self.interval = float(interval)
+        self.recorder = recorder
+        # optional on-disk tick history (see tickstore.py) for chart ranges
+        # longer than the in-memory history
+        self.store = store
+        self.history_seconds = history_seconds
+        self.seq = 0
+        self.epoch = 0
+        self.read = time.monotonic()     # when a client last asked for an update
+        self._keep = keep
+        self._history_rows = max(2, int(history_seconds / self.interval))
+        self._lock = threading.Lock()
+        t, prices = self._origin()
+        self._reset(t, prices)
+        if recorder is not None:
+            # the opening prices, so a replay starts where the market did
+            recorder.write_tick(0, t, self._cents / 100.0, np.zeros(len(self._cents)))
+        # volumes and order flow (see orders.py) come from their own
+        # generators so the price path stays the simulator's alone
+        self._vrng = np.random.default_rng(None if seed is None else [seed, 1])
+        self.flow = None if sim is None else OrderFlow(sim, rate=order_rate, seed=None if seed is None else [seed, 2])
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _origin(self):
+        return time.time(), self.sim.prices
+
+    def _reset(self, t, prices):
+        # prices as published (rounded to cents), the frames and orders that
+        # got us here, the order books and the trade stats over their fills,
+        # and chart history
+        self._cents = np.round(np.asarray(prices) * 100).astype(np.int64)
+        self._frames = deque(maxlen=self._keep)
+        self._orders = deque(maxlen=self._keep)
+        self.engine = MatchingEngine(len(self._cents))
+        self.trades = TradeStats(self._cents / 100.0)
+        self.history = HistoryStore(len(self._cents), self._history_rows)
+        self.history.append(t, self._cents / 100.0)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="market-feed", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        nxt = time.monotonic()
+        while not self._stop.is_set():
+            nxt += self.interval
+            try:
+                self.tick()
+            except Exception:
+                logger.exception("market feed tick failed")
+            self._stop.wait(max(0.0, nxt - time.monotonic()))
+
+    def tick(self):
+        cents = np.round(self.sim.step() * 100).astype(np.int64)
+        moved = np.abs(cents - self._cents) / self._cents
+        volumes = np.round(self._vrng.lognormal(np.log(TICK_VOLUME), 0.75, len(cents)) * (1.0 + 100.0 * moved))
+        t = time.time()
+        orders = self.flow.window(t - self.interval, self.interval, cents / 100.0)
+        seq = self._publish(np.array([t]), cents[None], orders)
+        if self.recorder is not None:
+            self.recorder.write_tick(seq, t, cents / 100.0, volumes, orders)
+        if self.store is not None:
+            self.store.append(t, cents / 100.0, volumes)
+        return seq
+
+    def _publish(self, times, cents, orders):
+        # one frame for one or more rows of ticks: the tickers that changed
+        # anywhere in them, the rows into history, and the orders matched
+        # against the books
+        prev = np.concatenate((self._cents[None], cents[:-1]))
+        changed = np.flatnonzero(np.any(cents != prev, axis=0))
+        with self._lock:
+            self._cents = cents[-1]
+            self.seq += 1
+            self._frames.append((self.seq, changed, self._match(orders)))
+            self.history.extend(times, cents / 100.0)
+        return self.seq
+
+    def _match(self, orders):
+        # run a frame's orders through the books (lock held). the frame keeps
+        # them with how much of each filled and the fills; returns the
+        # tickers whose book (and so trade stats) moved
+        fills, filled = self._submit(orders)
+        self._orders.append((self.seq, orders[-FRAME_ORDERS:], filled[-FRAME_ORDERS:], fills[-FRAME_ORDERS:]))
+        return np.unique(orders["sym"]).astype(np.intp)
+
+    def _submit(self, orders):
+        fills, filled = self.engine.submit(orders)
+        self.trades.on_trades(fills["sym"], fills["side"], fills["qty"], fills["px"])
+        return fills, filled
+
+    def quote(self, col):
+        # one ticker's trade stats, the same ones its chart shows (see
+        # analytics.py), with the published price and its change on the session
+        with self._lock:
+            last = self._cents[col] / 100.0
+            chg = (last / self.trades.open[col] - 1.0) * 100.0
+            return dict(self.trades.quote(col), sym=self.symbols.symbols[col], last=round(float(last), 2),
+                        chg=round(float(chg), 2))
+
+    def chart(self, col, seconds=None, points=1360):
+        # one ticker's last `seconds` of history, downsampled to at most
+        # `points` points; the cost is fixed however much history there is.
+        # ranges past the in-memory history come from the tick store
+        if self.store is not None and seconds is not None and seconds > self.history_seconds:
+            return self.store.series(self.symbols.symbols[col], time.time() - seconds, None, points)
+        with self._lock:
+            t1 = self.history.t[(self.history.count - 1) % self.history.capacity]
+            t, p = self.history.series(col, None if seconds is None else t1 - seconds)
+        return lttb(t, p, points)
+
+    def snapshot(self):
+        with self._lock:
+            return self.seq, self._cents / 100.0
+
+    def update_since(self, seq):
+        # compact update for a client that has seen frame `seq`: None when
+        # nothing is new, a delta of changed prices when the frames are still
+        # held, otherwise a full snapshot (encoded for the wire by wire.py)
+        self.read = time.monotonic()
+        with self._lock:
+            if seq == self.seq:
+                return None
+            cents = self._cents
+            n = len(cents)
+            oldest = self._frames[0][0] if self._frames else self.seq + 1
+            if seq is None or seq < oldest - 1 or seq > self.seq:
+                # a (re)connecting client gets the latest orders with its
+                # snapshot, and the top and trade stats of every book
+                update = {"seq": self.seq, "full": 1, "n": n, "p": cents / 100.0}
+                update.update(self._orders_since(None, ORDER_BACKLOG))
+                update["book"] = np.arange(n)
+            else:
+                idx = np.unique(np.concatenate([c for s, c, b in self._frames if s > seq]))
+                update = {"seq": self.seq, "base": seq, "n": n, "i": idx, "p": cents[idx] / 100.0}
+                update.update(self._orders_since(seq, FRAME_ORDERS))
+                update["book"] = np.unique(np.concatenate([b for s, c, b in self._frames if s > seq]))
+            update["top"] = self.engine.top(update["book"])
+            update["stats"] = self.trades.columns(update["book"])
+            return update
+
+    def _orders_since(self, seq, limit):
+        # the last `limit` orders (with how much of each filled) and fills of
+        # the frames after seq
+        held = [o for o in self._orders if seq is None or o[0] > seq]
+        return {"orders": np.concatenate([o[1] for o in held] or [order_block(0)])[-limit:],
+                "filled": np.concatenate([o[2] for o in held] or [np.zeros(0, dtype=np.uint32)])[-limit:],
+                "fills": np.concatenate([o[3] for o in held] or [np.zeros(0, dtype=FILL)])[-limit:]}
+
+    def depth(self, col, levels=10):
+        # (seq, ((bid prices, sizes), (ask prices, sizes))) of one ticker's
+        # book as of frame seq, best first, prices in cents
+        with self._lock:
+            return self.seq, self.engine.depth(col, levels)
+
+
+class ReplayFeed(MarketFeed):
+    # a recorded tape (see tape.py) played back through the same publish
+    # path as the live market, so every screen sees exactly what was
+    # recorded. speed is a multiple of recorded time, or None for as fast as
+    # the tape can be read; seek() jumps to any recorded time.
+    #
+    # matching runs at ~100k orders/s, far below what the tape reads at, so
+    # the order books only keep pace inline at a set speed. at max speed and
+    # while a seek warms up, orders are published unmatched (nothing filled,
+    # books unchanged) and a background thread catches the books up on the
+    # orders already played, a step at a time (catch_up), once the replay
+    # is at a set speed or out of tape. from then on matching is inline again
+    def __init__(self, tape, symbols, speed=1.0, interval=1.0, keep=120, history_seconds=HISTORY_SECONDS):
+        self.tape = tape
+        self.speed = speed
+        self.pos = 0
+        self._history_seconds = history_seconds
+        self._play = threading.Lock()
+        self._wake = threading.Event()
+        self._warming = False
+        super().__init__(None, symbols, interval=interval, keep=keep, history_seconds=history_seconds)
+        # the books hold every order before tape position _booked; _span is
+        # the stretch of tape being published
+        self._booked = self.pos
+        self._span = (self.pos, self.pos)
+        self._anchor = (self.tape.t0, time.monotonic())
+
+    def _origin(self):
+        t, prices = self.tape.block(self.pos)
+        self.pos = self.tape.boundary(self.pos + 1, self.pos)
+        self.now = t
+        return t, prices
+
+    def start(self):
+        if self._thread is None:
+            threading.Thread(target=self._build, name="replay-books", daemon=True).start()
+        return super().start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                wait = self.tick()
+            except Exception:
+                logger.exception("replay tick failed")
+                wait = self.interval
+            self._stop.wait(wait)
+
+    def _build(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                # at max speed the replay keeps the CPU until the tape runs out
+                while not self._stop.is_set() and (self.speed is not None or self.pos >= len(self.tape)):
+                    if not self.catch_up():
+                        break
+            except Exception:
+                logger.exception("replay book rebuild failed")
+
+    def _match(self, orders):
+        # lock held. orders go through the books only while those are
+        # current and the replay has a set speed; otherwise they are
+        # published unmatched and catch_up() gets to them later
+        start, end = self._span
+        if self.speed is None or self._warming or self._booked != start:
+            self._orders.append((self.seq, orders[-FRAME_ORDERS:], np.zeros(min(len(orders), FRAME_ORDERS), np.uint32),
+                                 np.zeros(0, dtype=FILL)))
+            return np.zeros(0, dtype=np.intp)
+        self._booked = end
+        return super()._match(orders)
+
+    def catch_up(self, records=BUILD_RECORDS):
+        # match the next stretch of orders that were published unmatched;
+        # the tickers whose book moved go out in a frame of their own.
+        # returns True while the books are still behind
+        with self._lock:
+            start = self._booked
+            if self._warming or start >= self.pos:
+                return False
+            stop = self.tape.boundary(min(self.pos, start + records), start)
+            recs = self.tape.records[start:stop]
+            orders = recs[recs["kind"] == ORDER]
+            if len(orders):
+                self._submit(orders)
+                self.seq += 1
+                self._frames.append((self.seq, np.zeros(0, dtype=np.intp), np.unique(orders["sym"]).astype(np.intp)))
+            self._booked = stop
+            return stop < self.pos
+
+    def tick(self):
+        # play everything due by the replay clock; returns how long to sleep
+        with self._play:
+            if self.pos >= len(self.tape) and not self.tape.refresh():
+                return self.interval
+            if self.speed is None:
+                self.play(self.tape.boundary(self.pos + CHUNK, self.pos))
+                return 0.0 if self.pos < len(self.tape) else self.interval
+            t, mono = self._anchor
+            due = t + (time.monotonic() - mono) * self.speed
+            self.play(self.tape.position(due))
+            if self.pos >= len(self.tape):
+                return self.interval
+            return min(self.interval, max(0.0, (self.tape.time(self.pos) - due) / self.speed))
+
+    def play(self, stop):
+        # publish records pos..stop (a block boundary) as one frame per
+        # chunk, straight from the mapped file
+        for start, records in self.tape.chunks(self.pos, stop):
+            self._span = (start, start + len(records))
+            times, prices, _, orders = split(records, len(self._cents))
+            if len(times):
+                self._publish(times, np.round(prices * 100).astype(np.int64), orders)
+                self.now = float(times[-1])
+            elif len(orders):
+                with self._lock:
+                    self.seq += 1
+                    self._frames.append((self.seq, np.zeros(0, dtype=np.intp), self._match(orders)))
+            self.pos = self._span[1]
+        self.pos = max(self.pos, stop)
+
+    def seek(self, t):
+        # restart from recorded time t: history and stats are rebuilt from the
+        # tape's preceding window at full speed, then play resumes from t.
+        # the books start empty at the window's start and are caught up to t
+        # in the background
+        with self._play:
+            t = min(max(t, self.tape.t0), self.tape.t1)
+            self.pos = self.tape.position(t - self._history_seconds)
+            if self.pos >= len(self.tape):
+                self.pos = self.tape.boundary(len(self.tape) - 1)
+            origin = self._origin()
+            with self._lock:
+                self._reset(*origin)
+                self._booked = self.pos
+                self._warming = True
+                # clients holding an older seq get a full snapshot
+                self.seq += 1
+                self.epoch += 1
+            self.play(self.tape.position(t))
+            self._warming = False
+            self._anchor = (self.now, time.monotonic())
+        self._wake.set()
+
+    def set_speed(self, speed):
+        with self._play:
+            self.speed = speed
+            self._anchor = (self.now, time.monotonic())
+        self._wake.set()
+
+    def status(self):
+        return {"t": self.now, "t0": self.tape.t0, "t1": self.tape.t1,
+                "speed": self.speed, "epoch": self.epoch, "seq": self.seq}
+
+
+_feeds = {}
+_feeds_lock = threading.Lock()
+
+
+def get_feed(tickers, seed=7, interval=1.0, order_rate=ORDER_RATE, record=None, store=None):
+    # process-wide feed per (tickers, seed, ...); started on first use. with
+    # `record`, every tick and order is appended to that tape file; with
+    # `store`, every tick is kept in a tick store in that directory. at most
+    # MAX_FEEDS run at once: a new one stops and drops the unrecorded one read
+    # least recently (sessions still holding it see it stand still until they
+    # rerun)
+    key = (tuple(tickers), seed, float(interval), float(order_rate), record, store)
+    with _feeds_lock:
+        feed = _feeds.get(key)
+        if feed is None:
+            live = [k for k in _feeds if k[0] != "replay"]
+            spare = [k for k in live if not (k[4] or k[5])]   # ones not recording
+            if len(live) >= MAX_FEEDS and spare:
+                _feeds.pop(min(spare, key=lambda k: _feeds[k].read)).stop()
+            sim = MarketSimulator.seeded(tickers, seed=seed, dt=interval)
+            recorder = TapeWriter(record, len(tickers)) if record else None
+            ticks = TickStore(store, tickers) if store else None
+            feed = _feeds[key] = MarketFeed(sim, SymbolRegistry(tickers), interval=interval, seed=seed,
+                                            order_rate=order_rate, recorder=recorder, store=ticks).start()
+        return feed
+
+
+def get_replay(path, speed=1.0, interval=1.0):
+    # process-wide replay of one tape; tickers are named as main.py names them
+    key = ("replay", str(path))
+    with _feeds_lock:
+        feed = _feeds.get(key)
+        if feed is None:
+            tape = TapeReader(path)
+            tickers = [f"SAM{i:02d}" for i in range(1, tape.n_tickers + 1)]
+            feed = _feeds[key] = ReplayFeed(tape, SymbolRegistry(tickers), speed=speed, interval=interval).start()
+        return feed
@@ -0,0 +1,433 @@
+// the terminal's market model, run in a web worker so the page's main thread
+// only renders (see startModel in terminal.js). it takes the server's binary
+// frames (see wire.py) as transferred ArrayBuffers, keeps prices, top of
+// book, the depth ladder and the trade analytics, and answers SAM AI
+// intents. what changed goes back as one view message at most every
+// VIEW_MS (HIDDEN_VIEW_MS while the page is hidden and draws nothing), its
+// typed arrays transferred rather than copied.
+//
+// the same function runs in the page when workers are unavailable, with
+// `port` standing in for the worker scope: no DOM is touched here.
+function marketModel(port) {
+  const VIEW_MS = 16, HIDDEN_VIEW_MS = 1000;
+  const LADDER_LEVELS = 50;
+
+  function fmt(n) { return Number(n).toFixed(2); }
+  const intFmt = new Intl.NumberFormat();
+
+  // symbol -> slot registry built once from the bootstrap (mirrors symbols.py).
+  // lookups are one Map probe; finding a ticker in free text is one pass over
+  // the text's tokens, however many symbols are listed
+  function SymbolRegistry(symbols) {
+    this.symbols = symbols;
+    this.slots = new Map();
+    symbols.forEach((s, i) => this.slots.set(s.toUpperCase(), i));
+  }
+  SymbolRegistry.prototype.slot = function (sym) {
+    const i = this.slots.get(String(sym).toUpperCase());
+    return i === undefined ? -1 : i;
+  };
+  SymbolRegistry.prototype.findIn = function (text) {
+    const tokens = String(text).toUpperCase().match(/[A-Z0-9]+/g) || [];
+    for (const tok of tokens) {
+      const i = this.slots.get(tok);
+      if (i !== undefined) return i;
+    }
+    return -1;
+  };
+
+  // per-ticker trade analytics, kept by the server (analytics.TradeStats)
+  // over the fills its order books made and sent for the tickers each frame
+  // touched, so every screen shows the same numbers and a reload keeps them
+  function TradeStats(open) {
+    const n = open.length;
+    this.open = Float64Array.from(open);   // session reference price
+    this.last = Float64Array.from(open);   // last trade
+    this.vwap = Float64Array.from(open);
+    this.emaFast = Float64Array.from(open);
+    this.emaSlow = Float64Array.from(open);
+    this.rv = new Float64Array(n);         // realized volatility, %
+    this.volume = new Float64Array(n);     // cumulative traded qty
+    this.buy = new Float64Array(n);        // share of the volume bought
+    this.trades = new Uint32Array(n);
+  }
+
+  // top of each ticker's order book (see book.py), NaN for an empty side
+  function TopOfBook(n) {
+    this.bid = new Float32Array(n).fill(NaN);
+    this.ask = new Float32Array(n).fill(NaN);
+    this.bidQty = new Uint32Array(n);
+    this.askQty = new Uint32Array(n);
+  }
+
+  let tickers = [], names = ["Trader A"];
+  let symbols = new SymbolRegistry([]);
+  let prices = new Float64Array(0);
+  let stats = new TradeStats([]);
+  let book = new TopOfBook(0);
+  let chartIdx = 0;
+
+  // tickers touched since the last view, and what else the view carries
+  let dirtyFlags = new Uint8Array(0), dirtyList = [];
+  let statsDirty = true, points = [], orderBatches = [], ladderDirty = false;
+  let viewPending = false, lastView = 0, busy = 0, viewMs = VIEW_MS;
+  function markDirty(i) {
+    if (!dirtyFlags[i]) { dirtyFlags[i] = 1; dirtyList.push(i); }
+    if (i === chartIdx) statsDirty = true;
+    scheduleView();
+  }
+  function scheduleView() {
+    if (viewPending) return;
+    viewPending = true;
+    setTimeout(postView, Math.max(0, lastView + viewMs - Date.now()));
+  }
+  function postView() {
+    viewPending = false;
+    lastView = Date.now();
+    const t0 = performance.now();
+    const transfer = [];
+    const view = {type: "view", chart: chartIdx};
+    // per changed ticker: slot, last, change %, volume, bid, ask, momentum
+    // (last trade at or above its EMA(20))
+    if (dirtyList.length) {
+      const rows = new Float64Array(7 * dirtyList.length);
+      dirtyList.forEach((i, k) => {
+        rows.set([i, prices[i], (prices[i] / stats.open[i] - 1) * 100, stats.volume[i],
+                  book.bid[i], book.ask[i], stats.last[i] >= stats.emaFast[i] ? 1 : 0], 7 * k);
+        dirtyFlags[i] = 0;
+      });
+      dirtyList = [];
+      view.rows = rows;
+      transfer.push(rows.buffer);
+    }
+    if (statsDirty && chartIdx < tickers.length) {
+      const i = chartIdx;
+      view.stats = {vwap: stats.vwap[i], emaFast: stats.emaFast[i], emaSlow: stats.emaSlow[i],
+                    rv: stats.rv[i], trades: stats.trades[i], buy: stats.buy[i] * 100};
+      statsDirty = false;
+    }
+    if (points.length) {
+      view.points = Float64Array.from(points);
+      points = [];
+      transfer.push(view.points.buffer);
+    }
+    if (orderBatches.length) {
+      view.orders = orderBatches;
+      orderBatches.forEach(b => Object.values(b).forEach(col => transfer.push(col.buffer)));
+      orderBatches = [];
+    }
+    if (ladderDirty) {
+      view.ladder = {bids: ladderSide(depthBids, (a, b) => b - a), asks: ladderSide(depthAsks, (a, b) => a - b)};
+      transfer.push(view.ladder.bids.buffer, view.ladder.asks.buffer);
+      ladderDirty = false;
+    }
+    view.ms = busy + performance.now() - t0;
+    busy = 0;
+    port.postMessage(view, transfer);
+  }
+
+  // prices: a full snapshot or the changed tickers since frame `base`; a
+  // gap means a missed frame, and the page asks the server for a snapshot
+  let marketSeq = null;
+  function applyUpdate(buf) {
+    const dv = new DataView(buf);
+    const full = dv.getUint8(1) & 1;
+    const seq = dv.getUint32(4, true), base = dv.getUint32(8, true), n = dv.getUint32(12, true);
+    if (seq === marketSeq) return;
+    if (full) {
+      prices.set(new Float32Array(buf, 16, Math.min(n, prices.length)));
+      for (let i=0;i<prices.length;i++) markDirty(i);
+    } else if (base !== marketSeq) {
+      port.postMessage({type: "resync"});
+      return;
+    } else {
+      const nb = (((n + 7) >> 3) + 3) & ~3;
+      const bits = new Uint8Array(buf, 16, nb);
+      const vals = new Float32Array(buf, 16 + nb);
+      for (let i=0, k=0; i<n; i++) {
+        if (bits[i >> 3] & (1 << (i & 7))) { prices[i] = vals[k++]; markDirty(i); }
+      }
+    }
+    marketSeq = seq;
+    points.push(prices[chartIdx]);
+    scheduleView();
+  }
+
+  // orders with how much of each filled, for the page's blotter; the fills
+  // that follow them are already in the server's trade stats (applyStats)
+  let ordersSeq = -1;
+  function applyOrders(buf) {
+    const dv = new DataView(buf);
+    const seq = dv.getUint32(4, true), count = dv.getUint32(8, true);
+    if (seq === ordersSeq) return;
+    ordersSeq = seq;
+    let off = 16;
+    const t = new Float64Array(buf, off, count); off += 8 * count;
+    const px = new Float32Array(buf, off, count); off += 4 * count;
+    const sym = new Uint32Array(buf, off, count); off += 4 * count;
+    const qty = new Uint32Array(buf, off, count); off += 4 * count;
+    const trader = new Uint32Array(buf, off, count); off += 4 * count;
+    const filled = new Uint32Array(buf, off, count); off += 4 * count;
+    const side = new Uint8Array(buf, off, count); off += count;
+    const who = new Uint32Array(count), ms = new Float64Array(count);
+    for (let j=0;j<count;j++) { who[j] = trader[j] % names.length; ms[j] = t[j] * 1000; }
+    orderBatches.push({time: ms, trader: who, side: side.slice(), sym: sym.slice(), qty: qty.slice(),
+                       px: px.slice(), filled: filled.slice()});
+    scheduleView();
+  }
+
+  // top of book for the tickers whose book moved
+  let bookSeq = -1;
+  function applyBook(buf) {
+    const dv = new DataView(buf);
+    const seq = dv.getUint32(4, true), count = dv.getUint32(8, true);
+    if (seq === bookSeq) return;
+    bookSeq = seq;
+    let off = 16;
+    const sym = new Uint32Array(buf, off, count); off += 4 * count;
+    const bid = new Float32Array(buf, off, count); off += 4 * count;
+    const ask = new Float32Array(buf, off, count); off += 4 * count;
+    const bidQty = new Uint32Array(buf, off, count); off += 4 * count;
+    const askQty = new Uint32Array(buf, off, count);
+    for (let j=0;j<count;j++) {
+      const i = sym[j];
+      if (i >= book.bid.length) continue;
+      book.bid[i] = bid[j]; book.ask[i] = ask[j];
+      book.bidQty[i] = bidQty[j]; book.askQty[i] = askQty[j];
+      markDirty(i);
+    }
+  }
+
+  // trade stats for the tickers whose book moved (see encode_stats in wire.py)
+  let statsSeq = -1;
+  function applyStats(buf) {
+    const dv = new DataView(buf);
+    const seq = dv.getUint32(4, true), count = dv.getUint32(8, true);
+    if (seq === statsSeq) return;
+    statsSeq = seq;
+    let off = 16;
+    const volume = new Float64Array(buf, off, count); off += 8 * count;
+    const sym = new Uint32Array(buf, off, count); off += 4 * count;
+    const trades = new Uint32Array(buf, off, count); off += 4 * count;
+    const n = stats.volume.length;
+    for (let j=0;j<count;j++) {
+      const i = sym[j];
+      if (i >= n) continue;
+      stats.volume[i] = volume[j];
+      stats.trades[i] = trades[j];
+      markDirty(i);
+    }
+    for (const dst of [stats.open, stats.last, stats.vwap, stats.emaFast, stats.emaSlow, stats.rv, stats.buy]) {
+      const src = new Float32Array(buf, off, count); off += 4 * count;
+      for (let j=0;j<count;j++) if (sym[j] < n) dst[sym[j]] = src[j];
+    }
+  }
+
+  // depth ladder of the chart's ticker: a snapshot, then level deltas,
+  // folded into two price -> size maps however fast they come. the view
+  // carries the top levels a side, sorted, as (prices..., sizes...)
+  let depthBids = new Map(), depthAsks = new Map();   // cents -> size
+  let depthSeq = -1, depthWaiting = false;
+  function applyDepth(buf) {
+    const dv = new DataView(buf);
+    const full = dv.getUint8(1) & 1, ticker = dv.getUint16(2, true);
+    const seq = dv.getUint32(4, true), base = dv.getUint32(8, true);
+    const nb = dv.getUint16(12, true), na = dv.getUint16(14, true);
+    if (ticker !== chartIdx || seq === depthSeq) return;
+    if (full) {
+      depthBids.clear(); depthAsks.clear();
+      depthWaiting = false;
+    } else if (base !== depthSeq) {
+      // missed a frame: ask for a fresh snapshot, once
+      if (!depthWaiting) { depthWaiting = true; port.postMessage({type: "depth"}); }
+      return;
+    }
+    const cols = new Uint32Array(buf, 16, 2 * (nb + na));
+    applyLevels(depthBids, cols, 0, nb);
+    applyLevels(depthAsks, cols, 2 * nb, na);
+    depthSeq = seq;
+    ladderDirty = true;
+    scheduleView();
+  }
+  function applyLevels(map, cols, off, n) {
+    for (let j=0;j<n;j++) {
+      const px = cols[off + j], qty = cols[off + n + j];
+      if (qty) map.set(px, qty); else map.delete(px);
+    }
+  }
+  function ladderSide(map, order) {
+    const px = Array.from(map.keys()).sort(order).slice(0, LADDER_LEVELS);
+    const out = new Float64Array(2 * px.length);
+    px.forEach((p, r) => { out[r] = p; out[px.length + r] = map.get(p); });
+    return out;
+  }
+
+  // chart history for the selected ticker (see encode_series in wire.py)
+  function applyHistory(buf) {
+    const dv = new DataView(buf);
+    const ticker = dv.getUint16(2, true), count = dv.getUint32(4, true);
+    if (ticker !== chartIdx) return;
+    const px = new Float32Array(buf, 16 + 4 * count, count).slice();
+    port.postMessage({type: "history", ticker: ticker, px: px}, [px.buffer]);
+  }
+
+  function selectChart(idx, fresh) {
+    chartIdx = idx;
+    statsDirty = true;
+    points = [];
+    if (fresh) {
+      // a new ticker (or a replay seek): the ladder starts over from a snapshot
+      depthBids.clear(); depthAsks.clear();
+      depthSeq = -1; depthWaiting = true;
+      ladderDirty = true;
+    }
+    scheduleView();
+  }
+
+  // SAM AI intents are data (intents.json, shipped in the bootstrap; see
+  // intents.py for the rules, which this mirrors): keywords compile into one
+  // Aho-Corasick automaton and patterns into one regex, so a message is
+  // matched in a single pass however many intents there are. earlier wins
+  function IntentMatcher(table) {
+    this.intents = table.intents;
+    this.tickers = table.tickers || {};
+    this.fallback = table.fallback || [""];
+    this.next = [new Map()];
+    this.fail = [0];
+    this.out = [Infinity];
+    this.intents.forEach((it, i) => (it.keywords || []).forEach(w => {
+      let s = 0;
+      for (const ch of w.toUpperCase()) {
+        let n = this.next[s].get(ch);
+        if (n === undefined) {
+          n = this.next.length;
+          this.next[s].set(ch, n);
+          this.next.push(new Map()); this.fail.push(0); this.out.push(Infinity);
+        }
+        s = n;
+      }
+      this.out[s] = Math.min(this.out[s], i);
+    }));
+    const queue = Array.from(this.next[0].values());
+    for (let q = 0; q < queue.length; q++) {
+      const s = queue[q];
+      for (const [ch, n] of this.next[s]) {
+        let f = this.fail[s];
+        while (f && !this.next[f].has(ch)) f = this.fail[f];
+        const g = this.next[f].get(ch) || 0;
+        this.fail[n] = g !== n ? g : 0;
+        this.out[n] = Math.min(this.out[n], this.out[this.fail[n]]);
+        queue.push(n);
+      }
+    }
+    this.patterns = [];
+    this.intents.forEach((it, i) => { if (it.pattern) this.patterns.push([i, new RegExp(it.pattern, "iy")]); });
+    this.combined = this.patterns.length
+      ? new RegExp(this.intents.filter(it => it.pattern).map(it => `(?:${it.pattern})`).join("|"), "i") : null;
+    this.ticker = this.intents.findIndex(it => it.action === "ticker");
+  }
+  IntentMatcher.prototype.keyword = function (upper) {
+    let s = 0, best = Infinity;
+    for (const ch of upper) {
+      while (s && !this.next[s].has(ch)) s = this.fail[s];
+      s = this.next[s].get(ch) || 0;
+      if (this.out[s] < best) best = this.out[s];
+    }
+    return best;
+  };
+  IntentMatcher.prototype.match = function (text) {
+    // {index (-1: none), found: pattern match, slot: named symbol}
+    const upper = text.toUpperCase();
+    let best = this.keyword(upper), found = null, slot = -1;
+    const m = this.combined && this.combined.exec(text);
+    if (m) {
+      // which pattern matched: retry each at the match position
+      for (const [i, rx] of this.patterns) {
+        rx.lastIndex = m.index;
+        const f = rx.exec(text);
+        if (f) { if (i < best) { best = i; found = f; } break; }
+      }
+    }
+    if (this.ticker >= 0 && this.ticker < best) {
+      slot = symbols.findIn(upper);
+      if (slot >= 0) { best = this.ticker; found = null; }
+    }
+    return {index: best === Infinity ? -1 : best, found: found, slot: slot};
+  };
+  function fillReply(template, vars) {
+    return template.replace(/\{(\w+)\}/g, (all, k) => (k in vars ? vars[k] : all));
+  }
+  let intents = null;
+  let lastTicker = "";          // memory for "update": the last ticker asked about
+  const quotes = new Map();     // chat id -> reply template waiting on a server quote
+
+  // one SAM AI message -> {id, html} for a canned reply, or {id, ask} for a
+  // question the server answers (story search, see search.py; quotes, see
+  // analytics.py), with what to say if it never does
+  function chat(id, text) {
+    const hit = intents.match(text);
+    const it = intents.intents[hit.index];
+    if (it && it.action === "news") {
+      port.postMessage({type: "chat", id: id, ask: {kind: "news", q: hit.found[1].replace(/[?.!\s]+$/, "")},
+                        timeout: "The news desk is not answering. Try again in a moment."});
+      return;
+    }
+    const vars = {first: tickers[0], last: tickers[tickers.length - 1]};
+    let sym = null, template = null;
+    if (it && it.action === "update" && lastTicker !== "") {
+      sym = lastTicker; template = it.reply;
+    } else if (it && it.action === "ticker") {
+      sym = lastTicker = tickers[hit.slot];
+      template = intents.tickers[sym] || it.reply;
+    }
+    if (sym !== null) {
+      quotes.set(id, {sym: sym, template: template, vars: vars});
+      port.postMessage({type: "chat", id: id, ask: {kind: "quote", sym: sym},
+                        timeout: `${sym}: last $${fmt(prices[symbols.slot(sym)])}. The quote desk is not answering.`});
+      return;
+    }
+    let html;
+    if (!it) html = intents.fallback[Math.floor(Math.random() * intents.fallback.length)];
+    else if (it.action === "update") html = fillReply(it.missing, vars);
+    else html = fillReply(it.reply, vars);
+    port.postMessage({type: "chat", id: id, html: html});
+  }
+  function quote(id, q) {
+    const p = quotes.get(id);
+    if (!p) return;
+    quotes.delete(id);
+    Object.assign(p.vars, {
+      ticker: p.sym, price: fmt(q.last), chg: (q.chg >= 0 ? "+" : "") + q.chg.toFixed(2),
+      vol: q.rv.toFixed(2), vwap: fmt(q.vwap), volume: intFmt.format(q.volume),
+    });
+    port.postMessage({type: "chat", id: id, text: fillReply(p.template, p.vars)});
+  }
+
+  function boot(seed) {
+    tickers = seed.tickers.slice();
+    names = Array.isArray(seed.names) && seed.names.length ? seed.names : ["Trader A"];
+    symbols = new SymbolRegistry(tickers);
+    prices = Float64Array.from(seed.prices);
+    stats = new TradeStats(seed.prices);
+    book = new TopOfBook(tickers.length);
+    dirtyFlags = new Uint8Array(tickers.length);
+    intents = new IntentMatcher(seed.intents);
+    for (let i=0;i<tickers.length;i++) markDirty(i);
+  }
+
+  const frames = {update: applyUpdate, orders: applyOrders, book: applyBook, stats: applyStats, depth: applyDepth,
+                  history: applyHistory};
+  port.onmessage = function (e) {
+    const m = e.data;
+    const t0 = performance.now();
+    if (frames[m.type]) frames[m.type](m.buf);
+    else if (m.type === "boot") boot(m.seed);
+    else if (m.type === "chart") selectChart(m.idx, m.fresh);
+    else if (m.type === "chat") chat(m.id, m.text);
+    else if (m.type === "quote") quote(m.id, m.quote);
+    else if (m.type === "hidden") viewMs = m.hidden ? HIDDEN_VIEW_MS : VIEW_MS;
+    busy += performance.now() - t0;
+  };
+}
+
+if (typeof WorkerGlobalScope !== "undefined" && self instanceof WorkerGlobalScope) marketModel(self);
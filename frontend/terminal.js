@@ -0,0 +1,1018 @@
+// per-session bootstrap, fetched from the file named by the first streamlit render
+let SEED = null;
+
+// helpers
+function fmt(n) { return Number(n).toFixed(2); }
+const intFmt = new Intl.NumberFormat();
+function nowTime(ms) {
+  const d = ms === undefined ? new Date() : new Date(ms);
+  return d.toTimeString().slice(0,8);
+}
+
+// all UI work runs in one animation-frame pass. tasks are named, in
+// priority order: one runs when marked (new data to draw), every `every` ms,
+// or both, and returns true if it stopped with work left. once the frame's
+// budget is spent the remaining tasks wait for the next frame, where they go
+// first so none starves. one-shot timers (popups, chat replies) are the
+// first task. while the page is hidden nothing is drawn: only the timers
+// run, once every HIDDEN_MS. per-task timing: scheduler.timing()
+const FRAME_BUDGET_MS = 8;
+const HIDDEN_MS = 1000;
+function Scheduler(budget) {
+  this.budget = budget;
+  this.tasks = [];
+  this.byName = new Map();
+  this.timers = [];           // {at, fn}, unordered: there are only a few
+  this.nextTimer = Infinity;
+  this.frames = 0;
+  this.overruns = 0;          // frames that went past the budget
+  this.add("timers", now => this.fireTimers(now), {background: true});
+}
+Scheduler.prototype.add = function (name, fn, opts) {
+  opts = opts || {};
+  // like setInterval, an `every` task first runs one period from now
+  const t = {name: name, fn: fn, every: opts.every || 0, background: !!opts.background,
+             next: performance.now() + (opts.every || 0),
+             due: false, late: false, runs: 0, total: 0, worst: 0, deferred: 0};
+  this.tasks.push(t);
+  this.byName.set(name, t);
+};
+Scheduler.prototype.mark = function (name) { this.byName.get(name).due = true; };
+Scheduler.prototype.after = function (ms, fn) {
+  const at = performance.now() + ms;
+  this.timers.push({at: at, fn: fn});
+  this.nextTimer = Math.min(this.nextTimer, at);
+};
+Scheduler.prototype.fireTimers = function (now) {
+  const due = this.timers.filter(t => t.at <= now);
+  this.timers = this.timers.filter(t => t.at > now);
+  this.nextTimer = this.timers.reduce((m, t) => Math.min(m, t.at), Infinity);
+  due.forEach(t => t.fn());
+};
+Scheduler.prototype.frame = function (now) {
+  const t0 = performance.now(), deadline = t0 + this.budget, hidden = document.hidden;
+  let ran = 0;
+  this.frames++;
+  if (now >= this.nextTimer) this.byName.get("timers").due = true;
+  for (const late of [true, false]) {
+    for (const t of this.tasks) {
+      if (t.late !== late || (hidden && !t.background)) continue;
+      if (!t.due && !(t.every && now >= t.next)) continue;
+      if (ran && performance.now() >= deadline) { t.late = true; t.deferred++; continue; }
+      ran++;
+      const a = performance.now();
+      t.due = t.late = false;
+      if (t.every) t.next = now + t.every;
+      if (t.fn(now, deadline)) t.due = true;
+      const ms = performance.now() - a;
+      t.runs++; t.total += ms;
+      if (ms > t.worst) t.worst = ms;
+    }
+  }
+  if (performance.now() > deadline) this.overruns++;
+};
+Scheduler.prototype.start = function () {
+  const loop = now => { this.frame(now); requestAnimationFrame(loop); };
+  requestAnimationFrame(loop);
+  // hidden pages get no animation frames
+  let sleeping = false;
+  const background = () => {
+    sleeping = document.hidden;
+    if (!sleeping) return;
+    this.frame(performance.now());
+    setTimeout(background, HIDDEN_MS);
+  };
+  document.addEventListener("visibilitychange", () => {
+    if (document.hidden && !sleeping) { sleeping = true; setTimeout(background, HIDDEN_MS); }
+  });
+};
+Scheduler.prototype.timing = function (reset) {
+  // per task: runs, total / average / worst ms, frames it was deferred
+  const out = this.tasks.map(t => ({name: t.name, runs: t.runs, total: t.total, avg: t.total / (t.runs || 1),
+                                    worst: t.worst, deferred: t.deferred}));
+  if (reset) {
+    this.tasks.forEach(t => { t.runs = t.total = t.worst = t.deferred = 0; });
+    this.frames = this.overruns = 0;
+  }
+  return out;
+};
+const scheduler = new Scheduler(FRAME_BUDGET_MS);
+
+// the market model (prices, top of book, depth, trade analytics, SAM AI
+// intents) runs in a worker, see market.js; this page keeps what it last
+// reported per ticker and only renders
+let TICKERS = [];
+let prices = new Float64Array(0);
+let chg = new Float64Array(0);     // % from the session open
+let volume = new Float64Array(0);
+let bid = new Float32Array(0), ask = new Float32Array(0);
+let up = new Uint8Array(0);         // momentum: last trade at or above its EMA(20)
+
+// watchlist and ticker strip are keyed by ticker slot: each row/badge is
+// created once, then only cells whose text or class changed are touched.
+// changes are collected as dirty slots and flushed in one animation frame.
+let watchRows = [];
+let stripCells = [];
+let dirtyFlags = new Uint8Array(0);
+let dirtyList = [];
+
+function cell(parent, tag, cls) {
+  const el = document.createElement(tag);
+  if (cls) el.className = cls;
+  parent.appendChild(el);
+  return el;
+}
+function buildWatch() {
+  const tb = document.querySelector("#watch tbody");
+  const frag = document.createDocumentFragment();
+  watchRows = TICKERS.map((sym, i) => {
+    const tr = cell(frag, "tr");
+    tr.dataset.i = i;
+    if (i === chartIdx) tr.className = "sel";
+    cell(tr, "td").textContent = sym;
+    return {tr: tr, bid: cell(tr, "td"), ask: cell(tr, "td"), px: cell(tr, "td"), chg: cell(tr, "td"),
+            vol: cell(tr, "td"), txt: ["", "", "", "", ""], cls: ""};
+  });
+  tb.replaceChildren(frag);
+}
+function buildTickerStrip() {
+  const el = document.getElementById("ticker-strip");
+  const frag = document.createDocumentFragment();
+  stripCells = TICKERS.map(sym => {
+    const node = cell(frag, "span", "badge sam");
+    cell(node, "b").textContent = sym;
+    node.appendChild(document.createTextNode(" "));
+    return {el: cell(node, "span"), txt: "", cls: ""};
+  });
+  el.replaceChildren(frag);
+}
+function setText(el, cache, k, v) {
+  if (cache[k] !== v) { cache[k] = v; el.textContent = v; }
+}
+function setClass(el, cache, v) {
+  if (cache.cls !== v) { cache.cls = v; el.className = v; }
+}
+function patchRow(i) {
+  const r = watchRows[i], s = stripCells[i];
+  const px = fmt(prices[i]);
+  setText(r.px, r.txt, 0, px);
+  setText(r.chg, r.txt, 1, chg[i].toFixed(2) + "%");
+  setText(r.vol, r.txt, 2, intFmt.format(volume[i]));
+  setText(r.bid, r.txt, 3, bookFmt(bid[i]));
+  setText(r.ask, r.txt, 4, bookFmt(ask[i]));
+  setClass(r.chg, r, chg[i] >= 0 ? "green" : "red");
+  // the strip arrow is momentum: last trade above or below its EMA(20)
+  setText(s.el, s, "txt", (up[i] ? "▲ " : "▼ ") + px);
+  setClass(s.el, s, up[i] ? "green" : "red");
+}
+function markDirty(i) {
+  if (!dirtyFlags[i]) { dirtyFlags[i] = 1; dirtyList.push(i); }
+  scheduler.mark("rows");
+}
+// rows are patched until the frame budget is spent; the rest wait for the
+// next frame, so a full refresh of thousands of rows never blocks for long
+let rowsPatched = 0;   // for the stress report
+function flushRows(now, deadline) {
+  let k = 0;
+  for (; k<dirtyList.length; k++) {
+    patchRow(dirtyList[k]);
+    dirtyFlags[dirtyList[k]] = 0;
+    if ((k & 63) === 63 && performance.now() > deadline) { k++; break; }
+  }
+  rowsPatched += k;
+  dirtyList.splice(0, k);
+  return dirtyList.length > 0;
+}
+function bookFmt(px) { return px === px ? fmt(px) : "—"; }
+
+// analytics line under the chart header for the selected ticker
+const chartStats = document.getElementById("chartStats");
+let chartStatsTxt = {txt: ""};
+function renderChartStats(st) {
+  setText(chartStats, chartStatsTxt, "txt",
+    `VWAP ${fmt(st.vwap)}  EMA20 ${fmt(st.emaFast)}  EMA50 ${fmt(st.emaSlow)}  ` +
+    `RV ${st.rv.toFixed(2)}%  ${intFmt.format(st.trades)} trades, ${st.buy.toFixed(0)}% buy`);
+}
+
+// stress mode (?stress=N on the app url): N tickers, and a console report of
+// where the frame time went (the scheduler's per-task timing), the market
+// model's time off the main thread and any long tasks the browser saw
+let stressStats = null;
+const STRESS_REPORT_MS = 10000;
+function startStressReport() {
+  stressStats = {longTasks: 0, longest: 0, views: 0, model: 0};
+  if (window.PerformanceObserver) {
+    try {
+      new PerformanceObserver(list => list.getEntries().forEach(e => {
+        stressStats.longTasks++; stressStats.longest = Math.max(stressStats.longest, e.duration);
+      })).observe({type: "longtask", buffered: true});
+    } catch (e) { /* longtask timing not supported */ }
+  }
+  scheduler.timing(true);
+  scheduler.add("stress", () => {
+    const st = stressStats, frames = scheduler.frames, overruns = scheduler.overruns;
+    const tasks = scheduler.timing(true).filter(t => t.runs || t.deferred);
+    console.log(`[stress] ${TICKERS.length} tickers, ${frames} frames (${overruns} over ${FRAME_BUDGET_MS} ms): ` +
+      tasks.map(t => `${t.name} ${t.runs}x avg ${t.avg.toFixed(2)} worst ${t.worst.toFixed(2)} ms` +
+                     (t.deferred ? ` deferred ${t.deferred}` : "")).join(", ") +
+      `; ${rowsPatched} rows patched, ${ladderRows} ladder rows repainted, ` +
+      `model ${st.model.toFixed(0)} ms over ${st.views} views, ` +
+      `long tasks ${st.longTasks} (longest ${st.longest.toFixed(0)} ms)`);
+    Object.assign(st, {longTasks: 0, longest: 0, views: 0, model: 0});
+    rowsPatched = ladderRows = 0;
+  }, {every: STRESS_REPORT_MS});
+}
+
+// news arrives a page at a time (see news.py): page 0 comes with the
+// bootstrap and also feeds the lead story and breaking banner; the pager asks
+// the server for others
+let STORIES = [];
+let newsPage = 0, newsPages = 1, newsText = null;
+function loadNews() {
+  const lead = document.getElementById("lead");
+  if (STORIES.length) {
+    lead.innerHTML = `<div style="font-size:14px; font-weight:700; margin-bottom:6px;">${STORIES[0].title}</div><div>${STORIES[0].body}</div>`;
+  }
+  newsPages = Math.max(1, Math.ceil((SEED.story_count || STORIES.length) / (SEED.page_size || STORIES.length || 1)));
+  renderNews(0, STORIES);
+}
+function newsItem(s, live) {
+  // built with textContent: live stories come from outside the app
+  const item = document.createElement("div");
+  item.className = live ? "live" : "";
+  item.style.marginBottom = "10px";
+  const t = document.createElement("div");
+  t.style.fontWeight = "700";
+  const icon = document.createElement("span");
+  icon.className = "samicon";
+  icon.style.cssText = "width:12px; height:12px;";
+  t.append(icon, s.title);
+  const b = document.createElement("div");
+  b.style.color = "var(--muted)";
+  b.textContent = s.body;
+  item.append(t, b);
+  return item;
+}
+function renderNews(page, stories) {
+  const news = document.getElementById("news");
+  newsPage = page;
+  news.textContent = "";
+  const frag = document.createDocumentFragment();
+  // page 0 leads with the live stories, newest first
+  liveNodes = [];
+  if (!page) {
+    for (let i=LIVE.length-1;i>=0;i--) liveNodes.unshift(frag.appendChild(newsItem(LIVE[i], true)));
+  }
+  (page ? stories : stories.slice(1)).forEach(s => frag.appendChild(newsItem(s, false)));
+  news.appendChild(frag);
+  news.scrollTop = 0;
+  document.getElementById("newsPage").textContent = `${newsPage + 1}/${newsPages}`;
+}
+function requestNews(page) {
+  page = Math.min(Math.max(page, 0), newsPages - 1);
+  if (page === newsPage) return;
+  if (page === 0) { renderNews(0, STORIES); return; }
+  newsText = null;  // so the answer draws even if it's the page we had before
+  sendValue({news: {page: page, nonce: Date.now()}});
+}
+function applyNews(text) {
+  // renders repeat the last page sent; only a new one is drawn
+  if (text === newsText) return;
+  newsText = text;
+  const m = JSON.parse(text);
+  newsPages = m.pages;
+  renderNews(m.page, m.stories);
+}
+
+// live stories pushed by the server (see ingest.py), oldest first, at most a
+// handful per frame however fast they arrive. they lead the breaking banner
+// and the News panel, and are patched in: new items are inserted above the
+// old ones and the oldest drop off past LIVE_CAP
+const LIVE_CAP = 50;
+let LIVE = [], liveSeq = 0, liveNodes = [];
+function applyLive(text) {
+  const m = JSON.parse(text);
+  if (m.seq <= liveSeq || !m.stories.length) return;
+  liveSeq = m.seq;
+  LIVE = LIVE.concat(m.stories).slice(-LIVE_CAP);
+  headlineIdx = 0;
+  scheduler.mark("breaking");
+  if (newsPage !== 0) return;
+  const news = document.getElementById("news");
+  const frag = document.createDocumentFragment();
+  const fresh = m.stories.slice(-LIVE_CAP).map(s => newsItem(s, true)).reverse();
+  fresh.forEach(n => frag.appendChild(n));
+  news.insertBefore(frag, news.firstChild);
+  liveNodes = fresh.concat(liveNodes);
+  while (liveNodes.length > LIVE_CAP) liveNodes.pop().remove();
+}
+
+// breaking banner rotates through live stories (newest first), then the feed
+let headlineIdx = 0;
+function spinBreaking() {
+  const el = document.getElementById("breaking");
+  const n = LIVE.length + STORIES.length;
+  if (!n) return;
+  const k = headlineIdx % n;
+  const s = k < LIVE.length ? LIVE[LIVE.length - 1 - k] : STORIES[k - LIVE.length];
+  el.textContent = s.title + " — " + s.body;
+  headlineIdx++;
+}
+
+// fixed-size series: Float64Array ring with O(1) append and running min/max
+// kept in two monotonic deques of absolute indices (each also a ring)
+function RingSeries(cap) {
+  this.cap = cap;
+  this.buf = new Float64Array(cap);
+  this.count = 0;                       // total values ever pushed
+  this.minQ = new Float64Array(cap); this.minH = 0; this.minN = 0;
+  this.maxQ = new Float64Array(cap); this.maxH = 0; this.maxN = 0;
+}
+RingSeries.prototype.length = function () { return Math.min(this.count, this.cap); };
+RingSeries.prototype.get = function (i) {  // i = 0 is the oldest value in the window
+  return this.buf[(this.count - this.length() + i) % this.cap];
+};
+RingSeries.prototype.last = function () { return this.buf[(this.count - 1) % this.cap]; };
+RingSeries.prototype.min = function () { return this.buf[this.minQ[this.minH] % this.cap]; };
+RingSeries.prototype.max = function () { return this.buf[this.maxQ[this.maxH] % this.cap]; };
+RingSeries.prototype.push = function (v) {
+  const cap = this.cap, t = this.count;
+  // drop the index that falls out of the window from the deque fronts
+  const old = t - cap;
+  if (this.minN && this.minQ[this.minH] === old) { this.minH = (this.minH + 1) % cap; this.minN--; }
+  if (this.maxN && this.maxQ[this.maxH] === old) { this.maxH = (this.maxH + 1) % cap; this.maxN--; }
+  // pop dominated values from the backs, then append
+  while (this.minN && this.buf[this.minQ[(this.minH + this.minN - 1) % cap] % cap] >= v) this.minN--;
+  while (this.maxN && this.buf[this.maxQ[(this.maxH + this.maxN - 1) % cap] % cap] <= v) this.maxN--;
+  this.buf[t % cap] = v;
+  this.minQ[(this.minH + this.minN++) % cap] = t;
+  this.maxQ[(this.maxH + this.maxN++) % cap] = t;
+  this.count = t + 1;
+};
+
+// chart symbol and range. history comes from the server already downsampled
+// (LTTB, see history.py) to at most CHART_POINTS points, so switching symbols
+// or ranges is a small fixed-size transfer
+let chartIdx = 0;
+let chartRange = "1h";
+function selectChart(idx, range) {
+  chartIdx = idx;
+  chartRange = range || chartRange;
+  document.getElementById("chartSym").textContent = TICKERS[chartIdx] || "";
+  document.querySelectorAll("#chartRanges span").forEach(el => {
+    el.className = el.dataset.range === chartRange ? "on" : "";
+  });
+  watchRows.forEach((r, i) => { r.tr.className = i === chartIdx ? "sel" : ""; });
+  // live points until the history arrives
+  series = new RingSeries(CHART_POINTS);
+  series.push(prices[chartIdx]);
+  chartPoints = [];
+  lineValid = false;
+  scheduler.mark("chart");
+  const ask = {chart: {sym: TICKERS[chartIdx], range: chartRange, nonce: Date.now()}};
+  if (!range) {
+    // a new ticker (or a replay seek): the ladder starts over from a snapshot
+    ladderLevels = {bids: NO_LEVELS, asks: NO_LEVELS};
+    scheduler.mark("ladder");
+    ask.depth = depthRequest();
+  }
+  model.postMessage({type: "chart", idx: chartIdx, fresh: !range});
+  sendValue(ask);
+}
+function applyHistory(m) {
+  if (m.ticker !== chartIdx) return;
+  series = new RingSeries(CHART_POINTS);
+  for (let i=0;i<m.px.length;i++) series.push(m.px[i]);
+  if (!m.px.length) series.push(prices[chartIdx]);
+  chartPoints = [];
+  lineValid = false;
+  scheduler.mark("chart");
+}
+
+// canvas chart: the grid is drawn once to an offscreen canvas, the line lives
+// on its own layer that scrolls left by whole pixels and only gets the newest
+// segment drawn. the layer is redrawn in full only when the price leaves the
+// current y-range (or the range becomes much too loose)
+const canvas = document.getElementById("chart");
+const ctx = canvas.getContext("2d");
+const W = canvas.width, H = canvas.height;
+const CHART_POINTS = 2 * W;
+let series = new RingSeries(CHART_POINTS);
+
+function offscreen() {
+  const c = document.createElement("canvas");
+  c.width = W; c.height = H;
+  return c;
+}
+const gridLayer = offscreen();
+(function drawGrid() {
+  const g = gridLayer.getContext("2d");
+  g.strokeStyle = "rgba(255,255,255,0.08)";
+  g.lineWidth = 1;
+  for (let x=0; x<W; x+=64) { g.beginPath(); g.moveTo(x,0); g.lineTo(x,H); g.stroke(); }
+  for (let y=0; y<H; y+=56) { g.beginPath(); g.moveTo(0,y); g.lineTo(W,y); g.stroke(); }
+})();
+const lineLayer = offscreen();
+const lctx = lineLayer.getContext("2d");
+let lineLo = 0, lineHi = 0, lineValid = false, lastX = 0, lastY = 0;
+
+function yOf(v) { return H-30 - (v - lineLo) * (H-40) / (lineHi - lineLo || 1); }
+function lineStyle() { lctx.lineWidth = 2; lctx.strokeStyle = "#19e57a"; lctx.lineJoin = "round"; }
+
+function redrawLine() {
+  const n = series.length(), dx = W / (series.cap - 1);
+  const min = series.min(), max = series.max(), pad = (max - min) * 0.1 || 1;
+  lineLo = min - pad; lineHi = max + pad;
+  lctx.clearRect(0,0,W,H);
+  lineStyle();
+  lctx.beginPath();
+  for (let i=0;i<n;i++) {
+    const x = i * dx, y = yOf(series.get(i));
+    if (i===0) lctx.moveTo(x,y); else lctx.lineTo(x,y);
+  }
+  lctx.stroke();
+  lastX = (n - 1) * dx; lastY = yOf(series.last());
+  lineValid = true;
+}
+
+function pushPoint(v) {
+  const full = series.count >= series.cap;
+  series.push(v);
+  const min = series.min(), max = series.max();
+  if (!lineValid || min < lineLo || max > lineHi || (max > min && (max - min) < (lineHi - lineLo) * 0.4)) {
+    redrawLine();
+    return;
+  }
+  let x = lastX + W / (series.cap - 1);
+  if (full && x > W) {
+    // scroll the layer by whole pixels so nothing gets resampled
+    const shift = Math.ceil(x - W);
+    lctx.globalCompositeOperation = "copy";
+    lctx.drawImage(lineLayer, -shift, 0);
+    lctx.globalCompositeOperation = "source-over";
+    x -= shift; lastX -= shift;
+  }
+  const y = yOf(v);
+  lineStyle();
+  lctx.beginPath(); lctx.moveTo(lastX, lastY); lctx.lineTo(x, y); lctx.stroke();
+  lastX = x; lastY = y;
+}
+
+function drawChart() {
+  ctx.clearRect(0,0,W,H);
+  ctx.drawImage(gridLayer, 0, 0);
+  if (!lineValid) redrawLine();
+  ctx.drawImage(lineLayer, 0, 0);
+  // last price flag
+  const last = series.last();
+  const y = yOf(last);
+  ctx.fillStyle = "rgba(0,0,0,0.7)";
+  ctx.fillRect(W-90, y-10, 84, 20);
+  ctx.fillStyle = "#eaf6ec";
+  ctx.font = "12px Verdana, sans-serif";
+  ctx.fillText("$"+last.toFixed(2), W-82, y+5);
+}
+
+// prices that arrived since the last frame go on the line all at once
+let chartPoints = [];
+function renderChart() {
+  for (let k=0;k<chartPoints.length;k++) pushPoint(chartPoints[k]);
+  chartPoints = [];
+  drawChart();
+}
+
+// depth ladder (level 2) of the chart's ticker: best bid and ask on the top
+// row, LADDER_LEVELS a side below. the model folds the server's snapshot and
+// level deltas (see wire.py) into the book and reports its top levels, and
+// the canvas is repainted once per animation frame, just the rows whose
+// level or size changed. levels appearing or leaving shift the rows under
+// them: those are moved with a blit rather than repainted
+const LADDER_LEVELS = 50, LADDER_ROW = 16;
+const ladder = document.getElementById("depth");
+const dctx = ladder.getContext("2d");
+const LW = ladder.width, HALF = LW / 2;
+const NO_LEVELS = new Float64Array(0);
+let ladderLevels = {bids: NO_LEVELS, asks: NO_LEVELS};   // (cents..., sizes...) best first
+let ladderScale = 0;
+function LadderSide(x0, bid) {
+  this.x0 = x0; this.bid = bid;
+  this.px = new Float64Array(LADDER_LEVELS).fill(-1);   // what each row shows
+  this.qty = new Float64Array(LADDER_LEVELS);
+}
+const ladderBids = new LadderSide(0, true), ladderAsks = new LadderSide(HALF, false);
+let ladderRows = 0;   // rows repainted, for the stress report
+(function drawLadderHeader() {
+  dctx.fillStyle = "#b6d6bf";
+  dctx.font = "11px Verdana, sans-serif";
+  dctx.textAlign = "left"; dctx.fillText("SIZE", 6, 12); dctx.fillText("ASK", HALF + 6, 12);
+  dctx.textAlign = "right"; dctx.fillText("BID", HALF - 6, 12); dctx.fillText("SIZE", LW - 6, 12);
+})();
+function depthRequest() {
+  return {sym: TICKERS[chartIdx], nonce: Date.now()};
+}
+function drawLadder() {
+  const {bids, asks} = ladderLevels;
+  let max = 0;
+  for (let r=bids.length>>1;r<bids.length;r++) if (bids[r] > max) max = bids[r];
+  for (let r=asks.length>>1;r<asks.length;r++) if (asks[r] > max) max = asks[r];
+  // bars scale to the power of two above the largest level, so the scale,
+  // and with it every row, only changes when that size doubles or halves
+  const scale = max ? 2 ** Math.ceil(Math.log2(max)) : 1;
+  if (scale !== ladderScale) {
+    ladderScale = scale;
+    ladderBids.px.fill(-1); ladderAsks.px.fill(-1);
+  }
+  drawLadderSide(ladderBids, bids);
+  drawLadderSide(ladderAsks, asks);
+}
+function moveLadderRows(side, from, to) {
+  // the rows from `from` to the bottom, drawn again starting at row `to`
+  const k = LADDER_LEVELS - Math.max(from, to);
+  dctx.drawImage(ladder, side.x0, (from + 1) * LADDER_ROW, HALF, k * LADDER_ROW,
+                 side.x0, (to + 1) * LADDER_ROW, HALF, k * LADDER_ROW);
+  side.px.copyWithin(to, from, from + k); side.qty.copyWithin(to, from, from + k);
+  if (to > from) side.px.fill(-1, from, to); else side.px.fill(-1, to + k);
+}
+function drawLadderSide(side, levels) {
+  const x0 = side.x0, n = levels.length >> 1;
+  // levels are sorted on both sides of the change, so a level still drawn
+  // in another row takes the rows under it along when it moves
+  for (let r=0;r<n;r++) {
+    const px = levels[r];
+    if (side.px[r] === px && side.qty[r] === levels[n + r]) continue;
+    const j = side.px.indexOf(px);
+    if (j >= 0 && side.qty[j] === levels[n + r]) moveLadderRows(side, j, r);
+  }
+  dctx.font = "12px Verdana, sans-serif";
+  for (let r=0;r<LADDER_LEVELS;r++) {
+    const px = r < n ? levels[r] : 0, qty = px ? levels[n + r] : 0;
+    if (side.px[r] === px && side.qty[r] === qty) continue;
+    side.px[r] = px; side.qty[r] = qty;
+    ladderRows++;
+    const y = (r + 1) * LADDER_ROW;
+    dctx.clearRect(x0, y, HALF, LADDER_ROW);
+    if (!px) continue;
+    const w = qty / ladderScale * (HALF - 4);
+    dctx.fillStyle = side.bid ? "rgba(25,229,122,0.22)" : "rgba(255,91,77,0.22)";
+    dctx.fillRect(side.bid ? HALF - w : HALF, y + 1, w, LADDER_ROW - 2);
+    dctx.fillStyle = "#eaf6ec";
+    dctx.textAlign = side.bid ? "left" : "right";
+    dctx.fillText(intFmt.format(qty), side.bid ? 6 : LW - 6, y + 12);
+    dctx.fillStyle = side.bid ? "#19e57a" : "#ff5b4d";
+    dctx.textAlign = side.bid ? "right" : "left";
+    dctx.fillText((px / 100).toFixed(2), side.bid ? HALF - 6 : HALF + 6, y + 12);
+  }
+}
+
+// order log: a columnar ring of typed arrays holding the last ORDER_CAP
+// orders. memory is allocated once and stays flat however long the page runs
+const ORDER_CAP = 100000;
+const SIDE_BUY = 1, SIDE_SELL = 0;
+function OrderLog(cap) {
+  this.cap = cap;
+  this.time = new Float64Array(cap);   // epoch ms
+  this.px = new Float32Array(cap);
+  this.qty = new Uint32Array(cap);
+  this.sym = new Uint32Array(cap);     // ticker slot
+  this.trader = new Uint32Array(cap);  // NAMES index
+  this.filled = new Uint32Array(cap);  // qty that traded on arrival
+  this.side = new Uint8Array(cap);
+  this.count = 0;
+}
+OrderLog.prototype.length = function () { return Math.min(this.count, this.cap); };
+OrderLog.prototype.push = function (time, trader, side, sym, qty, px, filled) {
+  const k = this.count % this.cap;
+  this.time[k] = time; this.trader[k] = trader; this.side[k] = side;
+  this.sym[k] = sym; this.qty[k] = qty; this.px[k] = px; this.filled[k] = filled;
+  this.count++;
+};
+OrderLog.prototype.slot = function (r) {  // r = 0 is the newest order
+  return (this.count - 1 - r) % this.cap;
+};
+OrderLog.prototype.append = function (b) {
+  // a batch of order columns from the model
+  for (let j=0;j<b.time.length;j++) {
+    this.push(b.time[j], b.trader[j], b.side[j] ? SIDE_BUY : SIDE_SELL, b.sym[j], b.qty[j], b.px[j], b.filled[j]);
+  }
+};
+let orders = new OrderLog(ORDER_CAP);
+
+// virtual blotter: a fixed pool of row elements is re-pointed at whichever
+// orders are in view; scrolling and new orders only patch cell text
+const ROW_H = 25;
+const blotterView = document.getElementById("blotterView");
+const blotterSpacer = document.getElementById("blotterSpacer");
+const blotterTable = document.getElementById("blotter");
+let blotterRows = [];
+function buildBlotter() {
+  const tb = blotterTable.querySelector("tbody");
+  const frag = document.createDocumentFragment();
+  const n = Math.ceil(blotterView.clientHeight / ROW_H) + 2;
+  blotterRows = Array.from({length: n}, () => {
+    const tr = cell(frag, "tr");
+    return {tr: tr, tds: [0,1,2,3,4,5,6].map(() => cell(tr, "td")), txt: ["","","","","","",""], cls: "", key: -1};
+  });
+  tb.replaceChildren(frag);
+}
+function scheduleBlotter() { scheduler.mark("blotter"); }
+function renderBlotter() {
+  const n = orders.length();
+  blotterSpacer.style.height = (n * ROW_H) + "px";
+  const first = Math.min(Math.floor(blotterView.scrollTop / ROW_H), Math.max(0, n - 1));
+  blotterTable.style.transform = `translateY(${first * ROW_H}px)`;
+  for (let j=0;j<blotterRows.length;j++) {
+    const row = blotterRows[j], r = first + j;
+    if (r >= n) { row.tr.style.display = "none"; row.key = -1; continue; }
+    row.tr.style.display = "";
+    const k = orders.slot(r);
+    const key = orders.count - 1 - r;    // absolute order number
+    if (row.key === key) continue;
+    row.key = key;
+    const buy = orders.side[k] === SIDE_BUY;
+    setText(row.tds[0], row.txt, 0, nowTime(orders.time[k]));
+    setText(row.tds[1], row.txt, 1, NAMES[orders.trader[k]]);
+    setText(row.tds[2], row.txt, 2, buy ? "BUY" : "SELL");
+    setText(row.tds[3], row.txt, 3, TICKERS[orders.sym[k]]);
+    setText(row.tds[4], row.txt, 4, intFmt.format(orders.qty[k]));
+    setText(row.tds[5], row.txt, 5, orders.filled[k] ? intFmt.format(orders.filled[k]) : "");
+    setText(row.tds[6], row.txt, 6, orders.px[k].toFixed(2));
+    setClass(row.tds[2], row, buy ? "green" : "red");
+  }
+}
+blotterView.addEventListener("scroll", scheduleBlotter, {passive: true});
+
+let NAMES = ["Trader A"];
+
+// what the model reports (see postView in market.js), at most one view a
+// frame: changed watch rows as packed (slot, last, chg %, volume, bid, ask,
+// momentum) records, the chart ticker's analytics and new price points, the
+// orders that arrived and the top of the depth ladder. anything for a
+// ticker the chart has since left is dropped
+function applyView(v) {
+  if (stressStats) { stressStats.views++; stressStats.model += v.ms; }
+  const rows = v.rows;
+  if (rows) {
+    for (let k=0;k<rows.length;k+=7) {
+      const i = rows[k];
+      prices[i] = rows[k + 1]; chg[i] = rows[k + 2]; volume[i] = rows[k + 3];
+      bid[i] = rows[k + 4]; ask[i] = rows[k + 5]; up[i] = rows[k + 6];
+      markDirty(i);
+    }
+  }
+  if (v.orders) {
+    let count = 0;
+    v.orders.forEach(b => { orders.append(b); count += b.time.length; });
+    // keep the rows in view anchored when the user has scrolled down
+    if (blotterView.scrollTop > 0) blotterView.scrollTop += count * ROW_H;
+    scheduleBlotter();
+  }
+  if (v.chart !== chartIdx) return;
+  if (v.stats) renderChartStats(v.stats);
+  if (v.points) {
+    for (let k=0;k<v.points.length;k++) chartPoints.push(v.points[k]);
+    // more than a screenful (a hidden page catching up) scrolls it all away
+    if (chartPoints.length > CHART_POINTS) chartPoints = chartPoints.slice(-CHART_POINTS);
+    scheduler.mark("chart");
+  }
+  if (v.ladder) { ladderLevels = v.ladder; scheduler.mark("ladder"); }
+}
+
+// replay controls (BANKOFSAM_REPLAY): speed, a seek slider over the tape and
+// the replay clock. the server applies them for every screen and reports
+// where the tape is on each update
+let replayText = null;
+let replayState = null;
+let replaySeeking = false;
+function setupReplay() {
+  document.getElementById("replayCtl").hidden = false;
+  document.getElementById("replayBar").hidden = false;
+  document.getElementById("replayCtl").addEventListener("click", e => {
+    if (e.target.dataset.speed) sendValue({replay: {speed: e.target.dataset.speed, nonce: Date.now()}});
+  });
+  const seek = document.getElementById("replaySeek");
+  seek.addEventListener("input", () => { replaySeeking = true; });
+  seek.addEventListener("change", () => {
+    replaySeeking = false;
+    if (!replayState) return;
+    const st = replayState;
+    sendValue({replay: {seek: st.t0 + (st.t1 - st.t0) * seek.value / 1000, nonce: Date.now()}});
+  });
+}
+function applyReplay(text) {
+  if (text === replayText) return;
+  replayText = text;
+  const st = JSON.parse(text);
+  // after a seek the chart history no longer matches; fetch it again
+  if (replayState && st.epoch !== replayState.epoch) selectChart(chartIdx);
+  replayState = st;
+  const speed = st.speed === null ? "max" : String(st.speed);
+  document.querySelectorAll("#replayCtl span").forEach(el => {
+    el.className = el.dataset.speed === speed ? "on" : "";
+  });
+  document.getElementById("replayClock").textContent = nowTime(st.t * 1000);
+  if (!replaySeeking) {
+    document.getElementById("replaySeek").value = st.t1 > st.t0 ? Math.round((st.t - st.t0) / (st.t1 - st.t0) * 1000) : 1000;
+  }
+}
+
+// logo renditions are fingerprinted files next to this script
+function applyLogo(logo) {
+  const root = document.documentElement.style;
+  root.setProperty("--sam-logo", `url('${logo.logo}')`);
+  root.setProperty("--sam-icon", `url('${logo.icon}')`);
+  root.setProperty("--sam-logo-aspect", logo.aspect);
+}
+
+// the frame tasks, after the scheduler's timers and in priority order
+const BREAKING_MS = 5000;
+scheduler.add("rows", flushRows);
+scheduler.add("chart", renderChart);
+scheduler.add("ladder", drawLadder);
+scheduler.add("blotter", renderBlotter);
+scheduler.add("breaking", spinBreaking, {every: BREAKING_MS});
+scheduler.start();
+
+// init
+function start(seed) {
+  SEED = seed;
+  TICKERS = SEED.tickers.slice();
+  const n = TICKERS.length;
+  prices = Float64Array.from(SEED.prices);
+  chg = new Float64Array(n); volume = new Float64Array(n);
+  bid = new Float32Array(n).fill(NaN); ask = new Float32Array(n).fill(NaN);
+  up = new Uint8Array(n).fill(1);
+  STORIES = Array.isArray(SEED.stories) ? SEED.stories : [];
+  NAMES = Array.isArray(SEED.names) && SEED.names.length ? SEED.names : ["Trader A"];
+  model.postMessage({type: "boot", seed: {tickers: TICKERS, prices: SEED.prices, names: NAMES, intents: SEED.intents}});
+  applyLogo(SEED.logo);
+  selectChart(0);
+  document.querySelector("#watch tbody").addEventListener("click", e => {
+    const tr = e.target.closest("tr");
+    if (tr) selectChart(+tr.dataset.i);
+  });
+  document.getElementById("chartRanges").addEventListener("click", e => {
+    if (e.target.dataset.range) selectChart(chartIdx, e.target.dataset.range);
+  });
+  document.getElementById("newsPager").addEventListener("click", e => {
+    if (e.target.dataset.dir) requestNews(newsPage + +e.target.dataset.dir);
+  });
+
+  dirtyFlags = new Uint8Array(TICKERS.length);
+  if (SEED.stress) startStressReport();
+  buildWatch();
+  buildTickerStrip();
+  loadNews();
+  spinBreaking();
+  buildBlotter();
+  if (SEED.replay) setupReplay();
+}
+/* ALERT BUBBLE LOGIC */
+const alertOptions = [
+  "<b>MARKET MOVE:</b> SAM01 surged +15% on high volume!",
+  "<b>WHALE ALERT:</b> Large buy order detected on SAM04.",
+  "<b>RUMOR:</b> Bank of Sam to announce 2:1 stock split?",
+  "<b>VIBE CHECK:</b> Market sentiment is officially 'MOONISH'.",
+  "<b>TECH ALERT:</b> Robo-hedger just executed 5,000 trades."
+];
+
+function showRandomAlert() {
+  const bubble = document.getElementById("alertBubble");
+  const overlay = document.getElementById("alertOverlay");
+  const text = document.getElementById("alertText");
+
+  const randomMsg = alertOptions[Math.floor(Math.random() * alertOptions.length)];
+  text.innerHTML = randomMsg;
+
+  overlay.style.display = "block";
+  bubble.style.display = "block";
+}
+
+function closeAlert() {
+  document.getElementById("alertBubble").style.display = "none";
+  document.getElementById("alertOverlay").style.display = "none";
+}
+
+// Wait 4 seconds after page load, then show the alert
+scheduler.after(4000, showRandomAlert);
+const samAIMessages = [
+  "🚀 SAM01 is mooning!",
+  "📈 Your watchlist is looking very green.",
+  "💎 SAM AI says: Diamond hands!",
+  "⚠️ Volatility alert on SAM02."
+];
+
+function showSamAI() {
+  const overlay = document.getElementById("samAIOverlay");
+  const text = document.getElementById("samAIText");
+  text.innerHTML = samAIMessages[Math.floor(Math.random() * samAIMessages.length)];
+  overlay.style.display = "block";
+}
+
+function closeSamAI() {
+  document.getElementById("samAIOverlay").style.display = "none";
+}
+
+scheduler.after(6000, showSamAI);
+// SAM AI: the model matches each message against the intent table (see
+// market.js) and answers with a reply, or with a question that needs server
+// state (story search, see search.py; quotes, see analytics.py). those go
+// out through the component value and the answer comes back as a render
+// arg, matched up by id; a quote goes back to the model to fill its reply
+const chats = new Map();         // id -> {msg, log}: lines still being answered
+const pendingChats = new Map();  // id -> what the server was asked
+function samLine(log) {
+  const samMsg = document.createElement("div");
+  samMsg.style.marginBottom = "8px";
+  samMsg.innerHTML = `<b style="color:#19e57a;">SAM AI:</b> <span style="font-style:italic; opacity:0.7;">Scanning Ledger...</span>`;
+  log.appendChild(samMsg);
+  return samMsg;
+}
+function samSay(id, html) {
+  const c = chats.get(id);
+  if (!c) return null;
+  chats.delete(id);
+  c.msg.innerHTML = `<b style="color:#19e57a;">SAM AI:</b> ` + html;
+  c.log.scrollTop = c.log.scrollHeight;
+  return c.msg;
+}
+function modelChat(m) {
+  if (m.ask) {
+    pendingChats.set(m.id, m.ask);
+    sendValue({chat: Object.assign({id: m.id}, m.ask)});
+    scheduler.after(5000, () => { if (pendingChats.delete(m.id)) samSay(m.id, m.timeout); });
+  } else if (m.html !== undefined) {
+    // DISPLAY WITH TYPING DELAY
+    scheduler.after(1000, () => samSay(m.id, m.html));
+  } else {
+    const msg = samSay(m.id, "");
+    if (msg) msg.append(m.text);
+  }
+}
+function applyReply(text) {
+  const m = JSON.parse(text);
+  const ask = pendingChats.get(m.id);
+  if (!ask) return;
+  pendingChats.delete(m.id);
+  if (ask.kind === "quote") {
+    model.postMessage({type: "quote", id: m.id, quote: m.quote});
+    return;
+  }
+  const msg = samSay(m.id, "");
+  if (!msg) return;
+  // story text is set as text, never as markup
+  msg.append(m.hits.length
+    ? `Top ${m.hits.length} of ${intFmt.format(m.total)} stories about "${ask.q}":`
+    : `Nothing in ${intFmt.format(m.indexed)} stories about "${ask.q}".`);
+  m.hits.forEach(s => {
+    const row = document.createElement("div");
+    row.style.margin = "2px 0 0 8px";
+    const t = document.createElement("b");
+    t.textContent = "• " + s.title;
+    row.append(t, s.body ? " — " + s.body : "");
+    msg.appendChild(row);
+  });
+}
+
+document.getElementById("samAISend").onclick = function() {
+    const input = document.getElementById("samAIInput");
+    const log = document.getElementById("samChatLog");
+    const introText = document.getElementById("samAIText");
+    const userVal = input.value.trim();
+
+    if (userVal !== "" && SEED) {
+        log.style.display = "block";
+        introText.style.display = "none";
+
+        const userMsg = document.createElement("div");
+        userMsg.innerHTML = `<b style="color:#b4ff6b;">YOU:</b> ` + userVal;
+        userMsg.style.marginBottom = "5px";
+        log.appendChild(userMsg);
+
+        // the model answers (see chat() in market.js)
+        const id = Date.now();
+        chats.set(id, {msg: samLine(log), log: log});
+        model.postMessage({type: "chat", id: id, text: userVal});
+
+        input.value = "";
+    }
+};
+
+// 6. Support for 'Enter' Key
+document.getElementById("samAIInput").addEventListener("keypress", function (e) {
+    if (e.key === 'Enter') {
+        document.getElementById("samAISend").click();
+    }
+});
+
+// streamlit component protocol (no build step, so no streamlit-component-lib):
+// announce readiness, size the frame, then boot on the first render message.
+// renders name the bootstrap, a fingerprinted JSON file next to this script,
+// which is fetched once; later renders with the same name only carry market
+// updates.
+function toStreamlit(type, data) {
+  window.parent.postMessage(Object.assign({isStreamlitMessage: true, type: type}, data), "*");
+}
+// the component value is the client's standing requests (resync, chart, news, chat, replay);
+// each carries a fresh nonce so the server can tell a new ask from a stale value
+let clientValue = {};
+function sendValue(part) {
+  clientValue = Object.assign({}, clientValue, part);
+  toStreamlit("streamlit:setComponentValue", {value: clientValue, dataType: "json"});
+}
+function requestResync() {
+  sendValue({resync: Date.now()});
+}
+// the market model's worker (market.js, named on this script's tag since it
+// is fingerprinted). render args go to it as they arrive, each frame copied
+// out of the render message into a buffer of its own and transferred, not
+// cloned. where workers are unavailable the model runs on this thread
+// behind a port that behaves the same
+const MODEL_URL = document.currentScript && document.currentScript.dataset.worker;
+function startModel() {
+  try {
+    if (window.Worker && MODEL_URL) return new Worker(MODEL_URL);
+  } catch (e) { /* blocked here (sandbox, file://): fall through */ }
+  const inbox = [];
+  const port = {onmessage: null, postMessage(m) {
+    Promise.resolve().then(() => page.onmessage && page.onmessage({data: m}));
+  }};
+  const page = {onmessage: null, postMessage(m) {
+    inbox.push(m);
+    if (port.onmessage) Promise.resolve().then(deliver);
+  }};
+  function deliver() { while (port.onmessage && inbox.length) port.onmessage({data: inbox.shift()}); }
+  function run() { marketModel(port); deliver(); }
+  if (typeof marketModel === "function") run();
+  else {
+    const tag = document.createElement("script");
+    tag.src = MODEL_URL;
+    tag.onload = run;
+    document.head.appendChild(tag);
+  }
+  return page;
+}
+const model = startModel();
+const modelMessages = {
+  view: applyView,
+  history: applyHistory,
+  chat: modelChat,
+  resync: requestResync,
+  depth: () => sendValue({depth: depthRequest()}),
+};
+model.onmessage = e => modelMessages[e.data.type](e.data);
+// a hidden page draws nothing, so the model reports less often
+document.addEventListener("visibilitychange", () => model.postMessage({type: "hidden", hidden: document.hidden}));
+function toModel(type, bytes) {
+  const buf = bytes.slice().buffer;
+  model.postMessage({type: type, buf: buf}, [buf]);
+}
+
+let bootstrapName = null;
+let booted = false;
+let pending = [];   // renders that arrived while the bootstrap was loading
+function boot(name) {
+  bootstrapName = name;
+  fetch(name).then(r => {
+    if (!r.ok) throw new Error(`${name}: ${r.status}`);
+    return r.json();
+  }).then(seed => {
+    start(seed);
+    booted = true;
+    const held = pending;
+    pending = [];
+    held.forEach(render);
+  }, err => {
+    // try again with whatever the next render names
+    console.warn("bootstrap", err);
+    bootstrapName = null;
+  });
+}
+window.addEventListener("message", function (e) {
+  const msg = e.data;
+  if (!msg || msg.type !== "streamlit:render") return;
+  const args = msg.args || {};
+  const name = args.bootstrap;
+  if (name && name !== bootstrapName) {
+    if (booted) {
+      // inputs changed server-side (new feed/logo); simplest correct thing is a fresh boot
+      location.reload();
+      return;
+    }
+    if (bootstrapName === null) boot(name);
+  }
+  if (booted) render(args);
+  else pending.push(args);
+});
+function render(args) {
+  // bytes args arrive as a Uint8Array; renders repeat the last one, which
+  // the model skips by sequence number
+  for (const kind of ["update", "orders", "book", "stats", "depth", "history"]) {
+    if (args[kind]) toModel(kind, args[kind]);
+  }
+  if (args.replay) applyReplay(args.replay);
+  if (args.news) applyNews(args.news);
+  if (args.live) applyLive(args.live);
+  if (args.reply) applyReply(args.reply);
+}
+toStreamlit("streamlit:componentReady", {apiVersion: 1});
+toStreamlit("streamlit:setFrameHeight", {height: 900});
@@ -0,0 +1,86 @@
+import numpy as np
+
+# price history for every ticker, plus largest-triangle-three-buckets
+# downsampling so a chart of any time range costs a fixed-size transfer.
+
+
+class HistoryStore:
+    # the market ticks every ticker at once, so history is a ring of rows: one
+    # timestamp and one float32 price per ticker (a column per ticker)
+    def __init__(self, n_tickers, capacity):
+        self.capacity = int(capacity)
+        self.t = np.zeros(self.capacity, dtype=np.float64)
+        self.p = np.zeros((self.capacity, n_tickers), dtype=np.float32)
+        self.count = 0
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, t, prices):
+        row = self.count % self.capacity
+        self.t[row] = t
+        self.p[row] = prices
+        self.count += 1
+
+    def extend(self, t, rows):
+        # many rows at once (a replayed stretch of ticks); only the last
+        # `capacity` can survive, so only those are written
+        t = np.asarray(t)[-self.capacity:]
+        rows = np.asarray(rows)
+        skipped = len(rows) - len(t)
+        idx = (self.count + skipped + np.arange(len(t))) % self.capacity
+        self.t[idx] = t
+        self.p[idx] = rows[skipped:]
+        self.count += skipped + len(t)
+
+    def _ordered(self, arr):
+        # oldest-first view (a copy only once the ring has wrapped)
+        if self.count <= self.capacity:
+            return arr[:self.count]
+        head = self.count % self.capacity
+        return np.concatenate((arr[head:], arr[:head]))
+
+    def series(self, col, t0=None, t1=None):
+        # (times, prices) for one ticker, optionally limited to [t0, t1]
+        t = self._ordered(self.t)
+        lo = 0 if t0 is None else np.searchsorted(t, t0, side="left")
+        hi = len(t) if t1 is None else np.searchsorted(t, t1, side="right")
+        if self.count <= self.capacity:
+            p = self.p[lo:hi, col]
+        else:
+            head = self.count % self.capacity
+            rows = (np.arange(lo, hi) + head) % self.capacity
+            p = self.p[rows, col]
+        return t[lo:hi].copy(), np.array(p, dtype=np.float64)
+
+
+def lttb(x, y, n_out):
+    # largest-triangle-three-buckets: keeps the first and last points and, per
+    # bucket, the point spanning the largest triangle with the previously kept
+    # point and the next bucket's average. bucket bounds and averages are
+    # computed in one shot; the loop runs once per output point, never per
+    # input point, and the per-bucket work is array math.
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+    edges = np.floor(np.linspace(1, n - 1, n_out - 1)).astype(np.intp)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:-1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:-1], edges[:-1]) / counts
+    # the "next bucket" of the last bucket is the final point itself
+    nxt_x = np.append(avg_x[1:], x[-1])
+    nxt_y = np.append(avg_y[1:], y[-1])
+
+    keep = np.empty(n_out, dtype=np.intp)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        ax, ay = x[a], y[a]
+        # twice the triangle area, up to sign
+        area = np.abs((ax - nxt_x[b]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (nxt_y[b] - ay))
+        a = lo + int(np.argmax(area))
+        keep[b + 1] = a
+    return x[keep], y[keep]
@@ -0,0 +1,205 @@
+import hashlib
+import json
+import logging
+import os
+import socketserver
+import threading
+from collections import deque
+
+from news import iter_stories, sanitize
+
+logger = logging.getLogger(__name__)
+
+# live news: stories arrive from a watched inbox directory (drop in .json or
+# .ndjson files, any layout news.py reads) or a localhost socket (one story
+# per line), are de-duplicated by title and numbered. every session reads the
+# same numbered stream and is sent only what it hasn't seen yet, at most
+# PUSH_LIMIT per frame, so a burst never turns into a burst of DOM work.
+
+KEEP = 1000            # recent stories held for sessions that fall behind
+DEDUPE = 1 << 20       # titles remembered for de-duplication
+PUSH_LIMIT = 20        # stories handed to a session per frame (newest win)
+INBOX_POLL = 0.25
+INBOX_SUFFIXES = (".json", ".ndjson")
+REJECTED = "rejected"  # inbox subdirectory files that can't be read are moved to
+
+
+def title_key(title):
+    # case- and whitespace-insensitive 64-bit title hash
+    return hashlib.blake2b(" ".join(title.lower().split()).encode("utf-8"), digest_size=8).digest()
+
+
+class NewsWire:
+    def __init__(self, keep=KEEP, dedupe=DEDUPE):
+        self.seq = 0
+        self._items = deque(maxlen=keep)   # (seq, story)
+        self._seen = set()
+        self._order = deque()
+        self._dedupe = dedupe
+        self._lock = threading.Lock()
+        self._taps = []
+        self.dupes = 0
+        self.rejected = 0
+
+    def put(self, story):
+        # True if the story was new
+        s = sanitize(story)
+        if s is None:
+            self.rejected += 1
+            return False
+        k = title_key(s["title"])
+        with self._lock:
+            if k in self._seen:
+                self.dupes += 1
+                return False
+            self._seen.add(k)
+            self._order.append(k)
+            if len(self._order) > self._dedupe:
+                self._seen.discard(self._order.popleft())
+            self.seq += 1
+            self._items.append((self.seq, s))
+            for tap in self._taps:
+                tap.append(s)
+        return True
+
+    def put_many(self, stories):
+        return sum(self.put(s) for s in stories)
+
+    def tap(self):
+        # a cursor that can't be overrun, for a consumer that must see every
+        # story (the search index): a deque holding the stories still kept,
+        # then every story put from now on. popleft() to consume, untap() when
+        # done so it stops growing
+        with self._lock:
+            lost = self.seq - len(self._items)
+            if lost:
+                logger.warning("wire tapped after %d stories had already rotated out", lost)
+            tap = deque(s for _, s in self._items)
+            self._taps.append(tap)
+            return tap
+
+    def untap(self, tap):
+        with self._lock:
+            self._taps = [t for t in self._taps if t is not tap]
+
+    def since(self, seq, limit=PUSH_LIMIT):
+        # {"seq", "stories" (oldest first), "skipped"} for a session that has
+        # seen up to `seq`, or None if nothing is new. a new session (seq None)
+        # gets the latest few
+        with self._lock:
+            if seq is not None and seq >= self.seq:
+                return None
+            out = []
+            for s, story in reversed(self._items):
+                if seq is not None and s <= seq:
+                    break
+                out.append(story)
+                if len(out) == limit:
+                    break
+            newer = self.seq - (seq if seq is not None else self.seq - len(self._items))
+            out.reverse()
+            return {"seq": self.seq, "stories": out, "skipped": max(0, newer - len(out))}
+
+
+class InboxWatcher:
+    # polls a directory for story files; each is ingested and then removed.
+    # writers should create files under a dot-name or with a .tmp suffix and
+    # rename them into place, so half-written files are never picked up. a
+    # file that can't be read at all is moved to rejected/ so the ones
+    # behind it keep flowing
+    def __init__(self, wire, path, interval=INBOX_POLL):
+        self.wire = wire
+        self.path = str(path)
+        self.interval = float(interval)
+        self._stop = threading.Event()
+        self._thread = None
+        os.makedirs(os.path.join(self.path, REJECTED), exist_ok=True)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="news-inbox", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("news inbox poll failed")
+
+    def poll(self):
+        # ingest every waiting file, oldest first; returns new story count
+        with os.scandir(self.path) as it:
+            files = [e for e in it if e.is_file() and not e.name.startswith(".")
+                     and e.name.endswith(INBOX_SUFFIXES)]
+        files.sort(key=lambda e: e.stat().st_mtime_ns)
+        added = 0
+        for e in files:
+            errors = []
+            try:
+                added += self.wire.put_many(iter_stories(e.path, errors))
+            except Exception:
+                logger.exception("news inbox %s: unreadable, moved to %s/", e.name, REJECTED)
+                self._reject(e)
+                continue
+            if errors:
+                logger.warning("news inbox %s: %d bad records, first: %s", e.name, len(errors), errors[:3])
+            os.unlink(e.path)
+        return added
+
+    def _reject(self, e):
+        try:
+            os.replace(e.path, os.path.join(self.path, REJECTED, e.name))
+        except OSError:
+            logger.exception("news inbox %s: can't move to %s/, removing it", e.name, REJECTED)
+            os.unlink(e.path)
+
+
+class _LineHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        wire = self.server.wire
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                wire.put(json.loads(line))
+            except ValueError:
+                wire.rejected += 1
+
+
+class _LineServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def serve_socket(wire, port, host="127.0.0.1"):
+    # NDJSON over TCP on localhost (a stand-in for a real news bus)
+    server = _LineServer((host, port), _LineHandler)
+    server.wire = wire
+    threading.Thread(target=server.serve_forever, name="news-socket", daemon=True).start()
+    return server
+
+
+_wires = {}
+_wires_lock = threading.Lock()
+
+
+def get_wire(inbox=None, port=None):
+    # process-wide wire per (inbox, port); sources are started on first use
+    key = (os.path.abspath(inbox) if inbox else None, int(port) if port else None)
+    with _wires_lock:
+        wire = _wires.get(key)
+        if wire is None:
+            wire = _wires[key] = NewsWire()
+            if key[0]:
+                InboxWatcher(wire, key[0]).start()
+            if key[1]:
+                try:
+                    serve_socket(wire, key[1])
+                except OSError:
+                    logger.exception("news socket on port %s unavailable", key[1])
+        return wire
@@ -0,0 +1,105 @@
+import json
+import re
+from pathlib import Path
+
+# SAM AI intents as data. intents.json is the single table for both sides:
+# render_bootstrap ships it to the client, which compiles it the same way
+# (IntentMatcher in frontend/market.js). intents are tried in table order
+# and the first that applies wins:
+#   keywords  literal substrings of the upper-cased message, all compiled into
+#             one Aho-Corasick automaton, so a message is one pass over its
+#             characters however many keywords there are
+#   pattern   a regex (the subset JS and Python agree on), all joined into one
+#             case-insensitive alternation; among patterns the leftmost wins
+#   action "ticker"  applies when the message names a known symbol
+# "action" names client behaviour beyond filling in "reply".
+
+INTENTS_PATH = Path(__file__).with_name("intents.json")
+NO_MATCH = -1
+
+
+def load_intents(path=INTENTS_PATH):
+    with open(path, encoding="utf-8") as fp:
+        table = json.load(fp)
+    for i, it in enumerate(table["intents"]):
+        if not (it.get("keywords") or it.get("pattern") or it.get("action") == "ticker"):
+            raise ValueError(f"intent {i} ({it.get('name')}) can never match")
+        if it.get("pattern"):
+            re.compile(it["pattern"])
+    return table
+
+
+class Automaton:
+    # Aho-Corasick over (word, value) pairs; best() is the smallest value of
+    # any word occurring in the text
+    def __init__(self, words):
+        self.next = [{}]
+        self.fail = [0]
+        self.out = [float("inf")]
+        for w, v in words:
+            s = 0
+            for ch in w:
+                n = self.next[s].get(ch)
+                if n is None:
+                    n = self.next[s][ch] = len(self.next)
+                    self.next.append({})
+                    self.fail.append(0)
+                    self.out.append(float("inf"))
+                s = n
+            self.out[s] = min(self.out[s], v)
+        queue = list(self.next[0].values())
+        for s in queue:
+            for ch, n in self.next[s].items():
+                f = self.fail[s]
+                while f and ch not in self.next[f]:
+                    f = self.fail[f]
+                g = self.next[f].get(ch, 0)
+                self.fail[n] = g if g != n else 0
+                self.out[n] = min(self.out[n], self.out[self.fail[n]])
+                queue.append(n)
+
+    def best(self, text):
+        nxt, fail, out = self.next, self.fail, self.out
+        s, best = 0, float("inf")
+        for ch in text:
+            while s and ch not in nxt[s]:
+                s = fail[s]
+            s = nxt[s].get(ch, 0)
+            if out[s] < best:
+                best = out[s]
+        return best
+
+
+class IntentMatcher:
+    def __init__(self, table):
+        self.table = table
+        self.intents = table["intents"]
+        self.keywords = Automaton((w.upper(), i) for i, it in enumerate(self.intents)
+                                  for w in it.get("keywords", ()))
+        self.patterns = [(i, re.compile(it["pattern"], re.I)) for i, it in enumerate(self.intents) if it.get("pattern")]
+        self.combined = re.compile("|".join(f"(?:{it['pattern']})" for it in self.intents if it.get("pattern")), re.I) \
+            if self.patterns else None
+        self.ticker = next((i for i, it in enumerate(self.intents) if it.get("action") == "ticker"), None)
+
+    def match(self, text, symbols=None):
+        # (intent index or NO_MATCH, pattern match or None, symbol slot or -1)
+        best = self.keywords.best(text.upper())
+        found = None
+        if self.combined is not None:
+            m = self.combined.search(text)
+            if m:
+                # which pattern matched: retry each at the match position
+                i, rx = next((i, rx) for i, rx in self.patterns if rx.match(text, m.start()))
+                if i < best:
+                    best, found = i, rx.match(text, m.start())
+        slot = -1
+        if self.ticker is not None and self.ticker < best and symbols is not None:
+            slot = symbols.find_in(text.upper())
+            if slot >= 0:
+                best, found = self.ticker, None
+        if best == float("inf"):
+            return NO_MATCH, None, -1
+        return best, found, slot
+
+
+INTENTS = load_intents()
@@ -0,0 +1,93 @@
+import numpy as np
+
+# server-side market model: every ticker follows a geometric brownian motion
+#   log S(t+dt) = log S(t) + (mu - sigma^2/2) dt + sigma sqrt(dt) Z
+# with sigma = vols * vol_scale (per sqrt second). all tickers advance as one
+# array operation and batches are cumulative sums, so there is no python loop
+# per step or per ticker. state lives in log space to keep long runs exact.
+
+# vol_scale puts the existing 0.2-2.0 "vols" on the same footing as the old
+# client-side walk (roughly 0.1% per sqrt second at vol 1.0)
+VOL_SCALE = 1e-3
+# cap a single batch at this many floats; longer runs are chunked
+CHUNK_FLOATS = 1 << 23
+
+
+class MarketSimulator:
+    def __init__(self, prices, vols, seed=7, dt=1.0, drift=0.0, vol_scale=VOL_SCALE, dtype=np.float64):
+        self.tickers_n = len(prices)
+        self.dt = float(dt)
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in (np.float32, np.float64):
+            raise ValueError("dtype must be float32 or float64")
+        self.rng = np.random.default_rng(seed)
+        self.vols = np.asarray(vols, dtype=np.float64)
+        self._log = np.log(np.maximum(np.asarray(prices, dtype=np.float64), 1e-8))
+        self.steps = 0
+        sigma = self.vols * vol_scale
+        # per-step drift and diffusion of the log price
+        self._mu = (drift - 0.5 * sigma ** 2) * self.dt
+        self._sig = sigma * np.sqrt(self.dt)
+        self._buf = None
+
+    @classmethod
+    def seeded(cls, tickers, seed=7, **kw):
+        # initial prices and vols drawn exactly the way main.py always has:
+        # uniform(4, 250) then uniform(0.2, 2.0), rounded to cents; the walk
+        # continues on the same generator
+        rng = np.random.default_rng(seed)
+        prices = np.round(rng.uniform(4, 250, len(tickers)), 2)
+        vols = np.round(rng.uniform(0.2, 2.0, len(tickers)), 2)
+        return cls(prices, vols, seed=rng, **kw)
+
+    @property
+    def prices(self):
+        return np.exp(self._log)
+
+    def step(self):
+        # one tick for every ticker
+        z = self.rng.standard_normal(self.tickers_n)
+        self._log += self._mu + self._sig * z
+        self.steps += 1
+        return self.prices
+
+    def simulate(self, n_steps, out=None):
+        # (n_steps, tickers) price path. draws come from the same stream as
+        # step(), so one batch of n equals n single steps
+        n_steps = int(n_steps)
+        if out is None:
+            out = np.empty((n_steps, self.tickers_n), dtype=self.dtype)
+        if n_steps == 0:
+            return out
+        self.rng.standard_normal(dtype=out.dtype, out=out)
+        out *= self._sig.astype(out.dtype)
+        out += self._mu.astype(out.dtype)
+        out[0] += self._log.astype(out.dtype)
+        np.cumsum(out, axis=0, out=out)
+        self._log = out[-1].astype(np.float64)
+        self.steps += n_steps
+        np.exp(out, out=out)
+        return out
+
+    def iter_paths(self, n_steps, chunk_steps=None):
+        # stream an arbitrarily long path in bounded memory; yields
+        # (chunk_steps, tickers) arrays that are reused between iterations
+        if chunk_steps is None:
+            chunk_steps = max(1, CHUNK_FLOATS // max(1, self.tickers_n))
+        chunk_steps = min(int(chunk_steps), int(n_steps))
+        if self._buf is None or self._buf.shape != (chunk_steps, self.tickers_n):
+            self._buf = np.empty((chunk_steps, self.tickers_n), dtype=self.dtype)
+        left = int(n_steps)
+        while left > 0:
+            m = min(chunk_steps, left)
+            yield self.simulate(m, out=self._buf[:m])
+            left -= m
+
+    def advance(self, n_steps):
+        # jump n steps without materialising the path: the sum of n gaussian
+        # increments is one gaussian, so this is exact in distribution and O(tickers)
+        n_steps = int(n_steps)
+        z = self.rng.standard_normal(self.tickers_n)
+        self._log += self._mu * n_steps + self._sig * np.sqrt(n_steps) * z
+        self.steps += n_steps
+        return self.prices
@@ -0,0 +1,546 @@
+import codecs
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import weakref
+from array import array
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+# news feed loading. a feed file is scanned once, incrementally, in fixed-size
+# chunks: each story is decoded, sanitized and remembered only as a byte range
+# in the file, so memory stays bounded however big the export is. the ui then
+# asks for pages, which are read back from those ranges on demand.
+#
+# accepted layouts:
+#   {"stories": [...] or {...}, "names": [...]}   the original format
+#   [{"title": ..., "body": ...}, ...]            a bare array of stories
+#   one story object per line                     NDJSON
+#
+# a watched feed (watch_feed) is loaded once per process and kept current by a
+# background thread; stories appended to an NDJSON feed are tail-read from
+# where the last scan stopped, anything else is reloaded.
+
+DEFAULT_STORIES = (
+    {"title": "Alex Coin completely valueless", "body": "DO NOT INVEST IN ALEX COIN"},
+    {"title": "Robo hedger toggles on", "body": "Latency improved to probably fine"},
+    {"title": "Balance sheet very green", "body": "Analysts upgrade outlook to moonish"},
+    {"title": "Checking flood of deposits", "body": "Customers embrace new high-yield fling"},
+    {"title": "ATM queues shrink overnight", "body": "Bank credits speed boosts to app"},
+    {"title": "Loan approvals go brrr", "body": "Underwriting says 'we like the vibes'"},
+)
+DEFAULT_NAMES = (
+    "Sam A", "Jamie Q", "Taylor Q", "Jordan K", "Avery P", "Riley M",
+    "Casey D", "Morgan L", "Drew T", "Cameron J", "Reese F", "Peyton S",
+    "Rowan H", "Skyler V", "Emerson N", "Quinn C", "Logan R", "Harper W",
+    "Sage K", "Blake Z", "Elliot Y", "Finley G", "Charlie P", "Dakota M",
+    "Jules E", "Alex B", "Corey L", "Shawn D", "Tatum F", "Hayden J",
+    "Micah T", "Kendall C", "Spencer H", "Arden V", "Bailey N", "Parker E",
+    "Devon S", "Cory R", "Blair G", "Sydney P", "Cameron M", "Lane K",
+    "Toby Q", "Ashton W", "Jordan T", "Marley V", "Quincy B", "Aiden Z",
+    "Rowan L", "Reagan Y", "Sasha N", "Kai G", "Ari P", "Harley J",
+    "Phoenix R", "Dylan C", "Morgan T", "Kieran E", "Avery L", "Jesse S",
+    "Taylor B", "Reese H", "Skylar M", "Cory D", "Casey N", "Toby R",
+    "Jamie P", "Spencer V", "Riley K", "Emery F", "Rowan J", "Aiden Q",
+    "Blake C", "Parker T", "Harper L", "Drew M", "Elliot R", "Quinn H",
+    "Jules N", "Sage P", "Taylor D", "Cameron W", "Morgan G", "Dakota L",
+    "Rowan Z", "Alex T", "Avery Q", "Skyler B", "Emerson V", "Jamie N",
+    "Casey K", "Jordan F", "Riley Y", "Taylor W", "Spencer G", "Blair D",
+    "Finley C", "Hayden P", "Rowan M", "Elliot S", "Ari J", "Reese H",
+)
+
+CHUNK = 1 << 16
+MAX_RECORD = 1 << 24   # a single story bigger than this is treated as malformed
+MAX_ERRORS = 100       # errors kept for reporting; the count keeps going
+PAGE_SIZE = 20
+POLL_SECONDS = 1.0   # how often a watched feed file is checked
+
+FeedError = namedtuple("FeedError", "record message")
+WS = re.compile(r"[ \t\r\n]*")
+# bytes that aren't UTF-8 decode to lone surrogates (surrogateescape), so byte
+# offsets still line up; a record containing one is reported and skipped
+NOT_UTF8 = re.compile("[\udc80-\udcff]")
+
+
+class FeedFormatError(ValueError):
+    pass
+
+
+def sanitize(s):
+    # minimal cleanup of one story; None when there is nothing to show
+    if not isinstance(s, dict):
+        return None
+    t = str(s.get("title", "")).strip()
+    b = str(s.get("body", "")).strip()
+    if not (t or b):
+        return None
+    return {"title": t or "Untitled", "body": b}
+
+
+class _Scanner:
+    # incremental JSON reader over a binary file: decodes chunks as they are
+    # needed, drops consumed text, and can report the byte offset of any
+    # position it has reached (used to remember where each story lives)
+    def __init__(self, fp, digest, offset=0, follow=False):
+        self.fp = fp
+        self.follow = follow     # stop before an unterminated last line
+        self.digest = digest
+        self.dec = codecs.getincrementaldecoder("utf-8")("surrogateescape")
+        self.json = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.dirty = False       # some input wasn't UTF-8
+        self.bad = False         # ... and the last value or line read has it
+        self.base = 0            # byte offset of buf[0]
+        self._mark = (0, 0)      # (index in buf, byte offset) last resolved
+        if offset:
+            # resuming mid-file (fp already positioned there)
+            self.base = offset
+            self._mark = (0, offset)
+            return
+        head = fp.read(3)
+        if head == codecs.BOM_UTF8:
+            self.base = 3
+            self._mark = (0, 3)
+            self.digest.update(head)
+        else:
+            self._feed(head)
+
+    def _feed(self, data):
+        self.digest.update(data)
+        text = self.dec.decode(data, final=not data)
+        if not self.dirty and NOT_UTF8.search(text):
+            self.dirty = True
+        self.buf += text
+
+    def fill(self, compact=True):
+        if compact and self.pos:
+            self.base = self.byte_at(self.pos)
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+            self._mark = (0, self.base)
+        data = self.fp.read(CHUNK)
+        if not data:
+            self.eof = True
+        self._feed(data)
+
+    def byte_at(self, i):
+        ci, bo = self._mark
+        bo += len(self.buf[ci:i].encode("utf-8", "surrogateescape"))
+        self._mark = (i, bo)
+        return bo
+
+    def peek(self, compact=True):
+        # next non-whitespace character ("" at end of input)
+        while True:
+            self.pos = WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos:self.pos + 1]
+            self.fill(compact)
+
+    def expect(self, ch):
+        if self.peek() != ch:
+            raise FeedFormatError(f"expected {ch!r} at byte {self.byte_at(self.pos)}")
+        self.pos += 1
+
+    def value(self):
+        # next JSON value and its (start, end) byte offsets
+        self.peek()
+        while True:
+            try:
+                obj, end = self.json.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                if self.eof or len(self.buf) - self.pos > MAX_RECORD:
+                    raise FeedFormatError(f"bad JSON near byte {self.byte_at(self.pos)}: {e.msg}") from None
+                self.fill()
+                continue
+            self.bad = self.dirty and NOT_UTF8.search(self.buf, self.pos, end) is not None
+            start = self.byte_at(self.pos)
+            self.pos = end
+            return obj, start, self.byte_at(end)
+
+    def line(self):
+        # next non-empty NDJSON line as (text, start, end), None at end of input
+        while True:
+            if self.peek() == "":
+                return None
+            nl = self.buf.find("\n", self.pos)
+            if nl == -1 and self.eof and self.follow:
+                # possibly still being written; the next scan picks it up
+                return None
+            if nl == -1 and not self.eof:
+                if len(self.buf) - self.pos > MAX_RECORD:
+                    raise FeedFormatError(f"line too long at byte {self.byte_at(self.pos)}")
+                self.fill()
+                continue
+            end = len(self.buf) if nl == -1 else nl
+            text, start = self.buf[self.pos:end], self.byte_at(self.pos)
+            self.bad = self.dirty and NOT_UTF8.search(text) is not None
+            self.pos = end
+            return text, start, self.byte_at(end)
+
+    def first_line(self):
+        # the first line of input as a JSON value, without consuming anything;
+        # None if it isn't one on its own (a pretty-printed document) or is huge
+        while True:
+            nl = self.buf.find("\n", self.pos)
+            if nl != -1 or self.eof:
+                try:
+                    return json.loads(self.buf[self.pos:None if nl == -1 else nl])
+                except json.JSONDecodeError:
+                    return None
+            if len(self.buf) - self.pos > MAX_RECORD:
+                return None
+            self.fill(compact=False)
+
+
+class _Scan:
+    # one pass over a feed file: yields (story, start, end) and collects the
+    # names list and per-record errors along the way
+    def __init__(self, fp, offset=0, follow=False, records=0):
+        self.digest = hashlib.sha256()
+        self.sc = _Scanner(fp, self.digest, offset, follow)
+        self.offset = offset
+        self.ndjson = False
+        self.resume = None       # where a later NDJSON scan should start
+        self.names = None
+        self.errors = []
+        self.error_count = 0
+        self.records = records
+
+    def error(self, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(FeedError(self.records, message))
+
+    def _record(self, obj, start, end):
+        self.records += 1
+        if self.sc.bad:
+            self.error("not valid UTF-8")
+            return None
+        story = sanitize(obj)
+        if story is None:
+            self.error("not a story object" if not isinstance(obj, dict) else "empty title and body")
+            return None
+        return story, start, end
+
+    def __iter__(self):
+        sc = self.sc
+        c = sc.peek()
+        try:
+            if self.offset:
+                yield from self._ndjson()
+            elif c == "[":
+                yield from self._array()
+            elif c == "{" and not self._is_story(sc.first_line()):
+                yield from self._object()
+            elif c:
+                yield from self._ndjson()
+        except FeedFormatError as e:
+            # can't resynchronise inside a JSON document; keep what we have
+            self.records += 1
+            self.error(str(e))
+
+    @staticmethod
+    def _is_story(obj):
+        # NDJSON if the first line is a story on its own, otherwise a document
+        return isinstance(obj, dict) and ("title" in obj or "body" in obj)
+
+    def _array(self):
+        sc = self.sc
+        sc.expect("[")
+        if sc.peek() == "]":
+            return
+        while True:
+            rec = self._record(*sc.value())
+            if rec:
+                yield rec
+            c = sc.peek()
+            sc.pos += 1
+            if c == "]":
+                return
+            if c != ",":
+                raise FeedFormatError(f"expected ',' or ']' at byte {sc.byte_at(sc.pos - 1)}")
+
+    def _members(self):
+        # key/value pairs of the object at the cursor, values left unread
+        sc = self.sc
+        sc.expect("{")
+        if sc.peek() == "}":
+            sc.pos += 1
+            return
+        while True:
+            key = sc.value()[0]
+            sc.expect(":")
+            yield key
+            c = sc.peek()
+            sc.pos += 1
+            if c == "}":
+                return
+            if c != ",":
+                raise FeedFormatError(f"expected ',' or '}}' at byte {sc.byte_at(sc.pos - 1)}")
+
+    def _object(self):
+        sc = self.sc
+        for key in self._members():
+            if key == "stories" and sc.peek() == "[":
+                yield from self._array()
+            elif key == "stories" and sc.peek() == "{":
+                # dict of stories: the values are the stories
+                for _ in self._members():
+                    rec = self._record(*sc.value())
+                    if rec:
+                        yield rec
+            elif key == "names":
+                names = sc.value()[0]
+                if isinstance(names, list) and names:
+                    self.names = [str(n) for n in names]
+                else:
+                    self.error("names is not a non-empty list")
+            else:
+                sc.value()
+
+    def _ndjson(self):
+        sc = self.sc
+        self.ndjson = True
+        while True:
+            line = sc.line()
+            if line is None:
+                self.resume = sc.byte_at(sc.pos)
+                return
+            text, start, end = line
+            try:
+                obj = json.loads(text)
+            except json.JSONDecodeError as e:
+                self.records += 1
+                self.error(f"bad JSON: {e.msg}")
+                continue
+            rec = self._record(obj, start, end)
+            if rec:
+                yield rec
+
+
+def _open(source):
+    # (binary file object, should close); accepts a path or a seekable binary file
+    if hasattr(source, "read"):
+        source.seek(0)
+        return source, False
+    return open(source, "rb"), True
+
+
+def iter_stories(source, errors=None):
+    # lazily yield sanitized {title, body} records from a feed file; bad
+    # records are appended to `errors` (if given) and skipped
+    fp, close = _open(source)
+    try:
+        scan = _Scan(fp)
+        for story, _, _ in scan:
+            yield story
+        if errors is not None:
+            errors.extend(scan.errors)
+    finally:
+        if close:
+            fp.close()
+
+
+class NewsFeed:
+    # stories either held in memory (the demo feed) or as byte ranges into a
+    # feed file, read back a page at a time. a feed loaded from a path keeps
+    # that file open, so once the path is replaced it still reads the bytes it
+    # scanned rather than whatever now lives at the path
+    def __init__(self, stories=None, names=None, source=None, spans=None,
+                 errors=(), error_count=0, digest="", records=0, tail=None, own=False):
+        self._stories = list(stories) if stories is not None else None
+        self._source = source
+        self._own = own
+        self._lock = threading.Lock()
+        self._spans = spans if spans is not None else array("q")
+        self._head = None
+        self.names = list(names) if names else list(DEFAULT_NAMES)
+        self.errors = list(errors)
+        self.error_count = error_count
+        self.digest = digest
+        self.records = records
+        # byte offset an NDJSON feed can be followed from; None for documents
+        self.tail = tail
+        if own:
+            weakref.finalize(self, source.close)
+
+    def __len__(self):
+        if self._stories is not None:
+            return len(self._stories)
+        return len(self._spans) // 2
+
+    def pages(self, size=PAGE_SIZE):
+        return max(1, -(-len(self) // size))
+
+    def _read(self, a, b):
+        if self._own and hasattr(os, "pread"):
+            return os.pread(self._source.fileno(), b - a, a)
+        with self._lock:
+            self._source.seek(a)
+            return self._source.read(b - a)
+
+    def stories(self, start, stop):
+        start, stop = max(0, start), min(stop, len(self))
+        if self._stories is not None:
+            return self._stories[start:stop]
+        # spans only cover records that sanitized cleanly at load time
+        return [sanitize(json.loads(self._read(self._spans[2 * k], self._spans[2 * k + 1]).decode("utf-8")))
+                for k in range(start, stop)]
+
+    def page(self, k, size=PAGE_SIZE):
+        if k == 0 and size == PAGE_SIZE:
+            # the first page goes into every bootstrap; read it once
+            if self._head is None:
+                self._head = self.stories(0, size)
+            return self._head
+        return self.stories(k * size, (k + 1) * size)
+
+    def follow(self):
+        # tail-read stories appended to an NDJSON feed since the last scan;
+        # returns how many were added
+        if self.tail is None:
+            raise ValueError("only an NDJSON feed file can be followed")
+        spans = array("q")
+        with self._lock:
+            self._source.seek(self.tail)
+            scan = _Scan(self._source, offset=self.tail, follow=True, records=self.records)
+            for _, start, end in scan:
+                spans.append(start)
+                spans.append(end)
+        self._spans.extend(spans)
+        if len(self) - len(spans) // 2 < PAGE_SIZE:
+            self._head = None
+        if spans:
+            # chain the appended bytes onto the digest, so anything keyed on
+            # it (the bootstrap render cache) sees the new stories
+            self.digest = hashlib.sha256((self.digest + scan.digest.hexdigest()).encode("ascii")).hexdigest()
+        self.records = scan.records
+        self.error_count += scan.error_count
+        self.errors.extend(scan.errors[:MAX_ERRORS - len(self.errors)])
+        if scan.resume is not None:
+            self.tail = scan.resume
+        return len(spans) // 2
+
+
+_DEFAULT_DIGEST = hashlib.sha256(json.dumps([DEFAULT_STORIES, DEFAULT_NAMES]).encode("utf-8")).hexdigest()
+
+
+@functools.lru_cache(maxsize=1)
+def default_feed():
+    return NewsFeed(DEFAULT_STORIES, DEFAULT_NAMES, digest=_DEFAULT_DIGEST)
+
+
+def _fallback(errors, error_count):
+    # demo content, but carrying the reasons the real feed couldn't be used
+    return NewsFeed(DEFAULT_STORIES, DEFAULT_NAMES, errors=errors, error_count=error_count,
+                    digest=_DEFAULT_DIGEST)
+
+
+def load_feed(source=None, follow=False):
+    # scan a feed file once, keeping only story byte ranges; a missing file or
+    # one without a single usable story falls back to the demo feed, with the
+    # problems reported on the returned feed's errors. with follow=True an
+    # unterminated last NDJSON line is left for a later follow()
+    if source is None:
+        return default_feed()
+    spans = array("q")
+    try:
+        fp, close = _open(source)
+    except OSError as e:
+        return _fallback([FeedError(0, str(e))], 1)
+    try:
+        scan = _Scan(fp, follow=follow)
+        for _, start, end in scan:
+            spans.append(start)
+            spans.append(end)
+        while True:
+            data = fp.read(CHUNK)
+            if not data:
+                break
+            scan.digest.update(data)
+    except BaseException:
+        if close:
+            fp.close()
+        raise
+    if scan.error_count:
+        logger.warning("news feed %s: %d bad records, first: %s", source, scan.error_count, scan.errors[:3])
+    if not spans:
+        if close:
+            fp.close()
+        return _fallback(scan.errors or [FeedError(0, "no stories")], max(scan.error_count, 1))
+    # a file opened from a path stays open with the feed (see NewsFeed)
+    tail = scan.resume if scan.ndjson and close else None
+    return NewsFeed(names=scan.names, source=fp, spans=spans, errors=scan.errors,
+                    error_count=scan.error_count, digest=scan.digest.hexdigest(),
+                    records=scan.records, tail=tail, own=close)
+
+
+class FeedWatcher:
+    # keeps one feed file's NewsFeed current: polls (inode, mtime, size) and
+    # tail-reads an NDJSON feed that only grew, reloading anything else. readers
+    # just take .feed, so a rerun with an unchanged file costs an attribute read
+    def __init__(self, path, interval=POLL_SECONDS):
+        self.path = str(path)
+        self.interval = float(interval)
+        self.feed = None
+        self._key = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.refresh()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="news-watch", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("news feed refresh failed")
+
+    def refresh(self):
+        # True if the feed changed
+        try:
+            st = os.stat(self.path)
+            key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except OSError:
+            key = None
+        if self.feed is not None and key == self._key:
+            return False
+        prev, feed = self._key, self.feed
+        if (feed is not None and feed.tail is not None and key and prev
+                and key[0] == prev[0] and key[2] > prev[2]):
+            n = feed.follow()
+            logger.debug("news feed %s: %d appended stories", self.path, n)
+        else:
+            self.feed = load_feed(self.path, follow=True)
+        self._key = key
+        return True
+
+
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+def watch_feed(path, interval=POLL_SECONDS):
+    # process-wide watcher per feed file; started on first use
+    key = os.path.abspath(path)
+    with _watchers_lock:
+        w = _watchers.get(key)
+        if w is None:
+            w = _watchers[key] = FeedWatcher(key, interval).start()
+        return w
@@ -0,0 +1,129 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from tape import order_block
+
+# synthetic order flow, generated in vectorized batches. a batch is a window
+# of time: the number of orders in it is poisson (rate * seconds) and their
+# arrival times uniform within it, which is exactly a poisson arrival process
+# cut into windows. per order:
+#   sym     drawn by popularity: zipf weights over a seeded ranking of tickers
+#   side    buy with probability BUY
+#   qty     lognormal around SIZE_MEDIAN shares
+#   px      the ticker's price at the window start, perturbed lognormally by
+#           SPREAD and rounded to cents, so orders sit around the market and
+#           some cross it
+#   trader  uniform over 2^16 ids (the terminal maps them onto trader names)
+# batches are tape.RECORD arrays, the format the feed, wire and tape share.
+#
+# every window draws from its own child of one SeedSequence, so a window's
+# orders depend only on the seed and its position: the same flow comes out
+# of stream() and of fan_out() across worker processes.
+
+RATE = 1.0             # orders per second
+POPULARITY = 1.1       # zipf exponent of ticker popularity
+SIZE_MEDIAN = 250
+SIZE_SIGMA = 1.0
+SPREAD = 0.002
+BUY = 0.5
+BATCH = 1 << 16        # orders per window when streaming, on average
+TRADERS = 1 << 16
+
+
+def popularity(n, seed=None, exponent=POPULARITY):
+    # cumulative popularity weights, tickers ranked by a seeded permutation
+    w = np.empty(n)
+    w[np.random.default_rng(seed).permutation(n)] = 1.0 / np.arange(1, n + 1) ** exponent
+    cdf = np.cumsum(w)
+    return cdf / cdf[-1]
+
+
+def make_orders(spec, seed, t0, seconds, prices):
+    # one window of orders: spec is (rate, cdf, size median, size sigma,
+    # spread, buy probability), seed a SeedSequence or int
+    rate, cdf, median, sigma, spread, buy = spec
+    rng = np.random.default_rng(seed)
+    k = rng.poisson(rate * seconds)
+    orders = order_block(k)
+    orders["t"] = np.sort(t0 + seconds * rng.random(k))
+    sym = np.minimum(np.searchsorted(cdf, rng.random(k), side="right"), len(cdf) - 1)
+    orders["sym"] = sym
+    orders["side"] = rng.random(k) < buy
+    orders["qty"] = np.maximum(np.round(rng.lognormal(np.log(median), sigma, k)), 1)
+    orders["px"] = np.round(np.asarray(prices, dtype=np.float64)[sym] * np.exp(spread * rng.standard_normal(k)), 2)
+    orders["trader"] = rng.integers(0, TRADERS, k)
+    return orders
+
+
+class OrderFlow:
+    # orders priced off a MarketSimulator. iterating (or stream()) advances
+    # the simulator with the flow's clock; window() prices against whatever
+    # prices it is given and leaves the simulator alone
+    def __init__(self, sim, rate=RATE, seed=None, exponent=POPULARITY, size_median=SIZE_MEDIAN,
+                 size_sigma=SIZE_SIGMA, spread=SPREAD, buy=BUY):
+        self.sim = sim
+        self.n_tickers = sim.tickers_n
+        self.rate = float(rate)
+        self._seeds = np.random.SeedSequence(seed)
+        self.spec = (self.rate, popularity(self.n_tickers, self._seeds.spawn(1)[0], exponent),
+                     float(size_median), float(size_sigma), float(spread), float(buy))
+
+    def window(self, t0, seconds, prices):
+        # the orders arriving in [t0, t0 + seconds) around `prices`
+        return make_orders(self.spec, self._seeds.spawn(1)[0], t0, seconds, prices)
+
+    def _windows(self, t0, seconds, window):
+        # (seed, start, length, prices) per window, the simulator advanced to
+        # each window's start; this is the only sequential part
+        sim = self.sim
+        window = window or BATCH / self.rate
+        dt = sim.dt
+        clock, t = 0.0, 0.0
+        while seconds is None or t < seconds:
+            length = window if seconds is None else min(window, seconds - t)
+            steps = int((t - clock) // dt)
+            if steps:
+                sim.advance(steps)
+                clock += steps * dt
+            yield self._seeds.spawn(1)[0], t0 + t, length, sim.prices
+            t += length
+
+    def stream(self, t0=0.0, seconds=None, window=None):
+        # batches of orders, window after window (endless unless `seconds` of
+        # flow is asked for)
+        for seed, start, length, prices in self._windows(t0, seconds, window):
+            yield make_orders(self.spec, seed, start, length, prices)
+
+    def __iter__(self):
+        return self.stream()
+
+    def run(self, sink, seconds, t0=0.0, window=None):
+        # feed `seconds` of flow to sink(batch); returns the order count
+        count = 0
+        for batch in self.stream(t0, seconds, window):
+            sink(batch)
+            count += len(batch)
+        return count
+
+    def fan_out(self, sink, seconds, t0=0.0, window=None, workers=None):
+        # run() with the windows generated across a process pool; the sink
+        # still sees them in order, in this process. identical output to run()
+        workers = workers or os.cpu_count() or 1
+        count = 0
+        with ProcessPoolExecutor(workers) as pool:
+            pending = deque()
+            for seed, start, length, prices in self._windows(t0, seconds, window):
+                pending.append(pool.submit(make_orders, self.spec, seed, start, length, prices))
+                # keep every worker busy without queueing the whole run
+                if len(pending) >= 2 * workers:
+                    batch = pending.popleft().result()
+                    sink(batch)
+                    count += len(batch)
+            while pending:
+                batch = pending.popleft().result()
+                sink(batch)
+                count += len(batch)
+        return count
@@ -0,0 +1,258 @@
+import logging
+import math
+import re
+import threading
+import time
+from array import array
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# full-text search over news stories for SAM AI. the index is a list of
+# immutable segments, each a sorted (term, doc) posting list in numpy arrays;
+# adding stories builds one small segment and merges neighbours of similar
+# size (so there are O(log n) segments and each posting is rewritten O(log n)
+# times). queries are scored with BM25 over every segment's postings at once.
+
+TOKEN = re.compile(r"[a-z0-9]+")
+K1 = 1.2
+B = 0.75
+TITLE_BOOST = 2        # title words count this many times
+TOP_K = 5
+INDEX_BATCH = 5000     # stories indexed per step when catching up with a feed
+LIVE_KEEP = 100_000    # live stories kept retrievable
+
+
+def tokenize(text):
+    return TOKEN.findall(text.lower())
+
+
+class _Segment:
+    __slots__ = ("terms", "indptr", "docs", "tf")
+
+    def __init__(self, t, d, tf):
+        # t, d, tf: postings sorted by (term, doc)
+        self.terms, starts = np.unique(t, return_index=True)
+        self.indptr = np.append(starts, len(t))
+        self.docs = d
+        self.tf = tf
+
+    def __len__(self):
+        return len(self.docs)
+
+    def postings(self, term):
+        i = np.searchsorted(self.terms, term)
+        if i == len(self.terms) or self.terms[i] != term:
+            return None
+        a, b = self.indptr[i], self.indptr[i + 1]
+        return self.docs[a:b], self.tf[a:b]
+
+    def triples(self):
+        return np.repeat(self.terms, np.diff(self.indptr)), self.docs, self.tf
+
+
+def _merge(a, b):
+    # b's docs all follow a's, so a stable sort by term keeps docs ordered
+    ta, da, fa = a.triples()
+    tb, db, fb = b.triples()
+    t = np.concatenate((ta, tb))
+    order = np.argsort(t, kind="stable")
+    return _Segment(t[order], np.concatenate((da, db))[order], np.concatenate((fa, fb))[order])
+
+
+class StoryIndex:
+    # BM25 over {title, body} stories; doc ids are assigned in add() order
+    def __init__(self):
+        self.vocab = {}
+        self.df = np.zeros(1024, dtype=np.int64)
+        self.dl = np.zeros(1024, dtype=np.float32)
+        self.n = 0
+        self.total_len = 0
+        self.segments = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.n
+
+    def add(self, stories):
+        # index a batch; returns the first doc id it was given. one writer at
+        # a time; queries may run concurrently
+        vocab = self.vocab
+        t_ids, d_ids, lens = [], [], []
+        base = self.n
+        for k, s in enumerate(stories):
+            toks = tokenize(s["title"]) * TITLE_BOOST + tokenize(s["body"])
+            t_ids.extend([vocab.setdefault(w, len(vocab)) for w in toks])
+            d_ids.extend([base + k] * len(toks))
+            lens.append(len(toks))
+        m = len(lens)
+        if not m:
+            return base
+        key = (np.asarray(t_ids, dtype=np.int64) << 32) | np.asarray(d_ids, dtype=np.int64)
+        uniq, counts = np.unique(key, return_counts=True)
+        t = (uniq >> 32).astype(np.int32)
+        seg = _Segment(t, (uniq & 0xFFFFFFFF).astype(np.int32), counts.astype(np.float32))
+        # df is copied (readers may hold the old one); dl only ever grows past n
+        df = np.zeros(max(len(vocab), len(self.df)), dtype=np.int64)
+        df[:len(self.df)] = self.df
+        df[seg.terms] += np.diff(seg.indptr)
+        dl = self.dl if base + m <= len(self.dl) else np.resize(self.dl, max(base + m, 2 * len(self.dl)))
+        dl[base:base + m] = lens
+        segments = self.segments + [seg]
+        while len(segments) > 1 and len(segments[-2]) <= 2 * len(segments[-1]):
+            segments[-2:] = [_merge(segments[-2], segments[-1])]
+        with self._lock:
+            self.df, self.dl, self.segments = df, dl, segments
+            self.total_len += sum(lens)
+            self.n = base + m
+        return base
+
+    def search(self, query, k=TOP_K):
+        # (doc ids, scores) of the best k matches, best first, plus the number
+        # of docs matching any query term
+        with self._lock:
+            segments, df, dl, n, total = self.segments, self.df, self.dl, self.n, self.total_len
+        # add() assigns term ids before it publishes their df; a term newer
+        # than this snapshot is one no snapshot doc contains
+        terms = {self.vocab.get(w) for w in tokenize(query)} - {None}
+        terms = {t for t in terms if t < len(df)}
+        empty = np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32), 0
+        if not terms or not n:
+            return empty
+        avgdl = total / n
+        docs, weights = [], []
+        for term in terms:
+            f = df[term]
+            if not f:
+                continue
+            idf = math.log(1.0 + (n - f + 0.5) / (f + 0.5))
+            for seg in segments:
+                p = seg.postings(term)
+                if p is None:
+                    continue
+                d, tf = p
+                norm = K1 * (1.0 - B + B * dl[d] / avgdl)
+                docs.append(d)
+                weights.append(idf * tf * (K1 + 1.0) / (tf + norm))
+        if not docs:
+            return empty
+        scores = np.bincount(np.concatenate(docs), np.concatenate(weights))
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        top = top[scores[top] > 0]
+        return top.astype(np.int32), scores[top].astype(np.float32), int(np.count_nonzero(scores))
+
+
+class _Corpus:
+    # one generation of the index plus what its doc ids point at; replaced
+    # whole when the feed is reloaded so queries never mix generations
+    def __init__(self, feed, live=()):
+        self.index = StoryIndex()
+        self.feed = feed
+        self.origin = array("q")     # doc -> feed index (>= 0) or -1 - live index
+        self.fed = 0
+        self.live = []
+        self.live_base = 0
+        self.add_live(list(live))
+
+    def add_live(self, stories):
+        if not stories:
+            return
+        start = self.live_base + len(self.live)
+        self.live.extend(stories)
+        self.origin.extend(-1 - (start + i) for i in range(len(stories)))
+        self.index.add(stories)
+        drop = len(self.live) - LIVE_KEEP
+        if drop > 0:
+            del self.live[:drop]
+            self.live_base += drop
+
+    def story(self, doc):
+        o = self.origin[doc]
+        if o >= 0:
+            return self.feed.stories(o, o + 1)[0]
+        i = -1 - o - self.live_base
+        return self.live[i] if 0 <= i < len(self.live) else None
+
+
+class NewsSearch:
+    # keeps a StoryIndex current with the loaded feed and the live wire from a
+    # background thread, and maps doc ids back to stories. feed stories are
+    # read back from the feed (they may live on disk), live ones are kept here
+    def __init__(self, wire, interval=1.0):
+        self.wire = wire
+        self.interval = float(interval)
+        self.corpus = _Corpus(None)
+        self._want = None
+        self._tap = wire.tap()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def track(self, feed):
+        # the feed to index; cheap, called on every rerun
+        self._want = feed
+        return self
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="news-search", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.wire.untap(self._tap)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                busy = self.refresh()
+            except Exception:
+                logger.exception("news index refresh failed")
+                busy = False
+            if not busy:
+                self._stop.wait(self.interval)
+
+    def refresh(self):
+        # index one batch of whatever is new; True if there may be more.
+        # only the search thread calls this. the wire is drained on every
+        # pass, so a live burst is indexed even while a feed backlog still is
+        c = self.corpus
+        if self._want is not None and self._want is not c.feed:
+            # a reloaded feed: start over, keeping the live stories we had
+            c = _Corpus(self._want, c.live)
+        tap = self._tap
+        fresh = [tap.popleft() for _ in range(min(len(tap), INDEX_BATCH))]
+        c.add_live(fresh)
+        feed = c.feed
+        if feed is not None and c.fed < len(feed):
+            stop = min(len(feed), c.fed + INDEX_BATCH)
+            c.origin.extend(range(c.fed, stop))
+            c.index.add(feed.stories(c.fed, stop))
+            c.fed = stop
+        self.corpus = c
+        return bool(tap) or (feed is not None and c.fed < len(feed))
+
+    def query(self, text, k=TOP_K):
+        # {"hits": [story], "total": matching docs, "indexed": docs, "ms": search time}
+        c = self.corpus
+        t = time.perf_counter()
+        docs, _, total = c.index.search(text, k)
+        ms = (time.perf_counter() - t) * 1e3
+        hits = [s for s in (c.story(int(d)) for d in docs) if s is not None]
+        return {"hits": hits, "total": int(total), "indexed": len(c.index), "ms": round(ms, 3)}
+
+
+_searches = {}
+_searches_lock = threading.Lock()
+
+
+def get_search(wire):
+    # process-wide search per news wire; started on first use
+    with _searches_lock:
+        s = _searches.get(id(wire))
+        if s is None:
+            s = _searches[id(wire)] = NewsSearch(wire).start()
+        return s
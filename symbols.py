@@ -0,0 +1,29 @@
+import re
+
+# symbol -> slot registry, the python twin of SymbolRegistry in
+# frontend/market.js. built once per ticker list; lookups are a dict probe
+# and finding a ticker mention in text is one pass over the text's tokens.
+TOKEN = re.compile(r"[A-Z0-9]+")
+
+
+class SymbolRegistry:
+    def __init__(self, symbols):
+        self.symbols = list(symbols)
+        self.slots = {s.upper(): i for i, s in enumerate(self.symbols)}
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, sym):
+        return isinstance(sym, str) and sym.upper() in self.slots
+
+    def slot(self, sym, default=-1):
+        return self.slots.get(str(sym).upper(), default)
+
+    def find_in(self, text):
+        # slot of the first ticker mentioned in text, or -1
+        for tok in TOKEN.findall(str(text).upper()):
+            i = self.slots.get(tok)
+            if i is not None:
+                return i
+        return -1
@@ -0,0 +1,182 @@
+import bisect
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+
+# append-only binary log of the market stream, for deterministic replay (see
+# ReplayFeed in broadcast.py). the file is a 32-byte header followed by
+# fixed-width 32-byte records, little-endian:
+#
+#   header  8s magic, u32 version, u32 record size, u32 tickers, 12 bytes reserved
+#   record  f8 t (epoch s), f8 px, u32 seq, u32 sym, u32 qty, u16 trader,
+#           u8 kind, u8 side
+#
+# every feed tick is written as one block: a TICK record per ticker in ticker
+# order (px = the published price, qty = the tick's volume) followed by that
+# tick's ORDER records. records of a block share seq and t, and t never goes
+# backwards, so any position found by time is on a block boundary.
+#
+# readers map the file (numpy memmap) and work on slices of it, so a tape of
+# any length is read through the page cache without being loaded.
+
+MAGIC = b"SAMTAPE\0"
+VERSION = 1
+HEADER = struct.Struct("<8sIII12x")
+RECORD = np.dtype([("t", "<f8"), ("px", "<f8"), ("seq", "<u4"), ("sym", "<u4"), ("qty", "<u4"),
+                   ("trader", "<u2"), ("kind", "u1"), ("side", "u1")])
+TICK = 0
+ORDER = 1
+# records per replay chunk
+CHUNK = 1 << 16
+
+
+class TapeError(ValueError):
+    pass
+
+
+def _read_header(fp, path):
+    head = fp.read(HEADER.size)
+    if len(head) < HEADER.size:
+        raise TapeError(f"{path}: truncated tape header")
+    magic, version, size, n = HEADER.unpack(head)
+    if magic != MAGIC or version != VERSION or size != RECORD.itemsize:
+        raise TapeError(f"{path}: not a version {VERSION} tape")
+    return n
+
+
+def order_block(n):
+    # an empty block of n order records for the caller to fill in
+    rec = np.zeros(n, dtype=RECORD)
+    rec["kind"] = ORDER
+    return rec
+
+
+class TapeWriter:
+    def __init__(self, path, n_tickers):
+        self.path = Path(path)
+        self.n_tickers = int(n_tickers)
+        self._last_t = 0.0
+        if self.path.exists() and self.path.stat().st_size:
+            with open(self.path, "rb") as fp:
+                n = _read_header(fp, self.path)
+            if n != self.n_tickers:
+                raise TapeError(f"{self.path}: tape has {n} tickers, feed has {self.n_tickers}")
+            # a crash mid-write can leave a torn record; drop it so appended
+            # records stay aligned
+            size = self.path.stat().st_size
+            whole = HEADER.size + (size - HEADER.size) // RECORD.itemsize * RECORD.itemsize
+            if whole != size:
+                os.truncate(self.path, whole)
+            if whole > HEADER.size:
+                self._last_t = float(np.memmap(self.path, dtype=RECORD, mode="r", offset=whole - RECORD.itemsize,
+                                               shape=(1,))["t"][0])
+            self._fp = open(self.path, "ab")
+        else:
+            self._fp = open(self.path, "wb")
+            self._fp.write(HEADER.pack(MAGIC, VERSION, RECORD.itemsize, self.n_tickers))
+        self._ticks = np.zeros(self.n_tickers, dtype=RECORD)
+        self._ticks["kind"] = TICK
+        self._ticks["sym"] = np.arange(self.n_tickers)
+
+    def write_tick(self, seq, t, prices, volumes, orders=None):
+        # one feed tick: every ticker's price and volume, then its orders
+        t = max(float(t), self._last_t)
+        self._last_t = t
+        ticks = self._ticks
+        ticks["t"] = t
+        ticks["seq"] = seq
+        ticks["px"] = prices
+        ticks["qty"] = volumes
+        block = ticks
+        if orders is not None and len(orders):
+            block = np.concatenate((ticks, orders))
+            block["t"] = t
+            block["seq"] = seq
+        # the block goes out as one write, so a reader mapping the file
+        # mid-recording sees whole ticks
+        self._fp.write(block.tobytes())
+        self._fp.flush()
+
+    def close(self):
+        self._fp.close()
+
+
+class TapeReader:
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as fp:
+            self.n_tickers = _read_header(fp, self.path)
+        self.records = None
+        self.refresh()
+        if not len(self):
+            raise TapeError(f"{self.path}: empty tape")
+
+    def refresh(self):
+        # remap after the file grew (a tape still being recorded); only whole
+        # records are mapped. returns the number of new records
+        size = self.path.stat().st_size
+        count = (size - HEADER.size) // RECORD.itemsize
+        old = 0 if self.records is None else len(self.records)
+        if count > old:
+            self.records = np.memmap(self.path, dtype=RECORD, mode="r", offset=HEADER.size, shape=(count,))
+        elif self.records is None:
+            self.records = np.zeros(0, dtype=RECORD)
+        return count - old
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def t0(self):
+        return float(self.records["t"][0])
+
+    @property
+    def t1(self):
+        return float(self.records["t"][-1])
+
+    def time(self, pos):
+        return float(self.records["t"][pos])
+
+    def position(self, t):
+        # first record after time t; binary search over the mapped column
+        # (np.searchsorted would copy the strided column first)
+        return bisect.bisect_right(self.records["t"], t)
+
+    def boundary(self, pos, lo=0):
+        # the largest block boundary <= pos (but past lo when a single block
+        # spans lo..pos)
+        col = self.records["t"]
+        if pos >= len(col):
+            return len(col)
+        b = bisect.bisect_left(col, col[pos], lo, pos)
+        return b if b > lo else bisect.bisect_right(col, col[pos], lo)
+
+    def block(self, pos):
+        # (t, prices) of the tick block starting at pos
+        recs = self.records[pos:pos + self.n_tickers]
+        if len(recs) < self.n_tickers or np.any(recs["kind"] != TICK):
+            raise TapeError(f"{self.path}: record {pos} does not start a tick block")
+        return float(recs["t"][0]), np.array(recs["px"])
+
+    def chunks(self, start=0, stop=None, size=CHUNK):
+        # (start, records) slices of the mapped file, each ending on a block
+        # boundary; the slices are views, nothing is copied
+        stop = len(self) if stop is None else min(stop, len(self))
+        while start < stop:
+            end = stop if stop - start <= size else self.boundary(start + size, start)
+            yield start, self.records[start:end]
+            start = end
+
+
+def split(records, n_tickers):
+    # a run of whole blocks -> (times, prices, volumes) with one row per tick,
+    # plus the order records
+    kind = records["kind"]
+    ticks = records[kind == TICK]
+    if len(ticks) % n_tickers:
+        raise TapeError("tick block with missing tickers")
+    m = len(ticks) // n_tickers
+    return (ticks["t"][::n_tickers], ticks["px"].reshape(m, n_tickers),
+            ticks["qty"].reshape(m, n_tickers).astype(np.float64), records[kind == ORDER])
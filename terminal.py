@@ -0,0 +1,163 @@
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import streamlit.components.v1 as components
+
+logger = logging.getLogger(__name__)
+
+# the terminal is a static shell (markup, CSS, JS in frontend/) served as a
+# streamlit component, plus a small per-session JSON bootstrap. css/js/logo
+# files and the bootstrap itself are copied into a build dir under
+# content-hashed names, so the browser can keep them across reruns and visits
+# (streamlit serves component assets as cacheable, only index.html is
+# revalidated); the bootstrap arg every render carries is just its file name.
+FRONTEND_DIR = Path(__file__).parent / "frontend"
+BUILD_DIR = FRONTEND_DIR / "build"
+COMPONENT_NAME = "bankofsam_terminal"
+
+
+# process-wide cache of rendered bootstraps. main.py is re-executed on every
+# rerun of every session, but this module is imported once, so all sessions
+# share one rendered document per distinct input. on_evict is called with
+# each document dropped (the published bootstrap files are deleted with it)
+class RenderCache:
+    def __init__(self, maxsize=16, on_evict=None):
+        self.maxsize = maxsize
+        self.on_evict = on_evict
+        self.hits = 0
+        self.misses = 0
+        self._docs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key, render):
+        with self._lock:
+            doc = self._docs.get(key)
+            if doc is not None:
+                self._docs.move_to_end(key)
+                self.hits += 1
+                return doc
+            # build under the lock so a burst of new sessions pays for one render
+            self.misses += 1
+            doc = render()
+            self._docs[key] = doc
+            while len(self._docs) > self.maxsize:
+                self._evict(self._docs.popitem(last=False)[1])
+            logger.debug("render cache miss %s (%d hits, %d misses)", key[:12], self.hits, self.misses)
+            return doc
+
+    def invalidate(self, key=None):
+        # drop one document, or everything when no key is given
+        with self._lock:
+            if key is None:
+                docs = list(self._docs.values())
+                self._docs.clear()
+            else:
+                docs = [d for d in (self._docs.pop(key, None),) if d is not None]
+            for doc in docs:
+                self._evict(doc)
+
+    def _evict(self, doc):
+        # (lock held) another key may have rendered the very same document
+        if self.on_evict is not None and doc not in self._docs.values():
+            self.on_evict(doc)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._docs)}
+
+
+def _unpublish(fname):
+    (build_dir() / fname).unlink(missing_ok=True)
+
+
+render_cache = RenderCache(on_evict=_unpublish)
+
+
+def render_key(feed_digest, logo, tickers, seed, theme, stress=False):
+    # content hash of everything the document depends on; prices are derived
+    # from (tickers, seed) so they don't need hashing themselves, and
+    # the news feed is represented by its own content digest (see news.py)
+    h = hashlib.sha256()
+    h.update(feed_digest.encode("ascii"))
+    h.update(logo.digest.encode("ascii"))
+    h.update(json.dumps([tickers, seed, theme, bool(stress)]).encode("utf-8"))
+    return h.hexdigest()
+
+
+@functools.lru_cache(maxsize=1)
+def build_dir():
+    # prefer a build dir next to the sources; fall back to a temp dir on a
+    # read-only checkout. bootstraps left by an earlier process are dropped
+    # (this runs once, before this process publishes any)
+    try:
+        BUILD_DIR.mkdir(parents=True, exist_ok=True)
+        probe = BUILD_DIR / ".write-test"
+        probe.write_bytes(b"")
+        probe.unlink()
+        for p in BUILD_DIR.glob("bootstrap.*.json"):
+            p.unlink(missing_ok=True)
+        return BUILD_DIR
+    except OSError:
+        return Path(tempfile.mkdtemp(prefix="bankofsam-build-"))
+
+
+def publish(name, data, prune=False):
+    # write data under a fingerprinted name (once) and return that name.
+    # with prune, any other fingerprint of the same file is deleted: the
+    # shell's bundles change with every edit, and a page loaded from an old
+    # index.html reloads from the new one
+    stem, ext = os.path.splitext(name)
+    fname = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+    path = build_dir() / fname
+    if not path.exists():
+        tmp = path.with_suffix(path.suffix + f".{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    if prune:
+        old = re.compile(re.escape(stem) + r"\.[0-9a-f]{12}" + re.escape(ext))
+        for p in path.parent.iterdir():
+            if p.name != fname and old.fullmatch(p.name):
+                p.unlink(missing_ok=True)
+    return fname
+
+
+@functools.lru_cache(maxsize=1)
+def build_shell():
+    html = (FRONTEND_DIR / "index.html").read_text("utf-8")
+    for name in ("terminal.css", "terminal.js", "market.js"):
+        fname = publish(name, (FRONTEND_DIR / name).read_bytes(), prune=True)
+        html = html.replace(f'"{name}"', f'"{fname}"')
+    (build_dir() / "index.html").write_text(html, "utf-8")
+    return str(build_dir())
+
+
+@functools.lru_cache(maxsize=1)
+def terminal_component():
+    return components.declare_component(COMPONENT_NAME, path=build_shell())
+
+
+def render_bootstrap(payload, logo):
+    # the per-session part of the page, a few KB of compact JSON published
+    # next to the shell; returns its file name, which the client fetches once
+    boot = dict(payload)
+    boot["logo"] = {
+        "logo": publish("sam-logo.png", logo.logo_png),
+        "icon": publish("sam-icon.png", logo.icon_png),
+        "aspect": logo.aspect,
+    }
+    return publish("bootstrap.json", json.dumps(boot, separators=(",", ":")).encode("utf-8"))
+
+
+def terminal(bootstrap, update=None, history=None, news=None, live=None, reply=None, orders=None, book=None,
+             stats=None, depth=None, replay=None, key="terminal"):
+    return terminal_component()(bootstrap=bootstrap, update=update, history=history, news=news, live=live,
+                                reply=reply, orders=orders, book=book, stats=stats, depth=depth, replay=replay,
+                                key=key, default=None)
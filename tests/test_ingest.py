@@ -0,0 +1,41 @@
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ingest import REJECTED, InboxWatcher, NewsWire  # noqa: E402
+
+
+class InboxTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = tmp.name
+        self.wire = NewsWire()
+        self.inbox = InboxWatcher(self.wire, self.path)
+
+    def drop(self, name, data, age):
+        path = os.path.join(self.path, name)
+        with open(path, "wb") as fp:
+            fp.write(data)
+        t = time.time() - age
+        os.utime(path, (t, t))
+
+    def test_bad_file_does_not_block_the_next(self):
+        # nested too deep for the JSON parser: raises on every read
+        self.drop("bad.ndjson", b'{"title": ' + b"[" * 100_000 + b"\n", age=10)
+        self.drop("good.ndjson", json.dumps({"title": "good", "body": "news"}).encode("utf-8"), age=5)
+        self.assertEqual(self.inbox.poll(), 1)
+        self.assertEqual(self.wire.since(None)["stories"], [{"title": "good", "body": "news"}])
+        self.assertEqual(sorted(os.listdir(self.path)), [REJECTED])
+        self.assertEqual(os.listdir(os.path.join(self.path, REJECTED)), ["bad.ndjson"])
+        self.assertEqual(self.inbox.poll(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from market import MarketSimulator  # noqa: E402
+
+
+class SimulateTest(unittest.TestCase):
+    def test_zero_steps_is_an_empty_path(self):
+        sim = MarketSimulator([10.0, 20.0, 30.0], [0.5, 1.0, 1.5])
+        before = sim.prices
+        path = sim.simulate(0)
+        self.assertEqual(path.shape, (0, 3))
+        self.assertEqual(sim.steps, 0)
+        np.testing.assert_array_equal(sim.prices, before)
+        self.assertEqual(list(sim.iter_paths(0)), [])
+
+    def test_batch_matches_single_steps(self):
+        batch = MarketSimulator([10.0, 20.0], [0.5, 1.5], seed=3)
+        single = MarketSimulator([10.0, 20.0], [0.5, 1.5], seed=3)
+        path = batch.simulate(5)
+        steps = np.array([single.step() for _ in range(5)])
+        np.testing.assert_allclose(path, steps)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from news import DEFAULT_STORIES, FeedWatcher, load_feed  # noqa: E402
+
+
+def story(title):
+    return json.dumps({"title": title, "body": "x"}).encode("utf-8")
+
+
+class NotUtf8Test(unittest.TestCase):
+    def write(self, data):
+        fd, path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(data)
+        self.addCleanup(os.unlink, path)
+        return path
+
+    def test_ndjson_skips_the_bad_line(self):
+        bad = b'{"title": "caf\xe9", "body": "latin-1"}'
+        feed = load_feed(self.write(b"\n".join([story("one"), bad, story("twö"), b""])))
+        self.assertEqual([s["title"] for s in feed.stories(0, len(feed))], ["one", "twö"])
+        self.assertEqual(feed.error_count, 1)
+        self.assertEqual(feed.errors[0].record, 2)
+
+    def test_array_skips_the_bad_story(self):
+        feed = load_feed(self.write(b"[" + story("one") + b', {"title": "\xff\xfe"}, ' + story("three") + b"]"))
+        self.assertEqual([s["title"] for s in feed.stories(0, len(feed))], ["one", "three"])
+        self.assertEqual(feed.error_count, 1)
+
+    def test_nothing_readable_falls_back(self):
+        feed = load_feed(self.write(b'\x80\x81{"title": "\xc3"}'))
+        self.assertEqual(feed.stories(0, len(feed)), list(DEFAULT_STORIES))
+        self.assertTrue(feed.error_count)
+
+
+class ReplacedFeedTest(unittest.TestCase):
+    def test_old_feed_reads_the_file_it_scanned(self):
+        root = tempfile.mkdtemp()
+        path = os.path.join(root, "feed.ndjson")
+        with open(path, "wb") as fp:
+            fp.write(b"\n".join([story("old one"), story("old two"), b""]))
+        watcher = FeedWatcher(path)
+        old = watcher.feed
+        tmp = os.path.join(root, "feed.tmp")
+        with open(tmp, "wb") as fp:
+            fp.write(b"\n".join([story("a much longer new story one"), story("new two"), b""]))
+        os.replace(tmp, path)
+        self.assertTrue(watcher.refresh())
+        self.assertIsNot(watcher.feed, old)
+        self.assertEqual([s["title"] for s in old.stories(0, len(old))], ["old one", "old two"])
+        self.assertEqual(watcher.feed.stories(0, 1)[0]["title"], "a much longer new story one")
+        with open(path, "ab") as fp:
+            fp.write(story("appended") + b"\n")
+        self.assertTrue(watcher.refresh())
+        self.assertEqual(watcher.feed.stories(2, 3)[0]["title"], "appended")
+        del old, watcher
+        os.unlink(path)
+        os.rmdir(root)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ingest import NewsWire  # noqa: E402
+from search import NewsSearch, StoryIndex  # noqa: E402
+
+
+class ConcurrentSearchTest(unittest.TestCase):
+    def setUp(self):
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, interval)
+
+    def test_search_while_adding_new_terms(self):
+        # every batch brings terms the index has never seen, so the vocab
+        # keeps outgrowing the published df while queries ask for them
+        index, errors, done = StoryIndex(), [], threading.Event()
+        batches = [[{"title": f"w{b}x{i}", "body": " ".join(f"w{b}y{i}z{j}" for j in range(20))}
+                    for i in range(50)] for b in range(100)]
+
+        def search():
+            while not done.is_set():
+                for b in range(len(batches)):
+                    try:
+                        index.search(f"w{b}x0 w{b}y49z19")
+                    except Exception as e:
+                        errors.append(e)
+                        return
+
+        reader = threading.Thread(target=search)
+        reader.start()
+        try:
+            for batch in batches:
+                index.add(batch)
+        finally:
+            done.set()
+            reader.join()
+        self.assertEqual(errors, [])
+        docs, _, _ = index.search("w99x0")
+        self.assertEqual(docs.tolist(), [99 * 50])
+
+
+class LiveWireTest(unittest.TestCase):
+    def test_burst_larger_than_the_wire_keeps(self):
+        wire = NewsWire(keep=100)
+        search = NewsSearch(wire)
+        wire.put_many({"title": f"burst {i}", "body": ""} for i in range(1500))
+        while search.refresh():
+            pass
+        self.assertEqual(search.query("burst")["total"], 1500)
+        search.stop()
+        wire.put({"title": "after stop", "body": ""})
+        self.assertEqual(wire._taps, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
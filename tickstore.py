@@ -0,0 +1,169 @@
+import threading
+from collections import OrderedDict, namedtuple
+from pathlib import Path
+
+import numpy as np
+
+from history import lttb
+
+# on-disk tick history, columnar per ticker, for chart ranges and analytics
+# far beyond what HistoryStore keeps in memory. layout under the root:
+#
+#   index.npy              the time index: one row per segment
+#                          (sym, seg, first t, last t, rows)
+#   <SYM>/<seg>.t.npy      f8 epoch seconds
+#   <SYM>/<seg>.p.npy      f4 price
+#   <SYM>/<seg>.v.npy      f4 volume
+#
+# a segment is a .npy file preallocated to SEGMENT_ROWS rows (sparse on disk
+# until written) and filled in place through a memmap. reads map the same
+# files, so a range query is a binary search on the time column and slices
+# of the maps: numpy views, nothing is read until it is used. appended rows
+# are buffered and written out every FLUSH_ROWS ticks.
+
+SEGMENT_ROWS = 1 << 18   # about three days at one tick a second
+FLUSH_ROWS = 64
+MAX_MAPS = 256           # open segment files kept mapped
+INDEX = np.dtype([("sym", "U16"), ("seg", "<u4"), ("t0", "<f8"), ("t1", "<f8"), ("rows", "<u4")])
+COLUMNS = (("t", "<f8"), ("p", "<f4"), ("v", "<f4"))
+
+Ticks = namedtuple("Ticks", "t p v")
+
+
+class TickStore:
+    def __init__(self, root, tickers, segment_rows=SEGMENT_ROWS, flush_rows=FLUSH_ROWS):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.tickers = list(tickers)
+        self.segment_rows = int(segment_rows)
+        # sym -> [[seg, t0, t1, rows], ...], oldest first
+        self._segments = {sym: [] for sym in self.tickers}
+        index = self.root / "index.npy"
+        if index.exists():
+            for row in np.load(index):
+                self._segments.setdefault(str(row["sym"]), []).append(
+                    [int(row["seg"]), float(row["t0"]), float(row["t1"]), int(row["rows"])])
+        self._maps = OrderedDict()
+        n = len(self.tickers)
+        self._buf_t = np.empty(int(flush_rows))
+        self._buf_p = np.empty((int(flush_rows), n), dtype=np.float32)
+        self._buf_v = np.empty((int(flush_rows), n), dtype=np.float32)
+        self._buffered = 0
+        self._lock = threading.Lock()
+
+    def append(self, t, prices, volumes):
+        # rows of ticks for every ticker: t (m,), prices and volumes (m, tickers)
+        t = np.atleast_1d(np.asarray(t, dtype=np.float64))
+        prices = np.asarray(prices).reshape(len(t), -1)
+        volumes = np.asarray(volumes).reshape(len(t), -1)
+        with self._lock:
+            a = 0
+            while a < len(t):
+                k = self._buffered
+                b = min(len(t), a + len(self._buf_t) - k)
+                self._buf_t[k:k + b - a] = t[a:b]
+                self._buf_p[k:k + b - a] = prices[a:b]
+                self._buf_v[k:k + b - a] = volumes[a:b]
+                self._buffered += b - a
+                a = b
+                if self._buffered == len(self._buf_t):
+                    self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        m = self._buffered
+        if not m:
+            return
+        t = self._buf_t[:m]
+        for i, sym in enumerate(self.tickers):
+            self._write(sym, t, self._buf_p[:m, i], self._buf_v[:m, i])
+        self._buffered = 0
+        self._save_index()
+
+    def _write(self, sym, t, p, v):
+        segs = self._segments[sym]
+        a = 0
+        while a < len(t):
+            if not segs or segs[-1][3] == self.segment_rows:
+                segs.append([segs[-1][0] + 1 if segs else 0, float(t[a]), float(t[a]), 0])
+            seg = segs[-1]
+            cols = self._map(sym, seg[0])
+            k = seg[3]
+            b = min(len(t), a + self.segment_rows - k)
+            cols.t[k:k + b - a] = t[a:b]
+            cols.p[k:k + b - a] = p[a:b]
+            cols.v[k:k + b - a] = v[a:b]
+            seg[2] = float(t[b - 1])
+            seg[3] = k + b - a
+            a = b
+
+    def _save_index(self):
+        rows = [(sym, *seg) for sym, segs in self._segments.items() for seg in segs]
+        index = np.array(rows, dtype=INDEX)
+        tmp = self.root / "index.tmp.npy"
+        np.save(tmp, index)
+        tmp.replace(self.root / "index.npy")
+
+    def _map(self, sym, seg):
+        key = (sym, seg)
+        cols = self._maps.get(key)
+        if cols is not None:
+            self._maps.move_to_end(key)
+            return cols
+        folder = self.root / sym
+        folder.mkdir(exist_ok=True)
+        maps = []
+        for name, dtype in COLUMNS:
+            path = folder / f"{seg:08d}.{name}.npy"
+            if path.exists():
+                maps.append(np.load(path, mmap_mode="r+"))
+            else:
+                maps.append(np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(self.segment_rows,)))
+        cols = self._maps[key] = Ticks(*maps)
+        # views already handed out keep their own map alive
+        while len(self._maps) > MAX_MAPS:
+            self._maps.popitem(last=False)
+        return cols
+
+    def range(self, sym, t0=None, t1=None):
+        # ticks of one ticker in [t0, t1]: a list of Ticks, one per segment
+        # touched, oldest first. the arrays are views of the mapped files
+        with self._lock:
+            segs = [list(s) for s in self._segments.get(sym, ())]
+            out = []
+            for seg, s0, s1, rows in segs:
+                if not rows or (t1 is not None and s0 > t1) or (t0 is not None and s1 < t0):
+                    continue
+                cols = self._map(sym, seg)
+                t = cols.t[:rows]
+                lo = 0 if t0 is None else int(np.searchsorted(t, t0, side="left"))
+                hi = rows if t1 is None else int(np.searchsorted(t, t1, side="right"))
+                if hi > lo:
+                    out.append(Ticks(t[lo:hi], cols.p[lo:hi], cols.v[lo:hi]))
+        return out
+
+    def span(self, sym):
+        # (first t, last t) stored for a ticker, or None
+        segs = self._segments.get(sym)
+        if not segs or not segs[0][3]:
+            return None
+        return segs[0][1], segs[-1][2]
+
+    def series(self, sym, t0=None, t1=None, points=1360):
+        # chart series over any range: each segment is downsampled on its own
+        # (LTTB, see history.py) to its share of `points`, so the cost is
+        # about one LTTB pass and one segment in memory whatever the range
+        ranges = self.range(sym, t0, t1)
+        total = sum(len(r.t) for r in ranges)
+        if not total:
+            return np.zeros(0), np.zeros(0)
+        parts = [lttb(r.t, r.p, max(3, points * len(r.t) // total)) for r in ranges]
+        return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._maps.clear()
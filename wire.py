@@ -0,0 +1,244 @@
+import struct
+
+import numpy as np
+
+# binary price update frames, decoded in the browser with typed arrays
+# (see applyUpdate in frontend/market.js). little-endian throughout:
+#
+#   header  16 bytes  u8 version, u8 flags, u16 reserved, u32 seq, u32 base, u32 n
+#   full    n * f32   every price, in ticker order           (flags & FULL)
+#   delta   bitmap    ceil(n/8) bytes padded to 4, bit i set = ticker i changed
+#           k * f32   the changed prices, in ticker order
+#
+# the bitmap is padded so the float block stays 4-byte aligned and can be
+# viewed as a Float32Array without copying.
+#
+# chart history uses its own frame (flags & SERIES):
+#
+#   header  16 bytes  u8 version, u8 flags, u16 ticker, u32 count, f64 t0
+#   times   count * f32   seconds since t0
+#   prices  count * f32
+#
+# orders, one frame per update that carries any (flags & ORDERS):
+#
+#   header  16 bytes  u8 version, u8 flags, u16 reserved, u32 seq, u32 count, u32 fills
+#   times   count * f64   epoch seconds
+#   px      count * f32
+#   sym     count * u32   ticker slot
+#   qty     count * u32
+#   trader  count * u32   index into the trader names, modulo their count
+#   filled  count * u32   shares of the order that traded on arrival
+#   side    count * u8    1 = buy
+#           padding to 8 bytes
+#   then the fills the orders made (see book.py):
+#   times   fills * f64
+#   px      fills * f32
+#   sym     fills * u32
+#   qty     fills * u32
+#   side    fills * u8    side of the incoming order, 1 = buy
+#
+# top of book for the tickers whose book moved (flags & BOOK):
+#
+#   header  16 bytes  u8 version, u8 flags, u16 reserved, u32 seq, u32 count, u32 reserved
+#   sym     count * u32
+#   bid     count * f32   NaN when that side is empty
+#   ask     count * f32
+#   bidq    count * u32
+#   askq    count * u32
+#
+# trade stats (see analytics.TradeStats) for the same tickers (flags & STATS):
+#
+#   header  16 bytes  u8 version, u8 flags, u16 reserved, u32 seq, u32 count, u32 reserved
+#   volume  count * f64   shares traded this session
+#   sym     count * u32
+#   trades  count * u32
+#   open    count * f32   session reference price
+#   last    count * f32   last trade
+#   vwap    count * f32
+#   ema20   count * f32
+#   ema50   count * f32
+#   rv      count * f32   realized volatility, %
+#   buy     count * f32   share of the volume bought
+#
+# the depth ladder of one ticker (flags & DEPTH, with FULL for a snapshot):
+#
+#   header  16 bytes  u8 version, u8 flags, u16 ticker, u32 seq, u32 base,
+#                     u16 bid levels, u16 ask levels
+#   bids    px u32 (cents) * levels, then qty u32 * levels
+#   asks    the same
+#
+# a snapshot lists the top levels best first. a delta from frame `base`
+# lists the levels that changed, size 0 for one that left the ladder.
+
+VERSION = 1
+FULL = 1
+SERIES = 2
+ORDERS = 4
+BOOK = 8
+DEPTH = 16
+STATS = 32
+HEADER = struct.Struct("<BBHIII")
+SERIES_HEADER = struct.Struct("<BBHId")
+DEPTH_HEADER = struct.Struct("<BBHIIHH")
+STATS_COLUMNS = (("volume", "<f8"), ("sym", "<u4"), ("trades", "<u4"), ("open", "<f4"), ("last", "<f4"),
+                 ("vwap", "<f4"), ("ema20", "<f4"), ("ema50", "<f4"), ("rv", "<f4"), ("buy", "<f4"))
+
+
+def _bitmap_len(n):
+    return ((n + 7) // 8 + 3) & ~3
+
+
+def encode_full(seq, prices):
+    prices = np.asarray(prices, dtype="<f4")
+    return HEADER.pack(VERSION, FULL, 0, seq, seq, len(prices)) + prices.tobytes()
+
+
+def encode_delta(seq, base, n, idx, values):
+    mask = np.zeros(_bitmap_len(n) * 8, dtype=bool)
+    mask[idx] = True
+    bitmap = np.packbits(mask, bitorder="little").tobytes()
+    # values must follow ticker order to line up with the set bits
+    order = np.argsort(idx, kind="stable")
+    vals = np.asarray(values, dtype="<f4")[order]
+    return HEADER.pack(VERSION, 0, 0, seq, base, n) + bitmap + vals.tobytes()
+
+
+def encode_series(ticker, t, p):
+    t = np.asarray(t, dtype=np.float64)
+    t0 = float(t[0]) if len(t) else 0.0
+    return (SERIES_HEADER.pack(VERSION, SERIES, ticker, len(t), t0)
+            + (t - t0).astype("<f4").tobytes() + np.asarray(p, dtype="<f4").tobytes())
+
+
+def encode_orders(seq, orders, filled=None, fills=None):
+    # orders: tape.RECORD records, fills: book.FILL records (see broadcast.py)
+    if orders is None or not len(orders):
+        return None
+    if filled is None:
+        filled = np.zeros(len(orders), dtype=np.uint32)
+    if fills is None:
+        fills = np.zeros(0, dtype=[("t", "<f8"), ("px", "<f8"), ("sym", "<u4"), ("qty", "<u4"), ("side", "u1")])
+    head = (HEADER.pack(VERSION, ORDERS, 0, seq, len(orders), len(fills))
+            + orders["t"].astype("<f8").tobytes() + orders["px"].astype("<f4").tobytes()
+            + orders["sym"].astype("<u4").tobytes() + orders["qty"].astype("<u4").tobytes()
+            + orders["trader"].astype("<u4").tobytes() + np.asarray(filled, dtype="<u4").tobytes()
+            + orders["side"].astype("u1").tobytes())
+    return (head + bytes(-len(head) % 8)
+            + fills["t"].astype("<f8").tobytes() + fills["px"].astype("<f4").tobytes()
+            + fills["sym"].astype("<u4").tobytes() + fills["qty"].astype("<u4").tobytes()
+            + fills["side"].astype("u1").tobytes())
+
+
+def encode_book(seq, idx, top):
+    # top: (bid, bid size, ask, ask size) rows for the tickers in idx, as
+    # from MatchingEngine.top
+    if idx is None or not len(idx):
+        return None
+    top = np.asarray(top)
+    return (HEADER.pack(VERSION, BOOK, 0, seq, len(idx), 0) + np.asarray(idx, dtype="<u4").tobytes()
+            + top[0].astype("<f4").tobytes() + top[2].astype("<f4").tobytes()
+            + np.nan_to_num(top[1]).astype("<u4").tobytes() + np.nan_to_num(top[3]).astype("<u4").tobytes())
+
+
+def encode_stats(seq, idx, cols):
+    # cols: TradeStats.columns(idx)
+    if idx is None or not len(idx):
+        return None
+    cols = dict(cols, sym=idx)
+    return (HEADER.pack(VERSION, STATS, 0, seq, len(idx), 0)
+            + b"".join(np.asarray(cols[name], dtype=dtype).tobytes() for name, dtype in STATS_COLUMNS))
+
+
+def encode_depth(ticker, seq, base, bids, asks):
+    # bids, asks: (prices in cents, sizes), as from MatchingEngine.depth or
+    # book.level_changes; base None makes a snapshot
+    flags = DEPTH | (FULL if base is None else 0)
+    return (DEPTH_HEADER.pack(VERSION, flags, ticker, seq, seq if base is None else base, len(bids[0]), len(asks[0]))
+            + b"".join(np.asarray(col, dtype="<u4").tobytes() for col in (*bids, *asks)))
+
+
+def encode_update(update):
+    # update dict as produced by MarketFeed.update_since
+    if update is None:
+        return None
+    if update.get("full"):
+        return encode_full(update["seq"], update["p"])
+    return encode_delta(update["seq"], update["base"], update["n"], update["i"], update["p"])
+
+
+def decode(buf):
+    # python mirror of the client decoder: (seq, base, full, idx, prices)
+    version, flags, _, seq, base, n = HEADER.unpack_from(buf, 0)
+    if version != VERSION:
+        raise ValueError(f"unsupported wire version {version}")
+    if flags & SERIES:
+        raise ValueError("series frame, use decode_series")
+    off = HEADER.size
+    if flags & FULL:
+        return seq, base, True, np.arange(n), np.frombuffer(buf, dtype="<f4", count=n, offset=off)
+    nb = _bitmap_len(n)
+    mask = np.unpackbits(np.frombuffer(buf, dtype=np.uint8, count=nb, offset=off), bitorder="little")[:n]
+    idx = np.flatnonzero(mask)
+    return seq, base, False, idx, np.frombuffer(buf, dtype="<f4", count=len(idx), offset=off + nb)
+
+
+def decode_series(buf):
+    # (ticker, times, prices)
+    version, flags, ticker, count, t0 = SERIES_HEADER.unpack_from(buf, 0)
+    if version != VERSION or not flags & SERIES:
+        raise ValueError("not a series frame")
+    off = SERIES_HEADER.size
+    dt = np.frombuffer(buf, dtype="<f4", count=count, offset=off)
+    p = np.frombuffer(buf, dtype="<f4", count=count, offset=off + 4 * count)
+    return ticker, t0 + dt.astype(np.float64), p
+
+
+def _columns(buf, off, count, layout):
+    cols = {}
+    for name, dtype in layout:
+        cols[name] = np.frombuffer(buf, dtype=dtype, count=count, offset=off)
+        off += count * np.dtype(dtype).itemsize
+    return cols, off
+
+
+def decode_orders(buf):
+    # (seq, {column: array}, {fill column: array})
+    version, flags, _, seq, count, nfills = HEADER.unpack_from(buf, 0)
+    if version != VERSION or not flags & ORDERS:
+        raise ValueError("not an orders frame")
+    cols, off = _columns(buf, HEADER.size, count, (("t", "<f8"), ("px", "<f4"), ("sym", "<u4"), ("qty", "<u4"),
+                                                   ("trader", "<u4"), ("filled", "<u4"), ("side", "u1")))
+    fills, _ = _columns(buf, off + -off % 8, nfills, (("t", "<f8"), ("px", "<f4"), ("sym", "<u4"), ("qty", "<u4"),
+                                                      ("side", "u1")))
+    return seq, cols, fills
+
+
+def decode_book(buf):
+    # (seq, {column: array})
+    version, flags, _, seq, count, _ = HEADER.unpack_from(buf, 0)
+    if version != VERSION or not flags & BOOK:
+        raise ValueError("not a book frame")
+    cols, _ = _columns(buf, HEADER.size, count, (("sym", "<u4"), ("bid", "<f4"), ("ask", "<f4"), ("bidq", "<u4"),
+                                                 ("askq", "<u4")))
+    return seq, cols
+
+
+def decode_stats(buf):
+    # (seq, {column: array})
+    version, flags, _, seq, count, _ = HEADER.unpack_from(buf, 0)
+    if version != VERSION or not flags & STATS:
+        raise ValueError("not a stats frame")
+    cols, _ = _columns(buf, HEADER.size, count, STATS_COLUMNS)
+    return seq, cols
+
+
+def decode_depth(buf):
+    # (ticker, seq, base, full, (bid prices, sizes), (ask prices, sizes))
+    version, flags, ticker, seq, base, nb, na = DEPTH_HEADER.unpack_from(buf, 0)
+    if version != VERSION or not flags & DEPTH:
+        raise ValueError("not a depth frame")
+    cols, off = [], DEPTH_HEADER.size
+    for count in (nb, nb, na, na):
+        cols.append(np.frombuffer(buf, dtype="<u4", count=count, offset=off))
+        off += 4 * count
+    return ticker, seq, base, bool(flags & FULL), (cols[0], cols[1]), (cols[2], cols[3])